@@ -0,0 +1,59 @@
+"""
+Headless games played by agents only: games per second, and time per decision
+(game engine included).
+For each table size from 5 to 10, SEATS agents play at once.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/bench_agents.py
+"""
+import random
+import time
+from collections import Counter
+
+from avalontgbot.agent import Agent
+from avalontgbot.simulator import agent_game, play
+
+SEATS = 10_000
+SEED = 42
+
+
+def main() -> None:
+    rng = random.Random(SEED)
+    decisions = 0
+
+    # count the decisions of every agent
+    methods = ("propose_team", "decide", "assassinate")
+    originals = {m: getattr(Agent, m) for m in methods}
+
+    def counted(method):
+        def call(*args, **kwargs):
+            nonlocal decisions
+            decisions += 1
+            return method(*args, **kwargs)
+
+        return call
+
+    print(f"{'players':>7}{'games/s':>10}{'us/decision':>13}{'good wins':>11}")
+
+    for num_players in range(5, 11):
+        games = [agent_game(num_players, rng=rng) for _ in range(SEATS // num_players)]
+        decisions = 0
+
+        for m in methods:
+            setattr(Agent, m, counted(originals[m]))
+        start = time.perf_counter()
+        for game in games:
+            _ = play(game)
+        elapsed = time.perf_counter() - start
+        for m in methods:
+            setattr(Agent, m, originals[m])
+
+        wins = Counter(game.winner for game in games)
+        print(
+            f"{num_players:>7}{len(games) / elapsed:>10.0f}"
+            f"{elapsed / decisions * 1e6:>13.2f}{wins[True] / len(games):>11.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
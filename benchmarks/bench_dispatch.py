@@ -0,0 +1,59 @@
+"""
+Compare the cost of routing a poll answer through the (phase, event) dispatch
+table against the if/elif chain previously used in `receive_poll_answer`.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/bench_dispatch.py
+"""
+import timeit
+
+from avalontgbot.dispatch import Dispatcher, UpdateEvent as UPDATE
+from avalontgbot.gamephase import GamePhase as PHASE
+
+NUMBER = 200_000
+
+
+def _noop(*_):
+    return None
+
+
+dispatcher = Dispatcher()
+_ = dispatcher.register(UPDATE.HOST_POLL, *PHASE)(_noop)
+_ = dispatcher.register(UPDATE.TEAM_POLL, PHASE.BUILD_TEAM)(_noop)
+_ = dispatcher.register(UPDATE.ASSASSIN_POLL, PHASE.LAST_CHANCE)(_noop)
+_ = dispatcher.register(UPDATE.ROLES_POLL, PHASE.LOBBY)(_noop)
+
+
+def chain(allows_multiple_answers: bool, phase: PHASE):
+    # mirrors the old receive_poll_answer routing
+    if not allows_multiple_answers:
+        return _noop()
+    elif phase == PHASE.BUILD_TEAM:
+        return _noop()
+    elif phase == PHASE.LAST_CHANCE:
+        return _noop()
+    elif phase == PHASE.LOBBY:
+        return _noop()
+
+
+def table(event: UPDATE, phase: PHASE):
+    return dispatcher.resolve(phase, event)()
+
+
+CASES = {
+    "host poll": ((False, PHASE.QUEST), (UPDATE.HOST_POLL, PHASE.QUEST)),
+    "team poll": ((True, PHASE.BUILD_TEAM), (UPDATE.TEAM_POLL, PHASE.BUILD_TEAM)),
+    "roles poll (last branch)": ((True, PHASE.LOBBY), (UPDATE.ROLES_POLL, PHASE.LOBBY)),
+}
+
+
+def main() -> None:
+    print(f"{'case':<26}{'chain ns':>10}{'table ns':>10}")
+    for name, (chain_args, table_args) in CASES.items():
+        t_chain = timeit.timeit(lambda: chain(*chain_args), number=NUMBER)
+        t_table = timeit.timeit(lambda: table(*table_args), number=NUMBER)
+        print(f"{name:<26}{t_chain / NUMBER * 1e9:>10.1f}{t_table / NUMBER * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
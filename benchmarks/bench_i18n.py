@@ -0,0 +1,91 @@
+"""
+Message rendering with precompiled catalogs: time per message of Translator.render
+as the number of languages grows, against the inline f-string the bot used before.
+The catalog path costs a few times the f-string (chat lookup, keyword arguments and
+joining the segments in Python), and the cost stays flat as languages are added.
+Each language is a copy of the shipped English catalog, and chats are spread
+evenly across languages.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/bench_i18n.py
+"""
+import json
+import time
+
+from avalontgbot.i18n import LOCALES_DIR, Catalog, Translator
+
+MESSAGES = 200_000
+CHATS = 1_000
+KEY = "turn.started"
+FIELDS = {
+    "turn": 3,
+    "leader": '<a href="tg://user?id=1">Eve</a>',
+}
+
+
+def translator_with(num_languages: int, templates: dict[str, str]) -> Translator:
+    fallback = Catalog("l0", templates)
+    catalogs = {"l0": fallback}
+    for i in range(1, num_languages):
+        catalogs[f"l{i}"] = Catalog(f"l{i}", templates, fallback)
+
+    translator = Translator(catalogs, "l0")
+    for chat_id in range(CHATS):
+        translator.set_language(chat_id, f"l{chat_id % num_languages}")
+
+    return translator
+
+
+def main() -> None:
+    templates = json.loads((LOCALES_DIR / "en.json").read_text(encoding="utf-8"))
+
+    print(f"{'languages':>9} {'compile (ms)':>12} {'render (ns/msg)':>15} {'pages built':>11}")
+
+    for num_languages in (1, 10, 100):
+        start = time.perf_counter()
+        translator = translator_with(num_languages, templates)
+        compiled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(MESSAGES):
+            _ = translator.render(i % CHATS, KEY, **FIELDS)
+        elapsed = time.perf_counter() - start
+
+        built = 0
+
+        def build(language: str) -> str:
+            nonlocal built
+            built += 1
+            return language
+
+        for i in range(MESSAGES):
+            _ = translator.page(i % CHATS, "rules", build)
+
+        print(
+            f"{num_languages:>9} {compiled * 1e3:>12.1f} "
+            f"{elapsed / MESSAGES * 1e9:>15.0f} {built:>11}"
+        )
+
+    # the inline f-string the message was built with before the catalogs
+    def baseline(turn: int, leader: str) -> str:
+        return (
+            f"Turn {turn} has started!\n{leader} is the team leader for this round.\n"
+            "Wait for leader's team proposal.\n"
+        )
+
+    assert baseline(**FIELDS) == translator.render(0, KEY, **FIELDS)
+
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        _ = baseline(**FIELDS)
+    baseline_elapsed = time.perf_counter() - start
+
+    print(
+        f"\nf-string baseline: {baseline_elapsed / MESSAGES * 1e9:.0f} ns/msg, "
+        f"Translator.render with 100 languages: {elapsed / MESSAGES * 1e9:.0f} ns/msg "
+        f"({elapsed / baseline_elapsed:.1f}x the baseline)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Throughput of the vote handlers on each event loop implementation (see EVENT_LOOP in bot.py),
+with the lag of the loop measured meanwhile by the monitor of health.py.
+Every game waits for its votes, and every player presses a vote button at once; the updates
+go through the pipeline of the bot, each in a task of its own as python-telegram-bot runs them,
+and every API call yields to the loop after LATENCY seconds, 0 to measure the loop alone.
+Event loops not installed are left out.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/bench_loop.py
+"""
+import asyncio
+import json
+import logging
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from bench_suite import voting
+
+from avalontgbot.controller import _remove_game, button_vote_handler, existingGames
+from avalontgbot.health import EVENT_LOOPS, LoopMonitor, loop_factory
+from avalontgbot.pipeline import PriorityUpdateProcessor
+from avalontgbot.profiler import SamplingProfiler
+
+GAMES = 200
+ROUNDS = 5
+LATENCIES = (0.0, 0.002)
+
+
+class SlowBot:
+    """
+    Stand-in for the Telegram bot answering every API call after a delay.
+    """
+
+    def __init__(self, latency: float):
+        self.id: int = 0
+        self._latency: float = latency
+
+    async def call(self, *args: Any, **kwargs: Any) -> Any:
+        await asyncio.sleep(self._latency)
+        return SimpleNamespace(message_id=1, poll=SimpleNamespace(id="poll"))
+
+    def __getattr__(self, name: str):
+        return self.call
+
+
+async def run_round(latency: float, monitor: LoopMonitor) -> float:
+    """
+    Handle a vote from every player of every game, recording the lag of the loop meanwhile.
+    :return: the votes handled per second
+    """
+    bot = SlowBot(latency)
+    context = SimpleNamespace(bot=bot, bot_data={})
+    processor = PriorityUpdateProcessor(key=lambda u: u.key)  # pyright: ignore[reportAttributeAccessIssue]
+    games = [voting(-i - 1) for i in range(GAMES)]
+    updates = []
+
+    for game in games:
+        existingGames[game.key] = game
+        for player in game.players:
+            query = SimpleNamespace(
+                data=json.dumps({"vote": "yes", "gid": game.id, "tid": game.thread_id}),
+                from_user=SimpleNamespace(id=player.userid),
+                answer=bot.call,
+                edit_message_text=bot.call,
+                delete_message=bot.call,
+            )
+            updates.append(SimpleNamespace(callback_query=query, poll_answer=None, key=game.key))
+
+    watching = asyncio.create_task(monitor.run())
+    start = time.perf_counter()
+    _ = await asyncio.gather(
+        *(
+            asyncio.create_task(processor.process_update(u, button_vote_handler(u.callback_query, None, context)))  # pyright: ignore[reportArgumentType]
+            for u in updates
+        )
+    )
+    elapsed = time.perf_counter() - start
+    _ = watching.cancel()
+
+    for game in games:
+        _remove_game(game.key)
+
+    return len(updates) / elapsed
+
+
+async def run(latency: float) -> tuple[float, LoopMonitor]:
+    monitor = LoopMonitor(SamplingProfiler().collapse, interval=0.001)
+    rates = [await run_round(latency, monitor) for _ in range(ROUNDS)]
+    return statistics.median(rates), monitor
+
+
+def main() -> None:
+    # the controller logs every vote
+    logging.disable(logging.WARNING)
+    print(f"{GAMES} games of 10 players voting at once, median of {ROUNDS} rounds")
+    print(f"{'loop':<10}{'latency ms':>11}{'votes/s':>10}{'lag p99 ms':>12}{'lag max ms':>12}")
+
+    for name in EVENT_LOOPS:
+        try:
+            factory = loop_factory(name)
+        except ValueError:
+            print(f"{name:<10}  not installed")
+            continue
+
+        for latency in LATENCIES:
+            with asyncio.Runner(loop_factory=factory) as runner:
+                rate, monitor = runner.run(run(latency))
+            print(
+                f"{name:<10}{latency * 1000:>11.0f}{rate:>10.0f}"
+                f"{monitor.histogram.quantile(0.99) * 1000:>12.0f}{monitor.histogram.max * 1000:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
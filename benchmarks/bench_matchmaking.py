@@ -0,0 +1,92 @@
+"""
+Simulated wait times of the matchmaking queue, and the cost of its operations.
+Users arrive at ARRIVAL_RATE per second with random preferences, a few leave the queue
+before being matched; waits are measured on a simulated clock, operations on the real one.
+A bucket matches as soon as it is full, so however many users arrive the queue holds at
+most a few hundred of them, and each operation only touches the buckets of one user.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/bench_matchmaking.py
+"""
+import random
+import statistics
+import time
+
+from avalontgbot.constants import PLAYERS_TO_RULES, SELECTABLE_ROLES
+from avalontgbot.matchmaking import MatchmakingQueue
+from avalontgbot.player import Player
+
+NUM_USERS = 100_000
+ARRIVAL_RATE = 5.0
+LEAVE_PROBABILITY = 0.05
+SEED = 42
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def random_preferences(rng: random.Random) -> tuple[list[int], list]:
+    counts = sorted(PLAYERS_TO_RULES)
+    low = rng.choice(counts)
+    high = rng.choice([n for n in counts if n >= low])
+    # most players accept the default roles, some want one or two extra
+    roles = rng.sample(SELECTABLE_ROLES, rng.choice([0, 0, 0, 1, 2]))
+    return [n for n in counts if low <= n <= high], roles
+
+
+def simulate() -> None:
+    rng = random.Random(SEED)
+    clock = SimulatedClock()
+    queue = MatchmakingQueue(clock)
+    waits: list[float] = []
+    # user id => time of joining, to measure the wait of matched users
+    joined: dict[int, float] = {}
+    operations = 0
+    elapsed = 0.0
+
+    for user_id in range(NUM_USERS):
+        clock.now += rng.expovariate(ARRIVAL_RATE)
+
+        if joined and rng.random() < LEAVE_PROBABILITY:
+            leaving = rng.choice(list(joined)[:100])
+            start = time.perf_counter()
+            _ = queue.dequeue(leaving)
+            elapsed += time.perf_counter() - start
+            operations += 1
+
+        counts, roles = random_preferences(rng)
+        player = Player(user_id, str(user_id))
+        start = time.perf_counter()
+        try:
+            match = queue.enqueue(player, counts, roles)
+        except ValueError:
+            continue
+        finally:
+            elapsed += time.perf_counter() - start
+            operations += 1
+
+        joined[user_id] = clock.now
+        if match is not None:
+            for player in match[2]:
+                waits.append(clock.now - joined.pop(player.userid))
+
+        # forget the users who left
+        if len(joined) > 2 * len(queue) + 100:
+            joined = {u: t for u, t in joined.items() if u in queue}
+
+    waits.sort()
+    print(f"matched users: {len(waits)}, still waiting: {len(queue)}")
+    print(
+        f"wait seconds: median {statistics.median(waits):.1f}, "
+        f"p95 {waits[int(len(waits) * 0.95)]:.1f}, max {waits[-1]:.1f}"
+    )
+    print(f"{elapsed / operations * 1e6:.2f} us per enqueue or dequeue")
+
+
+if __name__ == "__main__":
+    simulate()
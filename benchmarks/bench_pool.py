@@ -0,0 +1,59 @@
+"""
+Aggregate group-message throughput of the bot pool against fake rate-limited tokens.
+Each fake token sends one message at a time, taking DELAY seconds, like a token at its
+rate limit; games are pinned to the tokens of the pool round-robin.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/bench_pool.py
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+from avalontgbot import controller
+from avalontgbot.controller import _group_bot
+from avalontgbot.pool import BotPool
+
+NUM_GAMES = 32
+MESSAGES_PER_GAME = 10
+DELAY = 0.005
+
+
+class RateLimitedBot:
+    def __init__(self, id: int):
+        self.id: int = id
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        async with self._lock:
+            await asyncio.sleep(DELAY)
+
+
+async def run(pool_size: int) -> float:
+    controller.botPool = BotPool()
+    bots = [RateLimitedBot(i + 1) for i in range(pool_size)]
+    for bot in bots:
+        controller.botPool.add(bot)
+    for g in range(NUM_GAMES):
+        _ = controller.botPool.pin_chat(-g - 1, bots[g % pool_size].id)
+
+    async def game(chat_id: int):
+        context = SimpleNamespace(bot=bots[0], bot_data={})
+        for i in range(MESSAGES_PER_GAME):
+            await _group_bot(context, chat_id).send_message(chat_id=chat_id, text=str(i))  # pyright: ignore[reportArgumentType]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(game(-g - 1) for g in range(NUM_GAMES)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    total = NUM_GAMES * MESSAGES_PER_GAME
+    print(f"{'tokens':>6}{'seconds':>10}{'msg/s':>10}")
+    for size in (1, 2, 4, 8):
+        elapsed = asyncio.run(run(size))
+        print(f"{size:>6}{elapsed:>10.3f}{total / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
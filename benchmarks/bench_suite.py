@@ -0,0 +1,431 @@
+"""
+Benchmark suite of the Game and controller hot paths, compared against stored baselines.
+Each case is timed in several samples; a case is flagged as a regression when its samples
+are slower than the baseline ones by a one-sided Mann-Whitney U test at ALPHA, and its
+median is slower by more than THRESHOLD, so that noise alone is not reported.
+Baselines depend on the machine, so they are kept out of version control.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/bench_suite.py --save    # record the baselines
+    PYTHONPATH=src python benchmarks/bench_suite.py           # compare, exit 1 on regressions
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import math
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from avalontgbot.agent import Agent
+from avalontgbot.controller import (
+    _bool_to_emoji,
+    _remove_game,
+    _routine_start_game,
+    button_vote_handler,
+    dump_game,
+    existingGames,
+    load_game,
+)
+from avalontgbot.game import Game
+from avalontgbot.gamephase import GamePhase as PHASE
+from avalontgbot.player import Player
+from avalontgbot.role import Role as ROLE
+from avalontgbot.spill import SpillStore
+
+BASELINES = Path(__file__).parent / "baselines.json"
+SAMPLES = 20
+# seconds a sample should last at least, to dwarf the timer resolution
+MIN_SAMPLE_TIME = 0.02
+ALPHA = 0.01
+THRESHOLD = 0.10
+
+NUM_PLAYERS = 10
+
+# databases of the spilled lobbies, removed on exit
+SPILL_DIR = tempfile.TemporaryDirectory()
+
+# a case prepares the state for a number of operations, untimed,
+# and returns the function performing them, timed
+Case = Callable[[int], Callable[[], None]]
+
+
+class NullBot:
+    """
+    Stand-in for the Telegram bot answering every API call instantly.
+    """
+
+    def __init__(self):
+        self.id: int = 0
+        self._next_id: int = 0
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any):
+        self._next_id += 1
+        return SimpleNamespace(message_id=self._next_id, chat_id=chat_id, text=text)
+
+    async def send_poll(self, chat_id: int, question: str, options: list[str], **kwargs: Any):
+        self._next_id += 1
+        return SimpleNamespace(message_id=self._next_id, poll=SimpleNamespace(id=f"poll{self._next_id}"))
+
+    async def get_chat(self, chat_id: int):
+        return SimpleNamespace(id=chat_id, title="Benchmark")
+
+    def __getattr__(self, name: str):
+        async def call(*args: Any, **kwargs: Any) -> bool:
+            return True
+
+        return call
+
+
+def lobby(size: int = NUM_PLAYERS, id: int = -1) -> Game:
+    game = Game(Player(1, "Player1"), id)
+    for i in range(2, size + 1):
+        game.player_join(Player(i, f"Player{i}"))
+    game.set_special_roles([ROLE.PERCIVAL, ROLE.MORGANA])
+    return game
+
+
+def voting(id: int = -1) -> Game:
+    """
+    :return: a started game with a team proposed, waiting for the votes
+    """
+    game = lobby(id=id)
+    game.start_game()
+    game.create_team(game.players[: game.team_sizes[game.turn]])
+    return game
+
+
+def on_mission(rng: random.Random) -> Game:
+    """
+    :return: a started game with the team on the mission, every member having voted
+    """
+    game = voting()
+    for p in game.players:
+        _ = game.add_player_vote(p, True)
+    _ = game.update_after_team_decision()
+    for p in game.team:
+        _ = game.add_player_vote(p, rng.random() < 0.8)
+    return game
+
+
+def case_start_game(n: int) -> Callable[[], None]:
+    games = [lobby() for _ in range(n)]
+
+    def run():
+        for game in games:
+            game.start_game()
+
+    return run
+
+
+def case_add_player_vote(n: int) -> Callable[[], None]:
+    rng = random.Random(0)
+    games = [voting() for _ in range((n + NUM_PLAYERS - 1) // NUM_PLAYERS)]
+    votes = [(game, p, rng.random() < 0.5) for game in games for p in game.players][:n]
+
+    def run():
+        for game, player, vote in votes:
+            _ = game.add_player_vote(player, vote)
+
+    return run
+
+
+def case_update_after_team_decision(n: int) -> Callable[[], None]:
+    rng = random.Random(0)
+    games = [voting() for _ in range(n)]
+    for game in games:
+        for p in game.players:
+            _ = game.add_player_vote(p, rng.random() < 0.5)
+
+    def run():
+        for game in games:
+            _ = game.update_after_team_decision()
+
+    return run
+
+
+def case_update_after_mission(n: int) -> Callable[[], None]:
+    rng = random.Random(0)
+    games = [on_mission(rng) for _ in range(n)]
+
+    def run():
+        for game in games:
+            _ = game.update_after_mission()
+
+    return run
+
+
+def case_lookup_player(n: int) -> Callable[[], None]:
+    game = lobby()
+    # the last player is the worst case of the scan
+    ids = [game.players[-1].userid] * n
+
+    def run():
+        for id in ids:
+            _ = game.lookup_player(id)
+
+    return run
+
+
+def case_bool_to_emoji(n: int) -> Callable[[], None]:
+    game = lobby()
+    votes = [i % 3 != 0 for i in range(NUM_PLAYERS)]
+    players = game.players
+
+    def run():
+        for _ in range(n):
+            _ = _bool_to_emoji(votes, players)
+
+    return run
+
+
+def case_button_vote(n: int) -> Callable[[], None]:
+    """
+    One press of a team vote button, decoded and counted, with votes still missing.
+    """
+    games = [voting(-i - 1) for i in range(n)]
+
+    async def noop(**kwargs: Any) -> bool:
+        return True
+
+    queries = [
+        SimpleNamespace(
+            data=json.dumps({"vote": "yes", "gid": game.id, "tid": game.thread_id}),
+            from_user=SimpleNamespace(id=game.players[0].userid),
+            answer=noop,
+            edit_message_text=noop,
+            delete_message=noop,
+        )
+        for game in games
+    ]
+    context = SimpleNamespace(bot=NullBot(), bot_data={})
+
+    async def press():
+        for query in queries:
+            await button_vote_handler(query, None, context)  # pyright: ignore[reportArgumentType]
+
+    def run():
+        for game in games:
+            existingGames[game.key] = game
+        try:
+            asyncio.run(press())
+        finally:
+            for game in games:
+                _remove_game(game.key)
+
+    return run
+
+
+def case_full_game(n: int) -> Callable[[], None]:
+    """
+    Whole games of agents played through the controller, every message sent to a bot doing nothing.
+    """
+    random.seed(0)
+    rng = random.Random(0)
+    games: list[Game] = []
+    for i in range(n):
+        agents = [Agent(-j, rng=rng) for j in range(1, NUM_PLAYERS + 1)]
+        game = Game(agents[0], -1_000_000 - i)
+        for agent in agents[1:]:
+            game.player_join(agent)
+        games.append(game)
+    context = SimpleNamespace(bot=NullBot(), bot_data={})
+
+    async def play():
+        for game in games:
+            existingGames[game.key] = game
+            await _routine_start_game(context, game)  # pyright: ignore[reportArgumentType]
+
+    def run():
+        asyncio.run(play())
+        assert all(game.phase == PHASE.GAME_OVER for game in games)
+
+    return run
+
+
+def case_restore_spilled_lobby(n: int) -> Callable[[], None]:
+    """
+    Lobbies spilled to disk, moved back to memory by their next update.
+    """
+    _, path = tempfile.mkstemp(suffix=".db", dir=SPILL_DIR.name)
+    store = SpillStore(path, dump_game, load_game, existingGames, idle=0)
+    games = [lobby(id=-2_000_000 - i) for i in range(n)]
+    for game in games:
+        existingGames[game.key] = game
+    _ = store.spill()
+
+    def run():
+        for game in games:
+            store.touch(game.key)
+        assert all(game.key in existingGames for game in games)
+
+        for game in games:
+            _remove_game(game.key)
+        store.close()
+
+    return run
+
+
+CASES: dict[str, Case] = {
+    "Game.start_game": case_start_game,
+    "Game.add_player_vote": case_add_player_vote,
+    "Game.update_after_team_decision": case_update_after_team_decision,
+    "Game.update_after_mission": case_update_after_mission,
+    "Game.lookup_player": case_lookup_player,
+    "controller._bool_to_emoji": case_bool_to_emoji,
+    "controller.button_vote_handler": case_button_vote,
+    "controller full game": case_full_game,
+    "SpillStore.touch restoring a lobby": case_restore_spilled_lobby,
+}
+
+
+def time_once(case: Case, loops: int) -> float:
+    """
+    :return: the seconds taken by `loops` operations of the case, its setup excluded
+    """
+    run = case(loops)
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        run()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def calibrate(case: Case) -> int:
+    """
+    :return: the number of operations of a sample lasting at least MIN_SAMPLE_TIME
+    """
+    loops = 1
+    while (elapsed := time_once(case, loops)) < MIN_SAMPLE_TIME:
+        loops = max(loops * 2, math.ceil(loops * MIN_SAMPLE_TIME / max(elapsed, 1e-9)))
+    return loops
+
+
+def measure(cases: dict[str, tuple[Case, int]], samples: int) -> dict[str, list[float]]:
+    """
+    Sample the cases in turns, so that a slow spell of the machine spreads over all of them.
+    :param cases: name => (case, operations per sample)
+    :return: name => the seconds per operation of each sample
+    """
+    for case, loops in cases.values():
+        _ = time_once(case, loops)  # warm up
+
+    results: dict[str, list[float]] = {name: [] for name in cases}
+    for _ in range(samples):
+        for name, (case, loops) in cases.items():
+            results[name].append(time_once(case, loops) / loops)
+
+    return results
+
+
+def mann_whitney_greater(a: list[float], b: list[float]) -> float:
+    """
+    One-sided Mann-Whitney U test, with the normal approximation and ties given their mean rank.
+    :return: the p-value of the samples of `a` being larger than those of `b`
+    """
+    values = sorted([(x, 0) for x in a] + [(x, 1) for x in b])
+    ranks = [0.0] * len(values)
+    ties = 0.0
+
+    i = 0
+    while i < len(values):
+        j = i
+        while j + 1 < len(values) and values[j + 1][0] == values[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+
+    n1, n2 = len(a), len(b)
+    n = n1 + n2
+    u = sum(r for r, (_, group) in zip(ranks, values) if group == 0) - n1 * (n1 + 1) / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0
+
+    # continuity correction
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 1 - statistics.NormalDist().cdf(z)
+
+
+def verdict(current: list[float], baseline: list[float]) -> tuple[float, str]:
+    """
+    :return: the relative change of the median, and whether it is a regression, an improvement or noise
+    """
+    change = statistics.median(current) / statistics.median(baseline) - 1
+
+    if change > THRESHOLD and mann_whitney_greater(current, baseline) < ALPHA:
+        return change, "REGRESSION"
+    if change < -THRESHOLD and mann_whitney_greater(baseline, current) < ALPHA:
+        return change, "faster"
+    return change, ""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--save", action="store_true", help="store the results as the new baselines")
+    _ = parser.add_argument("--baselines", type=Path, default=BASELINES, help="the baselines file")
+    _ = parser.add_argument("--samples", type=int, default=SAMPLES, help="samples per case")
+    _ = parser.add_argument("cases", nargs="*", help="the cases to run, all by default")
+    args = parser.parse_args()
+
+    # the controller logs every phase of the full games
+    logging.disable(logging.WARNING)
+
+    baselines: dict[str, Any] = {"cases": {}}
+    if args.baselines.exists():
+        baselines = json.loads(args.baselines.read_text(encoding="utf-8"))
+
+    names = args.cases or list(CASES)
+    unknown = set(names) - CASES.keys()
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    compare = not args.save
+    # keep the loops of the baselines, so both are sampled alike
+    cases: dict[str, tuple[Case, int]] = {}
+    for name in names:
+        baseline = baselines["cases"].get(name) if compare else None
+        cases[name] = (CASES[name], baseline["loops"] if baseline else calibrate(CASES[name]))
+    results = measure(cases, args.samples)
+
+    regressions = 0
+    print(f"{'case':<34}{'loops':>8}{'median':>12}{'baseline':>12}{'change':>9}")
+
+    for name, samples in results.items():
+        line = f"{name:<34}{cases[name][1]:>8}{statistics.median(samples) * 1e6:>10.2f}µs"
+        if compare and (baseline := baselines["cases"].get(name)):
+            change, flag = verdict(samples, baseline["samples"])
+            regressions += flag == "REGRESSION"
+            line += f"{statistics.median(baseline['samples']) * 1e6:>10.2f}µs{change:>+9.1%}  {flag}"
+        print(line)
+
+    if args.save:
+        baselines["cases"].update(
+            {name: {"loops": cases[name][1], "samples": samples} for name, samples in results.items()}
+        )
+        baselines["python"] = platform.python_version()
+        baselines["machine"] = platform.machine()
+        _ = args.baselines.write_text(json.dumps(baselines, indent=2), encoding="utf-8")
+        print(f"Baselines saved to {args.baselines}")
+    elif regressions:
+        print(f"{regressions} regression(s) at p < {ALPHA} and more than {THRESHOLD:.0%} slower")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
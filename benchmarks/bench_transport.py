@@ -0,0 +1,149 @@
+"""
+Throughput and tail latency of bursts of sends for each transport profile, against a local
+fake Bot API, while get_updates long-polls at the same time as in the bot.
+The fake API answers after LATENCY seconds, and every new connection costs HANDSHAKE seconds,
+like the TLS handshake with the real one; bursts are IDLE seconds apart, longer than the
+keep-alive of the default profile, like the phases of a game.
+The http2 profile is left out, the fake API only speaks HTTP/1.1.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/bench_transport.py
+"""
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+from telegram.error import TelegramError
+from telegram.ext import ApplicationBuilder
+
+from avalontgbot.transport import PROFILES, TransportProfile
+
+TOKEN = "123:bench"
+HANDSHAKE = 0.03
+LATENCY = 0.01
+POLL_TIMEOUT = 1
+BURSTS = 4
+BURST = 100
+IDLE = 6.0
+
+
+class FakeBotApi:
+    """
+    HTTP/1.1 server answering the few Bot API methods the benchmark calls, with keep-alive.
+    """
+
+    def __init__(self):
+        self.connections: int = 0
+        self._messages: int = 0
+
+    async def start(self) -> int:
+        server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return server.sockets[0].getsockname()[1]
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(HANDSHAKE)
+
+        try:
+            while line := await reader.readline():
+                path = line.decode().split(" ")[1]
+                headers: dict[str, str] = {}
+                while (header := await reader.readline()) not in (b"\r\n", b""):
+                    name, value = header.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                _ = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                payload = json.dumps({"ok": True, "result": await self._call(path.rsplit("/", 1)[1])}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _call(self, method: str) -> object:
+        if method == "getMe":
+            return {"id": 123, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        if method == "getUpdates":
+            await asyncio.sleep(POLL_TIMEOUT)
+            return []
+
+        await asyncio.sleep(LATENCY)
+        self._messages += 1
+        return {"message_id": self._messages, "date": 0, "chat": {"id": 1, "type": "private"}, "text": "x"}
+
+
+async def run(profile: TransportProfile) -> dict[str, float]:
+    api = FakeBotApi()
+    port = await api.start()
+    application = profile.configure(
+        ApplicationBuilder().token(TOKEN).base_url(f"http://127.0.0.1:{port}/bot")
+    ).build()
+    bot = application.bot
+    await bot.initialize()
+
+    polling = True
+
+    async def poll():
+        while polling:
+            _ = await bot.get_updates(timeout=POLL_TIMEOUT)
+
+    poller = asyncio.create_task(poll())
+    latencies: list[float] = []
+    errors = 0
+    busy = 0.0
+
+    async def send() -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            _ = await bot.send_message(chat_id=1, text="x")
+            latencies.append(time.perf_counter() - start)
+        except TelegramError:
+            errors += 1
+
+    for i in range(BURSTS):
+        if i:
+            await asyncio.sleep(IDLE)
+        start = time.perf_counter()
+        _ = await asyncio.gather(*(send() for _ in range(BURST)))
+        busy += time.perf_counter() - start
+
+    polling = False
+    await poller
+    await bot.shutdown()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "msg/s": len(latencies) / busy,
+        "p50": quantiles[49] * 1000,
+        "p99": quantiles[98] * 1000,
+        "max": max(latencies) * 1000,
+        "connections": api.connections,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    print(f"{BURSTS} bursts of {BURST} sends, {IDLE:.0f} s apart")
+    print(f"{'profile':<10}{'msg/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'conns':>7}{'errors':>8}")
+
+    for name, profile in PROFILES.items():
+        if profile.http2:
+            continue
+        r = asyncio.run(run(profile))
+        print(
+            f"{name:<10}{r['msg/s']:>8.0f}{r['p50']:>9.1f}{r['p99']:>9.1f}"
+            f"{r['max']:>9.1f}{r['connections']:>7}{r['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
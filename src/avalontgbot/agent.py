@@ -0,0 +1,146 @@
+import html
+import random
+from collections import defaultdict
+from collections.abc import Mapping
+
+from .constants import MAX_TEAM_REJECTS, PLAYERS_TO_RULES
+from .game import Game
+from .gamephase import GamePhase as PHASE
+from .player import Player
+from .role import Appearance
+
+
+def next_agent_id(game: Game) -> int:
+    """
+    The id of an agent joining the game. Agents get negative ids, which no Telegram user has,
+    each below the agents already seated, so the ids stay unique in the game whatever process
+    or node seated them.
+    """
+    return min((p.userid for p in game.players if p.userid < 0), default=0) - 1
+
+
+class Agent(Player):
+    """
+    Computer-controlled player, deciding from what its role saw at night and what
+    happened at the table since. Every decision is a single pass over the players,
+    so thousands of seats can play at once.
+    """
+
+    def __init__(self, userid: int, name: str | None = None, rng: random.Random | None = None):
+        """
+        :param userid: a negative id, unique in the game, see next_agent_id
+        :param name: the name shown at the table, generated from the id if missing
+        :param rng: source of randomness to break ties, replaceable in tests
+        """
+        super().__init__(userid, name or f"Bot {-userid}")
+        self._rng: random.Random = rng or random.Random()
+        self.see({})
+
+    def mention(self) -> str:
+        # agents have no Telegram account to link to
+        return html.escape(f"🤖 {self.tg_name}")
+
+    def see(self, seen: Mapping[Appearance, list[Player]]) -> None:
+        """
+        Learn the night knowledge of the role, forgetting any previous game.
+        :param seen: the players seen, grouped by how they appear
+        """
+        # user ids of the players known to be evil: Merlin sees them, evil see each other
+        self._evil: set[int] = {
+            p.userid for a in (Appearance.EVIL, Appearance.TEAMMATE) for p in seen.get(a, [])
+        }
+        # user id => how likely the player is evil, from the failed missions
+        self._suspicion: defaultdict[int, float] = defaultdict(float)
+        # Percival trusts the players who may be Merlin
+        for player in seen.get(Appearance.MERLIN, []):
+            self._suspicion[player.userid] = -1.0
+        # user id => how much the player votes like Merlin, for the assassin
+        self._insight: defaultdict[int, float] = defaultdict(float)
+        # votes on the last team
+        self._votes: dict[Player, bool] = {}
+
+    def propose_team(self, game: Game) -> list[Player]:
+        """
+        Pick a team as leader: itself and the least suspicious players.
+        Evil agents avoid their teammates, one evil player is enough to fail a mission.
+        """
+        others = sorted(
+            (p for p in game.players if p is not self),
+            key=lambda p: (p.userid in self._evil, self._suspicion[p.userid], self._rng.random()),
+        )
+
+        return [self] + others[: game.team_sizes[game.turn] - 1]
+
+    def decide(self, game: Game) -> bool:
+        """
+        Vote on the current team, or on the mission when part of the team.
+        :return: True to approve the team or make the mission succeed, False otherwise
+        """
+        if game.phase == PHASE.QUEST:
+            if self.is_good():
+                return True
+            # one fail is enough: only the first evil player of the team fails
+            return any(p.userid in self._evil for p in game.team[: game.team.index(self)])
+
+        has_evil = any(p.userid in self._evil for p in game.team)
+
+        if not self.is_good():
+            # any team with an evil player can fail its mission
+            return has_evil or self in game.team
+
+        if has_evil:
+            return False
+
+        # the last rejection would lose the game
+        if game.rejection_count == MAX_TEAM_REJECTS - 1:
+            return True
+
+        # approve when every member is among the players trusted the most
+        num_goods = PLAYERS_TO_RULES[len(game.players)]["num_goods"]
+        ranked = sorted(self._suspicion[p.userid] for p in game.players if p is not self)
+        limit = ranked[num_goods - 2]
+
+        return all(self._suspicion[p.userid] <= limit for p in game.team if p is not self)
+
+    def observe_votes(self, team: list[Player], votes: Mapping[Player, bool]) -> None:
+        """
+        Learn from the votes on a team: rejecting the teams of evil players is what Merlin does.
+        """
+        self._votes = {p: vote for p, vote in votes.items() if p is not self}
+
+        if self.is_good():
+            return
+
+        has_evil = any(p is self or p.userid in self._evil for p in team)
+
+        for player, vote in votes.items():
+            if player is not self and player.userid not in self._evil:
+                self._insight[player.userid] += 1 if has_evil != vote else -1
+
+    def observe_mission(self, team: list[Player], fails: int) -> None:
+        """
+        Learn from a mission: the members of failed missions become suspicious,
+        and so do the players who approved them, unlike those who rejected them.
+        :param fails: number of fail votes
+        """
+        others = [p for p in team if p is not self]
+        # a good agent on the team knows the fails came from the others
+        share = fails / max(len(others) if self.is_good() and self in team else len(team), 1)
+
+        for player in others:
+            self._suspicion[player.userid] += share if fails else -0.1
+
+        if fails:
+            for player, vote in self._votes.items():
+                self._suspicion[player.userid] += share / 2 if vote else -share / 2
+
+    def assassinate(self, candidates: list[Player]) -> int:
+        """
+        Pick the player to kill as Assassin: the one voting most like Merlin.
+        :param candidates: the good players
+        :return: the index of the chosen candidate
+        """
+        return max(
+            range(len(candidates)),
+            key=lambda i: (self._insight[candidates[i].userid], self._rng.random()),
+        )
@@ -0,0 +1,87 @@
+from .game import Game
+
+
+class GameRecord:
+    """
+    What the analysis needs of a finished game, by seat, plain enough to be sent to a worker process.
+    """
+
+    def __init__(self, game: Game):
+        seats = {p.userid: i for i, p in enumerate(game.players)}
+
+        self.names: list[str] = [str(p) for p in game.players]
+        self.evil: list[bool] = [not p.is_good() for p in game.players]
+        self.missions: list[bool | None] = list(game.missions)
+        # (turn, seat of the leader, seats of the team, seat => approval), one per vote on a team
+        self.elections: list[tuple[int, int, list[int], dict[int, bool]]] = [
+            (e.turn, seats[e.leader], [seats[u] for u in e.team], {seats[u]: v for u, v in e.votes.items()})
+            for e in game.elections
+        ]
+
+
+class PostMortem:
+    """
+    How the players voted during a game, and who is behind its failed missions.
+    """
+
+    def __init__(self, size: int):
+        """
+        :param size: number of players
+        """
+        # seat => seat => share of the votes both cast where they agreed, None if none
+        self.agreement: list[list[float | None]] = [[None] * size for _ in range(size)]
+        # evils in the team => (teams approved, teams proposed)
+        self.approval: dict[int, tuple[int, int]] = {}
+        # seat => failed missions whose team the player proposed, or approved
+        self.proposed: list[int] = [0] * size
+        self.approved: list[int] = [0] * size
+
+    def pairs(self) -> list[tuple[float, int, int]]:
+        """
+        :return: (agreement, seat, seat) of every pair of players who voted together, most alike first
+        """
+        return sorted(
+            ((a, i, j) for i, row in enumerate(self.agreement) for j, a in enumerate(row) if i < j and a is not None),
+            key=lambda x: -x[0],
+        )
+
+
+def analyse(record: GameRecord) -> PostMortem:
+    """
+    Analyse the votes of a finished game.
+    The votes of each player are held as bit masks over the elections, one bit per election,
+    so comparing two players, or a player with the failed missions, is a handful of integer operations.
+    :return: the analysis
+    """
+    size = len(record.names)
+    result = PostMortem(size)
+
+    # seat => elections voted, and approved
+    voted = [0] * size
+    approved = [0] * size
+    # elections of a team sent on a mission that failed
+    failed = 0
+
+    for bit, (turn, leader, team, votes) in enumerate(record.elections):
+        for seat, vote in votes.items():
+            voted[seat] |= 1 << bit
+            approved[seat] |= vote << bit
+
+        passed = list(votes.values()).count(True) > len(votes) / 2
+        evils = sum(record.evil[s] for s in team)
+        yes, total = result.approval.get(evils, (0, 0))
+        result.approval[evils] = (yes + passed, total + 1)
+
+        if passed and record.missions[turn] is False:
+            failed |= 1 << bit
+            result.proposed[leader] += 1
+
+    for i in range(size):
+        result.approved[i] = (approved[i] & failed).bit_count()
+
+        for j in range(i, size):
+            if both := voted[i] & voted[j]:
+                agreement = (~(approved[i] ^ approved[j]) & both).bit_count() / both.bit_count()
+                result.agreement[i][j] = result.agreement[j][i] = agreement
+
+    return result
@@ -0,0 +1,402 @@
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from pathlib import Path
+
+from .constants import LEASE_RETRY, LEASE_TTL, LEASE_WAIT
+from .game import GameKey
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (key TEXT PRIMARY KEY, version INTEGER NOT NULL, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, node TEXT NOT NULL, expires REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS polls (poll_id TEXT PRIMARY KEY, key TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS polls_key ON polls (key);
+CREATE TABLE IF NOT EXISTS shared (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    registry TEXT NOT NULL,
+    key TEXT NOT NULL,
+    node TEXT NOT NULL,
+    data BLOB,
+    UNIQUE (registry, key)
+);
+"""
+
+# (registry, key, data) of an entry of a registry shared by the nodes, data None if removed
+SharedEntry = tuple[str, str, bytes | None]
+
+
+# keys of the games created by the update of the running checkout, see note_new_game
+_newGames: contextvars.ContextVar[set[GameKey] | None] = contextvars.ContextVar("new_games", default=None)
+
+
+def note_new_game(key: GameKey) -> None:
+    """
+    Record a game created by the running update in another chat or topic than its own, e.g. a
+    table of a tournament, for the checkout of the update to write it once done.
+    """
+    if (created := _newGames.get()) is not None:
+        created.add(key)
+
+
+class VersionConflict(Exception):
+    """
+    A node wrote a game it no longer holds, or a version of it other nodes already replaced.
+    """
+
+
+def encode_key(key: GameKey) -> str:
+    """The game key as stored in a database."""
+    return json.dumps(key)
+
+
+def decode_key(key: str) -> GameKey:
+    """The game key stored by encode_key."""
+    chat_id, thread_id = json.loads(key)
+    return chat_id, thread_id
+
+
+class SQLiteBackend:
+    """
+    The state of the games shared by the nodes serving the same bots, in a SQLite database.
+    It is the local stand-in of a shared store: nodes on the same machine share the file.
+    Each game has a version, raised on every write, and a lease naming the node allowed to
+    change it until the lease expires; a node that stops renewing its leases, e.g. because
+    it crashed, loses its games to the first node asking for them.
+    The registries kept for the games, e.g. the matchmaking queue, are shared entry by entry,
+    the last write of an entry winning; each write takes the next sequence number, so a node
+    reads the writes of the others in order from the last one it saw.
+    Calls block, up to the busy timeout while another node writes: the event loop makes them
+    from worker threads, each with a connection of its own.
+    """
+
+    def __init__(self, path: Path | str, clock: Callable[[], float] = time.time):
+        """
+        :param path: the database file, created if missing
+        :param clock: wall clock shared by the nodes, replaceable in tests
+        """
+        self._path: Path | str = path
+        self._clock: Callable[[], float] = clock
+        self._local: threading.local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock: threading.Lock = threading.Lock()
+
+        _ = self._db.execute("PRAGMA journal_mode=WAL")
+        _ = self._db.executescript(_SCHEMA)
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """The connection of the calling thread, opened on its first call."""
+        if (db := getattr(self._local, "db", None)) is None:
+            # transactions are opened explicitly, to take the write lock before reading;
+            # closed from any thread, used by its own only
+            db = self._local.db = sqlite3.connect(
+                self._path, timeout=LEASE_WAIT, isolation_level=None, check_same_thread=False
+            )
+            with self._connections_lock:
+                self._connections.append(db)
+
+        return db
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+
+    def acquire(self, key: GameKey, node: str, ttl: float = LEASE_TTL) -> bool:
+        """
+        Take or renew the lease of a game.
+        :return: True if the node holds the lease for ttl seconds, False if another node holds it
+        """
+        now = self._clock()
+
+        with self._transaction():
+            row = self._db.execute("SELECT node, expires FROM leases WHERE key = ?", (encode_key(key),)).fetchone()
+            if row is not None and row[0] != node and row[1] > now:
+                return False
+
+            _ = self._db.execute(
+                "INSERT OR REPLACE INTO leases (key, node, expires) VALUES (?, ?, ?)",
+                (encode_key(key), node, now + ttl),
+            )
+            return True
+
+    def release(self, key: GameKey, node: str) -> None:
+        """
+        Give the lease of a game back, if the node still holds it.
+        """
+        _ = self._db.execute("DELETE FROM leases WHERE key = ? AND node = ?", (encode_key(key), node))
+
+    def load(self, key: GameKey) -> tuple[int, bytes | None]:
+        """
+        :return: the version of the game and its data, (0, None) if there is no such game
+        """
+        row = self._db.execute("SELECT version, data FROM games WHERE key = ?", (encode_key(key),)).fetchone()
+        return (row[0], row[1]) if row is not None else (0, None)
+
+    def store(
+        self,
+        key: GameKey,
+        node: str,
+        version: int,
+        data: bytes | None,
+        polls: Iterable[str] = (),
+    ) -> int:
+        """
+        Write a game, if the node holds its lease and read the version being replaced.
+        :param version: the version the node read, 0 for a new game
+        :param data: the game, None to remove it
+        :param polls: the ids of the polls of the game, to find it from their answers
+        :return: the new version of the game, 0 if removed
+        :raises VersionConflict: if the lease expired or the game changed since it was read
+        """
+        now = self._clock()
+        encoded = encode_key(key)
+
+        with self._transaction():
+            lease = self._db.execute("SELECT node, expires FROM leases WHERE key = ?", (encoded,)).fetchone()
+            if lease is None or lease[0] != node or lease[1] <= now:
+                raise VersionConflict(f"Node {node} does not hold the lease of game {key}.")
+
+            row = self._db.execute("SELECT version FROM games WHERE key = ?", (encoded,)).fetchone()
+            if (current := row[0] if row is not None else 0) != version:
+                raise VersionConflict(f"Game {key} is at version {current}, not {version}.")
+
+            _ = self._db.execute("DELETE FROM polls WHERE key = ?", (encoded,))
+
+            if data is None:
+                _ = self._db.execute("DELETE FROM games WHERE key = ?", (encoded,))
+                return 0
+
+            _ = self._db.execute(
+                "INSERT OR REPLACE INTO games (key, version, data) VALUES (?, ?, ?)",
+                (encoded, current + 1, data),
+            )
+            _ = self._db.executemany(
+                "INSERT OR REPLACE INTO polls (poll_id, key) VALUES (?, ?)",
+                ((poll_id, encoded) for poll_id in polls),
+            )
+            return current + 1
+
+    def find_poll(self, poll_id: str) -> GameKey | None:
+        """
+        :return: the key of the game of a poll, None if unknown
+        """
+        row = self._db.execute("SELECT key FROM polls WHERE poll_id = ?", (poll_id,)).fetchone()
+        return decode_key(row[0]) if row is not None else None
+
+    def publish(self, node: str, entries: Iterable[SharedEntry]) -> None:
+        """
+        Write entries of the shared registries, replacing the previous writes of the same entries.
+        """
+        with self._transaction():
+            _ = self._db.executemany(
+                "INSERT OR REPLACE INTO shared (registry, key, node, data) VALUES (?, ?, ?, ?)",
+                ((registry, key, node, data) for registry, key, data in entries),
+            )
+
+    def changes(self, node: str, since: int) -> list[tuple[int, SharedEntry]]:
+        """
+        :param since: the sequence number of the last write seen
+        :return: (sequence number, entry) of the later writes of the other nodes, in order
+        """
+        rows = self._db.execute(
+            "SELECT seq, registry, key, data FROM shared WHERE seq > ? AND node != ? ORDER BY seq",
+            (since, node),
+        ).fetchall()
+        return [(seq, (registry, key, data)) for seq, registry, key, data in rows]
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock at once, so two nodes never read the same version to write it
+        _ = self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            _ = self._db.execute("ROLLBACK")
+            raise
+        else:
+            _ = self._db.execute("COMMIT")
+
+
+class GameStore:
+    """
+    Keeps the games of a node in step with the shared backend, one update at a time.
+    Before an update of a game is handled the node takes the lease of the game, and loads it
+    again only if another node changed it; afterwards the game is written back, if changed,
+    and the lease given back. Games the update created elsewhere (e.g. the tables of a
+    tournament) are written too, when noted with note_new_game. Leases are renewed while an update runs, however long.
+    The shared registries are kept in step around every update, holding a game or not: the
+    entries written by other nodes are loaded before, the ones changed here written after.
+    Leases are not limited to games: any key can be held, e.g. of a registry changed one node
+    at a time, with no game of that key to load or write.
+    """
+
+    def __init__(
+        self,
+        backend: SQLiteBackend,
+        node: str,
+        dump: Callable[[GameKey], tuple[bytes, list[str]] | None],
+        load: Callable[[GameKey, bytes | None], None],
+        dump_shared: Callable[[], list[SharedEntry]] = list,
+        load_shared: Callable[[SharedEntry], None] = lambda _: None,
+        ttl: float = LEASE_TTL,
+        wait: float = LEASE_WAIT,
+        retry: float = LEASE_RETRY,
+    ):
+        """
+        :param backend: the state shared by the nodes
+        :param node: the name of this node, unique among the nodes
+        :param dump: serializes a local game and the ids of its polls, None if there is no such game
+        :param load: replaces a local game with serialized data, None to remove it
+        :param dump_shared: serializes the entries of the shared registries changed here since its last call
+        :param load_shared: replaces a local entry of a shared registry with one written by another node
+        :param ttl: seconds a lease lasts without renewal
+        :param wait: seconds to wait for the lease of a game held by another node
+        :param retry: seconds between two tries to take a lease
+        """
+        self._backend: SQLiteBackend = backend
+        self.node: str = node
+        self._dump: Callable[[GameKey], tuple[bytes, list[str]] | None] = dump
+        self._load: Callable[[GameKey, bytes | None], None] = load
+        self._dump_shared: Callable[[], list[SharedEntry]] = dump_shared
+        self._load_shared: Callable[[SharedEntry], None] = load_shared
+        self._ttl: float = ttl
+        self._wait: float = wait
+        self._retry: float = retry
+        # game key => (version, digest of the data) of the local copy, as last read or written
+        self._versions: dict[GameKey, tuple[int, bytes]] = {}
+        # game key => (lock, checkouts using it), checkouts of a game on this node take turns
+        self._locks: dict[GameKey, tuple[asyncio.Lock, int]] = {}
+        # sequence number of the last write of the shared registries loaded
+        self._seq: int = 0
+
+    @contextlib.asynccontextmanager
+    async def checkout(self, key: GameKey) -> AsyncIterator[None]:
+        """
+        Hold a game for the time of an update: the local copy is the latest one, and is shared when done.
+        :raises TimeoutError: if another node held the game for too long
+        :raises VersionConflict: if the lease expired meanwhile and another node took the game over
+        """
+        lock, users = self._locks.get(key, (asyncio.Lock(), 0))
+        self._locks[key] = (lock, users + 1)
+
+        try:
+            async with lock:
+                async with self._hold(key):
+                    yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    @contextlib.asynccontextmanager
+    async def _hold(self, key: GameKey) -> AsyncIterator[None]:
+        await self._acquire(key)
+        renewing = asyncio.create_task(self._renew(key))
+        # the games created by other updates running meanwhile are theirs to write
+        created: set[GameKey] = set()
+        token = _newGames.set(created)
+
+        try:
+            await self._refresh(key)
+            async with self.sharing():
+                yield
+        finally:
+            _ = renewing.cancel()
+            _newGames.reset(token)
+
+            try:
+                await self._commit(key)
+                # e.g. the game of a matchmaking topic, created from a private chat
+                for new in created - {key}:
+                    if await asyncio.to_thread(self._backend.acquire, new, self.node, self._ttl):
+                        await self._commit(new)
+                        await asyncio.to_thread(self._backend.release, new, self.node)
+            finally:
+                await asyncio.to_thread(self._backend.release, key, self.node)
+
+    @contextlib.asynccontextmanager
+    async def sharing(self) -> AsyncIterator[None]:
+        """
+        Keep the shared registries in step for the time of an update, e.g. one holding no game.
+        """
+        for seq, entry in await asyncio.to_thread(self._backend.changes, self.node, self._seq):
+            self._load_shared(entry)
+            self._seq = max(self._seq, seq)
+
+        try:
+            yield
+        finally:
+            if entries := self._dump_shared():
+                await asyncio.to_thread(self._backend.publish, self.node, entries)
+
+    def find_poll(self, poll_id: str) -> GameKey | None:
+        """
+        :return: the key of the game of a poll sent by any node, None if unknown
+        """
+        # a single read, which never waits for the writes of other nodes
+        return self._backend.find_poll(poll_id)
+
+    async def _acquire(self, key: GameKey) -> None:
+        deadline = time.monotonic() + self._wait
+
+        while not await asyncio.to_thread(self._backend.acquire, key, self.node, self._ttl):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Game {key} is held by another node.")
+            await asyncio.sleep(self._retry)
+
+    async def _renew(self, key: GameKey) -> None:
+        while True:
+            await asyncio.sleep(self._ttl / 3)
+            if not await asyncio.to_thread(self._backend.acquire, key, self.node, self._ttl):
+                logger.error(f"Lost the lease of game {key} while handling an update")
+                return
+
+    async def _refresh(self, key: GameKey) -> None:
+        version, data = await asyncio.to_thread(self._backend.load, key)
+
+        # otherwise another node changed the game since this node last saw it
+        if version != self._versions.get(key, (0, b""))[0]:
+            self._replace(key, version, data)
+
+    def _replace(self, key: GameKey, version: int, data: bytes | None) -> None:
+        self._load(key, data)
+        if data is None:
+            _ = self._versions.pop(key, None)
+        else:
+            self._versions[key] = (version, hashlib.blake2b(data).digest())
+
+    async def _commit(self, key: GameKey) -> None:
+        version, digest = self._versions.get(key, (0, b""))
+        dumped = self._dump(key)
+
+        if dumped is None:
+            if version != 0:
+                _ = await asyncio.to_thread(self._backend.store, key, self.node, version, None)
+                del self._versions[key]
+            return
+
+        data, polls = dumped
+        # e.g. a message in the group of a game, which did not change it
+        if (new_digest := hashlib.blake2b(data).digest()) == digest:
+            return
+
+        try:
+            stored = await asyncio.to_thread(self._backend.store, key, self.node, version, data, polls)
+            self._versions[key] = (stored, new_digest)
+        except VersionConflict:
+            # the changes of this node are lost, the shared copy wins
+            self._replace(key, *await asyncio.to_thread(self._backend.load, key))
+            raise
@@ -1,40 +1,129 @@
+import asyncio
+import contextlib
+import functools
 import logging
 import os
 import pathlib
+import signal
+import socket
+import time
+from collections.abc import AsyncIterator, Hashable
 
 from dotenv import load_dotenv
 from telegram import Update
+from telegram.constants import ChatType
 from telegram.error import BadRequest
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
+    ApplicationHandlerStop,
     CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
     PollAnswerHandler,
+    TypeHandler,
 )
 
-from avalontgbot.constants import PLAYERS_TO_RULES
+from avalontgbot.constants import PLAYERS_TO_RULES, PROFILE_SECONDS, SPILL_INTERVAL
 
 from .controller import (
+    activePolls,
+    analysisPool,
+    handle_add_bots,
+    botPool,
     button_vote_handler,
-    handle_assassin_choice,
-    handle_build_team_answer,
+    dispatcher,
+    dump_game,
+    dump_shared,
+    dump_state,
     handle_create_game,
+    handle_create_tournament,
     handle_delete_game,
+    handle_enter_tournament,
+    handle_observe_update,
     handle_join_game,
+    handle_join_queue,
+    handle_lag,
     handle_leave_game,
+    handle_leave_queue,
+    handle_memory,
+    handle_next_round,
     handle_pass_host,
-    handle_pass_host_choice,
-    handle_select_special_roles,
+    handle_profile,
+    handle_set_language,
     handle_set_roles,
+    handle_spectate,
+    handle_standings,
+    handle_unspectate,
     handle_start_game,
+    handle_status,
     existingGames,
+    game_key,
+    load_game,
+    load_shared,
+    load_state,
+    log_memory_reports,
+    loopMonitor,
+    postMortems,
+    profiler,
+    QUEUE_KEY,
+    reachableUsers,
+    recentUpdates,
+    tournament_key,
+    tournaments,
+    translator,
 )
-from .gamephase import GamePhase as PHASE
+from .backend import GameStore, SQLiteBackend
+from .handoff import HandoffServer, handoff_socket, take_over
+from .health import loop_factory
+from .outbox import BufferedContext, flushing, reply
+from .pipeline import PriorityUpdateProcessor, chat_of, command_of
 from .role import Role
+from .spill import SpillStore, spill_database
+from .transport import load_profile
+from .webhook import WebhookRouter
 
 _ = load_dotenv()
 telegram_token = os.getenv("TELEGRAM_TOKEN", "")
+# optional comma separated tokens, to serve more groups than a single bot can
+telegram_tokens = [t.strip() for t in os.getenv("TELEGRAM_TOKENS", "").split(",") if t.strip()]
+# id of the (first) bot, the part of its token before the colon, naming its local files
+bot_id = int(prefix) if (prefix := (telegram_tokens or [telegram_token])[0].partition(":")[0]).isdigit() else 0
+# optional forum group where the bot opens a topic for every matchmaking game
+matchmaking_chat_id = int(os.getenv("MATCHMAKING_CHAT_ID", "0")) or None
+# optional comma separated user ids allowed to run admin commands, e.g. /profile
+admin_ids = {int(x) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()}
+# optional socket where a new process of the bot takes the running games over, see handoff.py
+handoff_path = pathlib.Path(os.getenv("HANDOFF_SOCKET", "") or handoff_socket(bot_id))
+# optional public url Telegram sends the updates to, instead of the bot asking for them,
+# needed for several nodes to serve the same tokens behind a load balancer
+webhook_url = os.getenv("WEBHOOK_URL", "")
+webhook_port = int(os.getenv("WEBHOOK_PORT", "8443"))
+webhookRouter = WebhookRouter(webhook_url, webhook_port) if webhook_url else None
+# optional database of the games shared by the nodes, see backend.py, and the name of this node
+state_db = os.getenv("STATE_DB", "")
+node_id = os.getenv("NODE_ID", "") or f"{socket.gethostname()}:{os.getpid()}"
+gameStore = (
+    GameStore(SQLiteBackend(state_db), node_id, dump_game, load_game, dump_shared, load_shared)
+    if state_db
+    else None
+)
+# optional database where idle lobbies are spilled out of memory, see spill.py, empty to keep
+# them in memory; games shared by several nodes are never spilled
+spill_db = os.getenv("SPILL_DB", str(spill_database(bot_id)))
+spillStore = SpillStore(spill_db, dump_game, load_game, existingGames) if spill_db and gameStore is None else None
+# optional event loop implementation, "asyncio" or "uvloop" (pip install uvloop), see health.py
+event_loop = os.getenv("EVENT_LOOP", "asyncio")
+# HTTP settings of the connections to the Bot API, see transport.py: a named profile,
+# and TRANSPORT_<SETTING> variables changing some of its settings, e.g. TRANSPORT_POOL_SIZE=32
+transport = load_profile(
+    os.getenv("TRANSPORT_PROFILE", "default"),
+    {
+        name.removeprefix("TRANSPORT_").lower(): value
+        for name, value in os.environ.items()
+        if name.startswith("TRANSPORT_") and name != "TRANSPORT_PROFILE"
+    },
+)
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING
@@ -44,72 +133,132 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 
 logger = logging.getLogger(__name__)
 
+RESOURCES_DIR = pathlib.Path(__file__).parent.parent.parent / "resources"
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    message = update.effective_message
-
-    text = "Hi, I'm your bot for playing The Resistance!\n"
-    text += "Add me to a group chat to play with friends!\n"
-    text += "Don't forget to start me in private chat to receive your role information.\n\n"
-    text += "Use /help to see the available commands."
-
-    await message.reply_text(text) if message else None
 
+def _resource(name: str, language: str) -> pathlib.Path:
+    """The translated resource file, e.g. rules.it.html, or the English one if missing."""
+    path = RESOURCES_DIR / name
+    translated = path.with_name(f"{path.stem}.{language}{path.suffix}")
+    return translated if translated.exists() else path
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Send a message when the command /help is issued."""
 
-    text = "In order to use this bot, add it to a group chat and use the commands below.\n\n"
+def _build_help(language: str) -> str:
+    text = translator.render_in(language, "help.header")
 
     # open commands.txt and read the content
-    path = pathlib.Path(__file__).parent.parent.parent / "resources/commands.txt"
+    path = _resource("commands.txt", language)
     if not path.exists():
-        text += "Commands not found"
+        text += translator.render_in(language, "help.not_found")
     else:
         text += path.read_text(encoding="utf-8").strip()
 
-    await update.message.reply_text(text) if update.message else None
+    return text
+
+
+def _build_rules(language: str) -> str:
+    path = _resource("rules.html", language)
+    if not path.exists():
+        text = translator.render_in(language, "rules.not_found")
+    else:
+        text = path.read_text(encoding="utf-8").strip()
+
+    text += translator.render_in(language, "rules.players_header")
+    for players, rules in PLAYERS_TO_RULES.items():
+        goods = rules["num_goods"]
+        text += translator.render_in(
+            language, "rules.players_line", players=players, goods=goods, evils=players - goods
+        )
+    text += translator.render_in(language, "rules.footer")
+
+    return text
+
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    message = update.effective_message
+
+    # the user can now receive private messages, from this bot
+    if update.effective_chat and update.effective_chat.type == ChatType.PRIVATE:
+        reachableUsers.mark_reachable(update.effective_user.id)
+        botPool.note_user(update.effective_user.id, context.bot.id)
+
+    text = translator.render(update.effective_chat.id, "start.text")
+
+    await reply(context, message, text) if message else None
+
+
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Send a message when the command /help is issued."""
+    # read from disk once per language
+    text = translator.page(update.effective_chat.id, "help", _build_help)
+
+    await reply(context, update.message, text) if update.message else None
 
 async def inforoles(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a message with the roles information considering the name given."""
     try:
         role_name = context.args[0].lower()
         role = next(r for r in Role if r.name.lower() == role_name)
-        _ = await update.effective_message.reply_text(text=role.description(), parse_mode="HTML")
+        _ = await reply(context, update.effective_message, role.description(), parse_mode="HTML")
     except (IndexError, ValueError):
         logger.error(f"Error in inforoles: No role name provided")
-        txt = ("Please provide a role name after the command, e.g. /inforoles Merlin\n"
-            f"Available roles: {', '.join([str(r) for r in Role])}"
-               )
-        _ = await update.effective_message.reply_text(txt)
+        txt = translator.render(
+            update.effective_chat.id, "inforoles.usage", roles=", ".join([str(r) for r in Role])
+        )
+        _ = await reply(context, update.effective_message, txt)
     except StopIteration as e:
         logger.error(f"Error in inforoles: {e}")
-        _ = await update.effective_message.reply_text("Role not found. Please check the role name and try again.")
+        _ = await reply(
+            context,
+            update.effective_message,
+            translator.render(update.effective_chat.id, "inforoles.not_found")
+        )
 
 
 async def rules(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a message with the rules of the game."""
-    path = pathlib.Path(__file__).parent.parent.parent / "resources/rules.html"
-    if not path.exists():
-        text = "Rules not found"
-    else:
-        text = path.read_text(encoding="utf-8").strip()
+    # read from disk once per language
+    text = translator.page(update.effective_chat.id, "rules", _build_rules)
 
-    text += "\n\n Here are the number of players with the corresponding number of good players:\n"
-    for players, rules in PLAYERS_TO_RULES.items():
-        goods = rules["num_goods"]
-        text += f"\n - {players} players: {goods} good, {players-goods} evil"
-    text += "\n\n Use /inforoles role_name to get information about a specific role."
+    await reply(context, update.message, text, parse_mode="HTML") if update.message else None
+
+
+async def drop_duplicates(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Stop redelivered updates before any other handler runs."""
+    dedup = recentUpdates[context.bot.id]
+
+    if dedup.is_duplicate(update):
+        logger.warning(
+            f"Dropped duplicate update {update.update_id} ({dedup.suppressed} so far)"
+        )
+        raise ApplicationHandlerStop
+
+
+async def route_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Leave the updates of a group to the bot of the pool serving it."""
+    chat = update.effective_chat
+
+    if len(botPool) > 1 and chat is not None and chat.type != ChatType.PRIVATE:
+        if botPool.pin_chat(chat.id, context.bot.id) != context.bot.id:
+            raise ApplicationHandlerStop
 
-    await update.message.reply_html(text) if update.message else None
+
+async def observe_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Keep cached chat and player metadata fresh, before any other handler runs."""
+    await handle_observe_update(update)
+
+
+def _explain(update: Update, error: Exception) -> str:
+    """The message of an error in the language of the chat of the update."""
+    return translator.explain(update.effective_chat.id, error)
 
 
 async def create_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        await handle_create_game(update)
+        await handle_create_game(update, context)
     except (ValueError, KeyError) as e:
         logger.error(f"Error in create_game: {e}")
-        _ = await update.effective_message.reply_text(str(e))
+        _ = await reply(context, update.effective_message, _explain(update, e))
 
 
 async def join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -117,15 +266,15 @@ async def join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await handle_join_game(update, context)
     except (ValueError, KeyError) as e:
         logger.error(f"Error in join_game: {e}")
-        _ = await update.effective_message.reply_text(str(e))
+        _ = await reply(context, update.effective_message, _explain(update, e))
 
 
 async def leave_game(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
-        await handle_leave_game(update)
+        await handle_leave_game(update, context)
     except (ValueError, KeyError) as e:
         logger.error(f"Error in leave_game: {e}")
-        _ = await update.effective_message.reply_text(str(e))
+        _ = await reply(context, update.effective_message, _explain(update, e))
 
 
 async def start_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -133,15 +282,15 @@ async def start_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await handle_start_game(update, context)
     except (ValueError, KeyError) as e:
         logger.error(f"Error in start_game: {e}")
-        _ = await update.effective_message.reply_text(str(e))
+        _ = await reply(context, update.effective_message, _explain(update, e))
 
 
 async def delete_game(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
-        await handle_delete_game(update)
+        await handle_delete_game(update, context)
     except (ValueError, KeyError) as e:
         logger.error(f"Error in delete_game: {e}")
-        _ = await update.effective_message.reply_text(str(e))
+        _ = await reply(context, update.effective_message, _explain(update, e))
 
 
 async def set_roles(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -150,8 +299,10 @@ async def set_roles(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await handle_set_roles(update, context)
     except (ValueError, KeyError) as e:
         logger.error(f"Error in set_roles: {e}")
-        _ = await update.effective_message.reply_text(
-            "An error occurred while setting roles. Please try again."
+        _ = await reply(
+            context,
+            update.effective_message,
+            translator.render(update.effective_chat.id, "setroles.error")
         )
 
 
@@ -161,7 +312,143 @@ async def pass_host(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await handle_pass_host(update, context)
     except (ValueError, KeyError) as e:
         logger.error(f"Error in set_roles: {e}")
-        _ = await update.effective_message.reply_text(str(e))
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def add_bots(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Fill the lobby with computer-controlled players."""
+    try:
+        await handle_add_bots(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in add_bots: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def join_queue(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Queue for a game with players from any group."""
+    try:
+        await handle_join_queue(update, context, matchmaking_chat_id)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in join_queue: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def leave_queue(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Leave the matchmaking queue."""
+    try:
+        await handle_leave_queue(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in leave_queue: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def create_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Create a tournament played in the topics of the group."""
+    try:
+        await handle_create_tournament(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in create_tournament: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def enter_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Enter the tournament of the group."""
+    try:
+        await handle_enter_tournament(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in enter_tournament: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def next_round(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Start the next round of the tournament."""
+    try:
+        await handle_next_round(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in next_round: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def standings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show the standings of the tournament."""
+    try:
+        await handle_standings(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in standings: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def spectate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Follow a game from this chat."""
+    try:
+        await handle_spectate(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in spectate: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def unspectate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Stop following a game from this chat."""
+    try:
+        await handle_unspectate(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in unspectate: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show the board of the game."""
+    try:
+        await handle_status(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in status: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Profile the bot for a while, admins only."""
+    try:
+        await handle_profile(update, context, admin_ids)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in profile: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def lag(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show the event loop lag report, admins only."""
+    try:
+        await handle_lag(update, context, admin_ids)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in lag: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+async def memory(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show the memory report, admins only."""
+    try:
+        await handle_memory(update, context, admin_ids)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in memory: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
+
+
+def profile_on_signal(signum: int, frame: object) -> None:
+    """Profile the bot for a while on SIGUSR1, e.g. kill -USR1 <pid>."""
+    try:
+        # signal handlers run in the main thread, the one of the event loop
+        path = profiler.start(PROFILE_SECONDS)
+        logger.warning(f"Profiling for {PROFILE_SECONDS} seconds, writing to {path}")
+    except ValueError as e:
+        logger.error(f"Error in profile_on_signal: {e}")
+
+
+async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Choose the language of the bot in this chat."""
+    try:
+        await handle_set_language(update, context)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error in set_language: {e}")
+        _ = await reply(context, update.effective_message, _explain(update, e))
 
 
 async def button_vote(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -182,35 +469,24 @@ async def receive_poll_answer(
     """Handle poll answers."""
     try:
         answer = update.poll_answer
+        # polls are sent in private, so answering proves the user is reachable
+        reachableUsers.mark_reachable(answer.user.id)
         # no options selected => vote retracted => no action
         if len(answer.option_ids) != 0:
-            poll, poll_msg_id, game_id = context.bot_data[answer.poll_id]  # pyright: ignore[reportAny]
-
-            # check if the poll is in the bot data, shouldn't happen
-            game = existingGames[game_id]
-
-            if not poll.allows_multiple_answers:
-                await handle_pass_host_choice(
-                    answer.option_ids, poll_msg_id, context, game
-                )
-            elif game.phase == PHASE.BUILD_TEAM:
-                await handle_build_team_answer(
-                    answer.option_ids, poll_msg_id, context, game
-                )
-            elif game.phase == PHASE.LAST_CHANCE:
-                await handle_assassin_choice(
-                    answer.option_ids, poll_msg_id, update, context, game
-                )
-            elif game.phase == PHASE.LOBBY:
-                await handle_select_special_roles(
-                    answer.option_ids, poll_msg_id, context, game
-                )
+            event, poll_msg_id, key = activePolls[answer.poll_id]
+
+            # check if the poll is in the registry, shouldn't happen
+            game = existingGames[key]
+
+            # stale polls (e.g. a team poll answered after the team was set) are rejected here
+            handler = dispatcher.resolve(game.phase, event)
+            await handler(answer.option_ids, poll_msg_id, update, context, game)
     except BadRequest as e:
         logger.error(f"BadRequest in receive_poll_answer: {e}")
         _ = await context.bot.delete_message(
             # polls are private, so we send the message to the user
             chat_id=update.effective_sender.id,
-            # if unbound is because the bot was restarted and the poll is not in bot_data anymore
+            # if unbound is because the bot was restarted and the poll is not registered anymore
             message_id=poll_msg_id,  # pyright: ignore[reportPossiblyUnboundVariable]
         )
     except (ValueError, Exception) as e:
@@ -218,26 +494,261 @@ async def receive_poll_answer(
         _ = await context.bot.send_message(
             # polls are private, so we send the message to the user
             chat_id=update.effective_sender.id,
-            text=str(e),
+            text=translator.explain(update.effective_sender.id, e),
         )
 
 
+# commands changing the matchmaking queue, or the tournament of their group, rather than a game
+QUEUE_COMMANDS = {"queue", "unqueue"}
+TOURNAMENT_COMMANDS = {"tournament", "enter", "nextround"}
+
+
+def update_key(update: object) -> Hashable | None:
+    """
+    Key of the game changed by an update, to never handle two updates of a game at once, or of
+    the matchmaking queue or tournament it changes, each shared by many chats.
+    """
+    if (command := command_of(update)) in QUEUE_COMMANDS:
+        return QUEUE_KEY
+    if command in TOURNAMENT_COMMANDS and (chat_id := chat_of(update)) is not None:
+        return tournament_key(chat_id)  # pyright: ignore[reportArgumentType]
+
+    if isinstance(update, Update):
+        # poll answers come from private chats, but change the game of their group
+        if (answer := update.poll_answer) is not None:
+            if (entry := activePolls.get(answer.poll_id)) is not None:
+                return entry[2]
+            # the poll may have been sent by another node
+            if gameStore is not None and (key := gameStore.find_poll(answer.poll_id)) is not None:
+                return key
+            # or by a lobby spilled to disk
+            if spillStore is not None and (key := spillStore.find_poll(answer.poll_id)) is not None:
+                return key
+        # games in different topics of a forum are independent, private chats hold none
+        elif (message := update.effective_message) is not None and message.chat.type != ChatType.PRIVATE:
+            return game_key(message)
+
+    return chat_of(update)
+
+
+@contextlib.asynccontextmanager
+async def hold_game(key: Hashable | None) -> AsyncIterator[None]:
+    """
+    Hold the game of an update while handling it, when several nodes share the games,
+    and move it back to memory first if it was spilled to disk.
+    The tables of a tournament also hold the tournament, which they change when they end.
+    """
+    # game keys are (group, topic) pairs, the keys of the queue and tournaments hold no game
+    is_game = isinstance(key, tuple) and isinstance(key[0], int)
+
+    if spillStore is not None and is_game:
+        spillStore.touch(key)  # pyright: ignore[reportArgumentType]
+
+    if gameStore is None:
+        yield
+    elif not isinstance(key, tuple):
+        # e.g. a private /start, changing no game but the reachable users
+        async with gameStore.sharing():
+            yield
+    else:
+        async with gameStore.checkout(key):  # pyright: ignore[reportArgumentType]
+            # known once the shared registries are in step
+            if is_game and (tournament := tournaments.get(key[0])) is not None and key in tournament.pending:
+                async with gameStore.checkout(tournament_key(key[0])):  # pyright: ignore[reportArgumentType]
+                    yield
+            else:
+                yield
+
+
+def build_application(token: str, processor: PriorityUpdateProcessor) -> Application:
+    """
+    Build the application of a bot token, with all the handlers.
+    :param processor: the pipeline of the updates, shared by all the bots, since the updates of
+        a game come to several of them, e.g. the votes to the group bot and the polls to the private one
+    """
+    application = (
+        transport.configure(ApplicationBuilder().token(token))
+        # game updates first, at most one update at a time per game, see pipeline.py
+        .concurrent_updates(processor)
+        # messages sent while handling an update are merged, so every handler
+        # must be wrapped with flushing to send what is left when it returns
+        .context_types(ContextTypes(context=BufferedContext))
+        .build()
+    )
+
+    application.add_handler(TypeHandler(Update, flushing(route_update)), group=-3)
+    application.add_handler(TypeHandler(Update, flushing(drop_duplicates)), group=-2)
+    application.add_handler(TypeHandler(Update, flushing(observe_update)), group=-1)
+
+    application.add_handler(CommandHandler("help", flushing(help_command)))
+    application.add_handler(CommandHandler("start", flushing(start)))
+    application.add_handler(CommandHandler("create", flushing(create_game)))
+    application.add_handler(CommandHandler("join", flushing(join_game)))
+    application.add_handler(CommandHandler("leave", flushing(leave_game)))
+    application.add_handler(CommandHandler("startgame", flushing(start_game)))
+    application.add_handler(CommandHandler("delete", flushing(delete_game)))
+    application.add_handler(CommandHandler("rules", flushing(rules)))
+    application.add_handler(CommandHandler("setroles", flushing(set_roles)))
+    application.add_handler(CommandHandler("passhost", flushing(pass_host)))
+    application.add_handler(CommandHandler("inforoles", flushing(inforoles)))
+    application.add_handler(CommandHandler("addbots", flushing(add_bots)))
+    application.add_handler(CommandHandler("queue", flushing(join_queue)))
+    application.add_handler(CommandHandler("unqueue", flushing(leave_queue)))
+    application.add_handler(CommandHandler("tournament", flushing(create_tournament)))
+    application.add_handler(CommandHandler("enter", flushing(enter_tournament)))
+    application.add_handler(CommandHandler("nextround", flushing(next_round)))
+    application.add_handler(CommandHandler("standings", flushing(standings)))
+    application.add_handler(CommandHandler("spectate", flushing(spectate)))
+    application.add_handler(CommandHandler("unspectate", flushing(unspectate)))
+    application.add_handler(CommandHandler("language", flushing(set_language)))
+    application.add_handler(CommandHandler("status", flushing(status)))
+    application.add_handler(CommandHandler("profile", flushing(profile)))
+    application.add_handler(CommandHandler("memory", flushing(memory)))
+    application.add_handler(CommandHandler("lag", flushing(lag)))
+
+    application.add_handler(CallbackQueryHandler(flushing(button_vote)))
+    application.add_handler(PollAnswerHandler(flushing(receive_poll_answer)))
+
+    return application
+
+
+# periodic tasks shared by all the bots, e.g. the memory reports
+backgroundTasks: list[asyncio.Task[None]] = []
+
+
+async def spill_idle_lobbies(application: Application, interval: float = SPILL_INTERVAL) -> None:
+    """Spill the idle lobbies to disk periodically. Runs until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+
+        # once handed over, the games belong to the next process
+        if spillStore is not None and application.running and (spilled := spillStore.spill()):
+            logger.warning(f"Spilled {spilled} idle lobbies to disk, {len(spillStore)} in total")
+
+
+async def start_background_tasks(application: Application) -> None:
+    """Start the periodic tasks, once for all the bots."""
+    backgroundTasks.append(asyncio.create_task(log_memory_reports()))
+    backgroundTasks.append(asyncio.create_task(loopMonitor.run()))
+    backgroundTasks.append(asyncio.create_task(application.update_processor.log_metrics()))
+    backgroundTasks.append(asyncio.create_task(spill_idle_lobbies(application)))
+
+
+async def stop_background_tasks(application: Application) -> None:
+    """Stop the periodic tasks."""
+    for task in backgroundTasks:
+        _ = task.cancel()
+    backgroundTasks.clear()
+
+    # the analyses of the last finished games are posted before the bots stop
+    _ = await asyncio.gather(*postMortems, return_exceptions=True)
+    analysisPool.shutdown(cancel_futures=True)
+
+
+async def start_intake(applications: list[Application], drop_pending_updates: bool = False) -> None:
+    """Start taking and handling updates, with the bots not doing it already."""
+    for application in applications:
+        updater = application.updater
+        if webhookRouter is None and updater is not None and not updater.running:
+            _ = await updater.start_polling(
+                allowed_updates=Update.ALL_TYPES, drop_pending_updates=drop_pending_updates
+            )
+        if not application.running:
+            await application.start()
+
+    # a single server for all the bots, each at its own path, i.e. its token
+    if webhookRouter is not None and not webhookRouter.running:
+        await webhookRouter.start(applications, drop_pending_updates)
+
+
+async def release_intake(applications: list[Application]) -> bytes:
+    """Stop taking updates, handle the ones already taken, and serialize the games for a new process."""
+    if webhookRouter is not None:
+        await webhookRouter.stop()
+    for application in applications:
+        if application.updater.running:  # pyright: ignore[reportOptionalMemberAccess]
+            await application.updater.stop()  # pyright: ignore[reportOptionalMemberAccess]
+    # stopping waits for the handlers of the updates taken
+    for application in applications:
+        if application.running:
+            await application.stop()
+
+    return dump_state()
+
+
+async def run_pool(applications: list[Application]) -> None:
+    """
+    Run the bots in the same event loop, sharing the same games, until stopped or replaced.
+    A process started while another one runs takes its games over, see handoff.py.
+    """
+    for application in applications:
+        await application.initialize()
+        botPool.add(application.bot)
+
+    # not available on Windows
+    handoff = hasattr(socket, "AF_UNIX")
+    stopped = asyncio.Event()
+    server = HandoffServer(
+        functools.partial(release_intake, applications),
+        functools.partial(start_intake, applications),
+        stopped.set,
+        handoff_path,
+    )
+
+    try:
+        released_at = await take_over(load_state, handoff_path) if handoff else None
+        # the lobbies spilled by the previous process come with its games
+        if spillStore is not None:
+            spillStore.recover(handed_over=released_at is not None)
+        # updates sent during the handoff are waiting to be taken, the others are stale,
+        # unless other nodes are running
+        await start_intake(applications, drop_pending_updates=released_at is None and gameStore is None)
+
+        if released_at is not None:
+            logger.warning(
+                f"Took {len(existingGames)} games over, "
+                f"no updates taken for {(time.time() - released_at) * 1000:.0f} ms"
+            )
+
+        await start_background_tasks(applications[0])
+        if handoff:
+            await server.start()
+
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+        except NotImplementedError:
+            pass
+
+        # run until interrupted or replaced
+        await stopped.wait()
+    finally:
+        await server.close()
+        await stop_background_tasks(applications[0])
+        if webhookRouter is not None:
+            await webhookRouter.stop()
+
+        for application in applications:
+            if application.updater and application.updater.running:
+                await application.updater.stop()
+            if application.running:
+                await application.stop()
+            await application.shutdown()
+
+
 def main() -> None:
-    application = ApplicationBuilder().token(telegram_token).build()
-
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("create", create_game))
-    application.add_handler(CommandHandler("join", join_game))
-    application.add_handler(CommandHandler("leave", leave_game))
-    application.add_handler(CommandHandler("startgame", start_game))
-    application.add_handler(CommandHandler("delete", delete_game))
-    application.add_handler(CommandHandler("rules", rules))
-    application.add_handler(CommandHandler("setroles", set_roles))
-    application.add_handler(CommandHandler("passhost", pass_host))
-    application.add_handler(CommandHandler("inforoles", inforoles))
-
-    application.add_handler(CallbackQueryHandler(button_vote))
-    application.add_handler(PollAnswerHandler(receive_poll_answer))
-
-    application.run_polling(allowed_updates=Update.ALL_TYPES, drop_pending_updates=True)
+    processor = PriorityUpdateProcessor(
+        key=update_key,
+        around=hold_game,
+        busy_text=lambda update: translator.render(update.effective_chat.id, "error.busy"),
+    )
+    applications = [build_application(t, processor) for t in telegram_tokens or [telegram_token]]
+
+    # not available on Windows
+    if hasattr(signal, "SIGUSR1"):
+        _ = signal.signal(signal.SIGUSR1, profile_on_signal)
+
+    try:
+        with asyncio.Runner(loop_factory=loop_factory(event_loop)) as runner:
+            runner.run(run_pool(applications))
+    except KeyboardInterrupt:
+        pass
@@ -1,4 +1,8 @@
+from collections.abc import Mapping
+from itertools import combinations
+from types import MappingProxyType
 from typing import Any
+
 from .role import Role as ROLE
 
 # each value of the key is a tuple:
@@ -18,3 +22,136 @@ MANDATORY_ROLES: set[ROLE] = {ROLE.MERLIN, ROLE.ASSASSIN}
 MAX_TEAM_REJECTS = 5
 MAX_PLAYERS = max(PLAYERS_TO_RULES.keys())
 MIN_PLAYERS = min(PLAYERS_TO_RULES.keys())
+
+
+# special roles the host can add on top of the mandatory ones
+OPTIONAL_ROLES: tuple[ROLE, ...] = tuple(
+    r for r in ROLE if r.is_special and r not in MANDATORY_ROLES
+)
+
+
+def _is_legal_setup(num_players: int, special_roles: frozenset[ROLE]) -> bool:
+    """
+    Checks the rules on a single (player count, special roles) combination.
+    :param num_players: number of players in the game
+    :param special_roles: special roles in the game, including the mandatory ones
+    :return: True if the game can be played with this combination, False otherwise.
+    """
+    num_goods = PLAYERS_TO_RULES[num_players]["num_goods"]
+    special_goods = sum(r.is_good for r in special_roles)
+
+    return (
+        (ROLE.MORGANA not in special_roles or ROLE.PERCIVAL in special_roles)
+        and special_goods <= num_goods
+        and len(special_roles) - special_goods <= num_players - num_goods
+    )
+
+
+def _build_legal_setups() -> Mapping[tuple[int, frozenset[ROLE]], tuple[ROLE, ...]]:
+    """
+    Enumerates every legal (player count, special roles) combination.
+    :return: read-only mapping from each combination to the roles to deal,
+        special roles first, then servants and minions filling the remaining seats.
+    """
+    setups: dict[tuple[int, frozenset[ROLE]], tuple[ROLE, ...]] = {}
+
+    for num_players, rules in PLAYERS_TO_RULES.items():
+        for k in range(len(OPTIONAL_ROLES) + 1):
+            for extra in combinations(OPTIONAL_ROLES, k):
+                special_roles = frozenset(MANDATORY_ROLES.union(extra))
+
+                if not _is_legal_setup(num_players, special_roles):
+                    continue
+
+                num_servants = rules["num_goods"] - sum(r.is_good for r in special_roles)
+                num_minions = num_players - len(special_roles) - num_servants
+
+                setups[(num_players, special_roles)] = (
+                    # sorted by declaration order, so the deck does not depend on set ordering
+                    tuple(r for r in ROLE if r in special_roles)
+                    + (ROLE.LSOA,) * num_servants
+                    + (ROLE.MOM,) * num_minions
+                )
+
+    return MappingProxyType(setups)
+
+
+# (number of players, special roles) => roles to deal, for every legal combination
+LEGAL_SETUPS = _build_legal_setups()
+
+# special roles => minimum number of players needed to play with them
+SETUP_MIN_PLAYERS: Mapping[frozenset[ROLE], int] = MappingProxyType(
+    {roles: n for n, roles in sorted(LEGAL_SETUPS, key=lambda x: -x[0])}
+)
+
+# optional roles that take part in at least one legal setup, in poll order
+SELECTABLE_ROLES: tuple[ROLE, ...] = tuple(
+    r for r in OPTIONAL_ROLES if any(r in roles for roles in SETUP_MIN_PLAYERS)
+)
+
+# seconds a user stays reachable in private chat without interacting with the bot
+REACHABILITY_TTL = 30 * 24 * 60 * 60
+
+# chat metadata (e.g. group titles) is refreshed after this many seconds
+METADATA_TTL = 60 * 60
+METADATA_MAX_ENTRIES = 10_000
+
+# number of recent updates remembered to drop redelivered ones
+DEDUP_WINDOW = 10_000
+
+# updates handled at the same time, and queued updates per pipeline lane
+PIPELINE_WORKERS = 8
+PIPELINE_GAME_CAPACITY = 1000
+PIPELINE_COMMAND_CAPACITY = 200
+PIPELINE_INFO_CAPACITY = 50
+# seconds between two pipeline reports in the logs
+PIPELINE_REPORT_INTERVAL = 5 * 60
+
+# rounds of a tournament when the organizer does not choose
+TOURNAMENT_ROUNDS = 3
+
+# messages per second mirrored to spectators across all games, and events waiting to be sent
+SPECTATOR_RATE = 20
+SPECTATOR_QUEUE_CAPACITY = 1000
+
+# random bytes of the code spectators follow a game with, 8 characters once encoded
+SPECTATE_CODE_BYTES = 6
+
+# language of the chats that did not choose one, see resources/locales
+DEFAULT_LANGUAGE = "en"
+
+# seconds between two stack samples of the profiler, and length of its windows
+PROFILE_INTERVAL = 0.005
+PROFILE_SECONDS = 10
+PROFILE_MAX_SECONDS = 120
+
+# seconds between two measures of the event loop lag, seconds the loop can be held by
+# a callback before its handler is logged, and upper bounds of the lag histogram buckets
+LAG_INTERVAL = 0.05
+LAG_THRESHOLD = 0.2
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# seconds a registry entry (e.g. a poll) can live before being reported as leaked,
+# and seconds between two memory reports in the logs
+MEMORY_MAX_AGE = 24 * 60 * 60
+MEMORY_REPORT_INTERVAL = 15 * 60
+
+# version of the state handed over to a new process on restart or shared between nodes,
+# to be increased whenever the classes it holds (e.g. Game) change, and seconds to wait
+# for each step of the handoff
+STATE_VERSION = 5
+HANDOFF_TIMEOUT = 30
+
+# seconds a node holds the lease of a game without renewing it, before another node can
+# take the game over, seconds to wait for the lease of a busy game, and between two tries
+LEASE_TTL = 10
+LEASE_WAIT = 30
+LEASE_RETRY = 0.02
+
+# seconds a lobby stays in memory after its last update before being spilled to disk,
+# and seconds between two looks for idle lobbies
+SPILL_IDLE = 30 * 60
+SPILL_INTERVAL = 60
+
+# worker processes computing the analysis of finished games
+ANALYSIS_WORKERS = 2
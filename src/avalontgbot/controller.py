@@ -1,5 +1,15 @@
+import asyncio
+import functools
+import hashlib
+import html
 import json
 import logging
+import multiprocessing
+import pickle
+import time
+from collections import defaultdict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from typing import Any
 
 from telegram import (
     CallbackQuery,
@@ -8,17 +18,52 @@ from telegram import (
     Message,
     Update,
 )
+from telegram.constants import ChatType, ParseMode
 from telegram.constants import PollType as POLLTYPE
-from telegram.error import BadRequest
+from telegram.error import BadRequest, Forbidden, TelegramError
 from telegram.ext import (
     ContextTypes,
 )
 
-from .constants import MANDATORY_ROLES, MAX_TEAM_REJECTS, MIN_PLAYERS
-from .game import Game
+from .agent import Agent, next_agent_id
+from .analysis import GameRecord, PostMortem, analyse
+from .backend import decode_key, encode_key, note_new_game
+from .constants import (
+    ANALYSIS_WORKERS,
+    MANDATORY_ROLES,
+    MAX_PLAYERS,
+    MIN_PLAYERS,
+    MAX_TEAM_REJECTS,
+    METADATA_MAX_ENTRIES,
+    MEMORY_REPORT_INTERVAL,
+    METADATA_TTL,
+    PROFILE_MAX_SECONDS,
+    PROFILE_SECONDS,
+    SELECTABLE_ROLES,
+    STATE_VERSION,
+    TOURNAMENT_ROUNDS,
+)
+from .dedup import UpdateDeduplicator
+from .dispatch import Dispatcher
+from .dispatch import UpdateEvent as UPDATE
+from .game import Game, GameKey
 from .gamephase import GamePhase as PHASE
+from .health import LoopMonitor
+from .i18n import Translator
+from .matchmaking import MatchmakingQueue, parse_preferences
+from .memory import MemoryAccountant, MemoryReport
+from .metadata import TTLCache
+from .outbox import Outbox, reply
+from .pipeline import PriorityUpdateProcessor
 from .player import Player
+from .pool import BotPool
+from .profiler import SamplingProfiler
+from .reachability import ReachabilityCache
+from .role import Appearance
 from .role import Role as ROLE
+from .scoreboard import Scoreboard
+from .spectators import SpectatorFeed
+from .tournament import Tournament
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING
@@ -28,26 +73,140 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 
 logger = logging.getLogger(__name__)
 
-existingGames: dict[int, Game] = {}
+existingGames: dict[GameKey, Game] = {}
+
+# handlers for votes and poll answers, keyed by (game phase, update event)
+dispatcher = Dispatcher()
+
+# users who started the bot in private chat and can receive their role
+reachableUsers = ReachabilityCache()
+
+# bot id => recent updates, to drop the ones delivered twice (update ids are per bot)
+recentUpdates: defaultdict[int, UpdateDeduplicator] = defaultdict(UpdateDeduplicator)
+
+# poll id => (event dispatched on answer, poll message id, game key), shared by all bots
+activePolls: dict[str, tuple[UPDATE, int, GameKey]] = {}
+
+# bots serving the games when running with several tokens
+botPool = BotPool()
+
+# group id => group title, filled from incoming updates before asking the API
+chatTitles: TTLCache[int, str] = TTLCache(METADATA_MAX_ENTRIES, METADATA_TTL)
+
+# users waiting in private chat to be matched into a new game
+matchmakingQueue = MatchmakingQueue()
+
+# forum group id => tournament played in its topics
+tournaments: dict[int, Tournament] = {}
+
+# forum group id => digest of its tournament as last shared with the other nodes
+tournamentDigests: dict[int, bytes] = {}
+
+# chats following games from outside their group
+spectatorFeed = SpectatorFeed()
+
+# message catalogs, compiled once, and the language chosen by each chat
+translator = Translator.load()
+
+# game key => board pinned in the group of the started game
+scoreboards: dict[GameKey, Scoreboard] = {}
+
+# samples the event loop on demand of the admins
+profiler = SamplingProfiler()
+
+# measures how late the event loop runs, and logs the handlers holding it
+loopMonitor = LoopMonitor(profiler.collapse)
+
+# remembers since when registry entries exist, for the memory reports
+memoryAccountant = MemoryAccountant()
+
+# worker processes analysing the finished games away from the event loop, started on the
+# first analysis, and the analyses being computed or posted
+analysisPool = ProcessPoolExecutor(ANALYSIS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+postMortems: set[asyncio.Task[None]] = set()
+
+
+async def handle_observe_update(update: Update) -> None:
+    """
+    Refresh the cached chat titles and player names from any incoming update.
+    """
+    chat = update.effective_chat
+    user = update.effective_user
+    message = update.effective_message
+
+    if chat is None or chat.title is None:
+        return
+
+    chatTitles.set(chat.id, chat.title)
+
+    if (
+        user is not None
+        and message is not None
+        and (game := existingGames.get(game_key(message))) is not None
+        and (player := game.lookup_player(user.id)) is not None
+        and player.tg_name != user.full_name
+    ):
+        # the setter also drops the cached mention
+        player.tg_name = user.full_name
+
+
+def game_key(message: Message) -> GameKey:
+    """
+    The key of the game played where the message was sent: the group and, in forums, the topic.
+    """
+    # outside forums message_thread_id marks reply threads, which are not separate games
+    return (message.chat_id, message.message_thread_id if message.is_topic_message else None)
+
+
+# key held, like the key of a game, by the node changing the matchmaking queue, see backend.py
+QUEUE_KEY = ("queue",)
+
+
+def tournament_key(chat_id: int) -> tuple[str, int]:
+    """
+    The key held, like the key of a game, by the node changing the tournament of a forum group.
+    """
+    return ("tournament", chat_id)
+
+
+def _t(chat_id: int, key: str, **kwargs: Any) -> str:
+    """
+    The message of the key in the language chosen by the chat.
+    """
+    return translator.render(chat_id, key, **kwargs)
+
+
+def _group_bot(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> Any:
+    """
+    The bot serving the group: the one of the current update unless the group is pinned to another.
+    """
+    bot = botPool.for_chat(chat_id) if len(botPool) > 1 else None
+    return context.bot if bot is None or bot.id == context.bot.id else bot
+
+
+def _private_bot(context: ContextTypes.DEFAULT_TYPE, user_id: int) -> Any:
+    """
+    The bot able to message the user in private chat: the one the user started.
+    """
+    bot = botPool.for_user(user_id) if len(botPool) > 1 else None
+    return context.bot if bot is None or bot.id == context.bot.id else bot
 
 
-async def handle_create_game(update: Update) -> None:
+async def handle_create_game(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the creation of a new game.
     """
-    group_id = update.message.chat_id
+    key = game_key(update.message)
 
-    if existingGames.get(group_id) is not None:
-        raise ValueError("There is already a game in this group.")
+    if existingGames.get(key) is not None:
+        raise ValueError(_t(key[0], "error.game_exists"))
 
     # check if there is already a game in the group
-    existingGames[group_id] = Game(
-        Player(update.effective_user.id, update.effective_user.full_name), group_id
+    existingGames[key] = Game(
+        Player(update.effective_user.id, update.effective_user.full_name), *key
     )
 
-    _ = await update.message.reply_text(
-        "Game created! You are alone now... wait for some friends.\n",
-    )
+    _ = await reply(context, update.message, _t(key[0], "game.created"))
 
 
 async def handle_join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -56,10 +215,10 @@ async def handle_join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
     :return: the new game state after the player has joined
     """
     # check if there is a game in the group
-    if (group_id := update.message.chat_id) not in existingGames.keys():
-        raise KeyError("There is no game in this group. Please create one first.")
+    if (key := game_key(update.message)) not in existingGames:
+        raise KeyError(_t(key[0], "error.no_game"))
 
-    game = existingGames[group_id]
+    game = existingGames[key]
 
     user = update.effective_user
 
@@ -71,259 +230,1176 @@ async def handle_join_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     game.player_join(p)
 
-    txt = f"{user.mention_html()} has joined the game!\n"
+    txt = _t(game.id, "game.joined", user=user.mention_html())
+
+    # a hint unless the user is known to have started the bot
+    if reachableUsers.status(user.id) is not True:
+        txt += _t(game.id, "game.start_private")
 
     if (
         old_phase != PHASE.LOBBY and not old_state and game.is_ongoing
     ):  # game can resume and has already started
-        txt += "Everyone is online again, the game can continue!"
+        txt += _t(game.id, "game.resumed")
+    else:
+        txt += _t(
+            game.id,
+            "game.waiting",
+            players=", ".join(str(p) for p in game.players if p.is_online),
+        )
+
+    _ = await _announce(
+        context,
+        game,
+        text=txt,
+        parse_mode="HTML",
+    )
+
+    if len(game.players) == 10:
+        _check_reachable(game)
+        await _routine_start_game(context, game)
+
+
+async def handle_set_roles(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Handle the setting of roles for the players in the game.
+    """
+    if (game := existingGames.get(game_key(update.message))) is None:
+        raise KeyError(_t(update.effective_chat.id, "error.no_game"))
+
+    # check if the requesting user is the host
+    if update.effective_user.id != game.host.userid:
+        raise ValueError(_t(game.id, "error.host_only_roles"))
+
+    if game.is_ongoing:
+        raise ValueError(_t(game.id, "error.ongoing"))
+
+    special_roles_str = [str(x) for x in SELECTABLE_ROLES]
+
+    special_roles_str.insert(
+        0, _t(game.host.userid, "game.no_special_roles")
+    )  # add the option to not use special roles
+
+    txt = _t(
+        game.host.userid,
+        "game.select_roles",
+        roles=", ".join(str(r) for r in MANDATORY_ROLES),
+    )
+    # set roles for the players
+    _ = await _send_selection_poll(
+        context,
+        game.key,
+        game.host.userid,
+        special_roles_str,
+        txt,
+        POLLTYPE.REGULAR,
+        None,
+        UPDATE.ROLES_POLL,
+    )
+
+
+async def handle_leave_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Handle a player leaving the game.
+    """
+
+    key = game_key(update.message)
+    user = update.effective_user
+
+    game = existingGames[key]
+
+    player = game.lookup_player(user.id)
+
+    # TODO: highlight the (new) host
+    old_host_name = str(game.host)
+
+    # if there are no players left, remove the Game, agents do not play on their own
+    if not game.player_leave(player) or not any(p.is_online for p in _humans(game.players)):
+        # remove the game from the existing games
+        _remove_game(key)
+
+        text = _t(game.id, "game.all_left")
+
+    else:
+        # agents cannot host, the command goes to a human
+        if isinstance(game.host, Agent):
+            game.pass_host(next(p for p in _humans(game.players) if p.is_online))
+
+        text = _t(
+            game.id,
+            "game.left",
+            user=user.mention_html(),
+            players=", ".join(str(p) for p in game.players if p.is_online),
+        )
+        # notify the group about the new host, in case the old one left
+        if old_host_name != str(game.host):
+            text += _t(game.id, "game.host_left", host=game.host.mention())
+
+    _ = await reply(context, update.message, text, ParseMode.HTML)
+
+
+async def handle_pass_host(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Handle the passing of the game host role to another player.
+    """
+
+    game = existingGames[game_key(update.message)]
+
+    if game.lookup_player(update.effective_user.id) is not game.host:
+        raise KeyError(_t(game.id, "error.host_only_pass"))
+
+    candidates = [str(x) for x in _humans(game.players) if x is not game.host]
+
+    if len(candidates) == 0:
+        raise ValueError(_t(game.id, "error.not_enough_to_pass"))
+    elif len(candidates) == 1:
+        # if there is only one candidate, pass the host immediately
+        await _routine_pass_host(0, game, context)
     else:
-        txt += f"Players waiting: {', '.join(str(p) for p in game.players if p.is_online)}\n"
+        _ = await _send_selection_poll(
+            context,
+            game.key,
+            game.host.userid,
+            candidates,
+            _t(game.host.userid, "game.select_host"),
+            POLLTYPE.REGULAR,
+            None,
+            UPDATE.HOST_POLL,
+            False,  # only one answer allowed
+        )
+
+
+async def handle_start_game(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+):
+    """
+    Handle the start of the game, checking for conditions such as host and player count.
+    """
+    game = existingGames[game_key(update.message)]
+
+    # check if the requesting user is the creator
+    if update.effective_user.id != game.host.userid:
+        raise ValueError(_t(game.id, "error.host_only_start"))
+
+    # check if there are enough players for the selected special roles
+    if not game.are_enough_players():
+        raise ValueError(
+            _t(game.id, "error.not_enough_players", required=game.required_players)
+        )
+
+    if game.is_ongoing:
+        raise ValueError(_t(game.id, "error.ongoing"))
+
+    _check_reachable(game)
+
+    # this effectively starts the game
+    await _routine_start_game(context, game)
+
+
+def _check_reachable(game: Game) -> None:
+    """
+    Check that every player can receive their role in private chat, before the game starts.
+    :raises ValueError: naming the players who have to start the bot in private chat first
+    """
+    unreachable = set(reachableUsers.unreachable(p.userid for p in _humans(game.players)))
+
+    if len(unreachable) > 0:
+        raise ValueError(
+            _t(
+                game.id,
+                "error.unreachable",
+                players=", ".join(str(p) for p in game.players if p.userid in unreachable),
+            )
+        )
+
+
+async def handle_delete_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Handle the deletion of a game.
+    """
+    if (game := existingGames.get(game_key(update.message))) is None:
+        raise KeyError(_t(update.effective_chat.id, "error.no_game"))
+
+    if update.effective_user.id != game.host.userid:
+        raise ValueError(_t(game.id, "error.host_only_delete"))
+
+    _remove_game(game.key)
+    _ = await reply(context, update.message, _t(game.id, "game.deleted"))
+
+
+async def handle_add_bots(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle the host filling the lobby with computer-controlled players.
+    By default enough agents are added to reach the minimum number of players.
+    """
+    if (game := existingGames.get(game_key(update.message))) is None:
+        raise KeyError(_t(update.effective_chat.id, "error.no_game"))
+
+    if update.effective_user.id != game.host.userid:
+        raise ValueError(_t(game.id, "error.host_only_bots"))
+
+    if game.phase != PHASE.LOBBY:
+        raise ValueError(_t(game.id, "bots.lobby_only"))
+
+    try:
+        count = int(context.args[0]) if context.args else max(MIN_PLAYERS - len(game.players), 1)
+    except ValueError:
+        raise ValueError(_t(game.id, "bots.usage"))
+
+    if not 0 < count <= MAX_PLAYERS - len(game.players):
+        raise ValueError(_t(game.id, "bots.no_room", room=MAX_PLAYERS - len(game.players)))
+
+    for _ in range(count):
+        game.player_join(Agent(next_agent_id(game)))
+
+    _ = await _announce(
+        context,
+        game,
+        text=_t(game.id, "bots.joined", count=count)
+        + _t(
+            game.id,
+            "game.waiting",
+            players=", ".join(str(p) for p in game.players if p.is_online),
+        ),
+    )
+
+
+async def handle_spectate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle a chat subscribing to the announcements of a game, e.g. /spectate q3Xk9_aB,
+    with the code shown when the game started.
+    """
+    chat_id = update.effective_chat.id
+
+    if not context.args:
+        raise ValueError(_t(chat_id, "spectate.usage"))
+
+    # the code is dropped with its game, on every node sharing the games, so the game may be
+    # held by another node, which mirrors its next update to this chat
+    if (key := spectatorFeed.find(context.args[0])) is None:
+        raise KeyError(_t(chat_id, "spectate.no_game"))
+
+    spectatorFeed.subscribe(key, chat_id)
+
+    _ = await reply(context, update.message, _t(chat_id, "spectate.following"))
+
+
+async def handle_unspectate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle a chat unsubscribing from the announcements of a game.
+    """
+    chat_id = update.effective_chat.id
+
+    if not context.args:
+        raise ValueError(_t(chat_id, "unspectate.usage"))
+
+    key = spectatorFeed.find(context.args[0])
+    if key is None or not spectatorFeed.unsubscribe(key, chat_id):
+        raise KeyError(_t(chat_id, "unspectate.not_following"))
+
+    _ = await reply(context, update.message, _t(chat_id, "unspectate.stopped"))
+
+
+async def handle_set_language(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle a chat choosing the language of the bot, e.g. /language it.
+    Without arguments, the available languages are listed.
+    """
+    chat_id = update.effective_chat.id
+    languages = ", ".join(
+        f"{code} ({translator.render_in(code, 'language.name')})" for code in translator.languages
+    )
+
+    if not context.args:
+        _ = await reply(
+            context,
+            update.message,
+            _t(
+                chat_id,
+                "language.list",
+                current=translator.language(chat_id),
+                languages=languages,
+                example=translator.languages[-1],
+            )
+        )
+        return
+
+    code = context.args[0].lower()
+    if code not in translator.languages:
+        raise ValueError(_t(chat_id, "language.usage", code=code, languages=languages))
+
+    translator.set_language(chat_id, code)
+
+    _ = await reply(context, update.message, _t(chat_id, "language.set", name=_t(chat_id, "language.name")))
+
+
+async def handle_profile(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, admins: set[int]
+) -> None:
+    """
+    Handle an admin profiling the bot for a while, e.g. /profile 30 for 30 seconds.
+    :param admins: the user ids allowed to profile
+    """
+    chat_id = update.effective_chat.id
+
+    if update.effective_user.id not in admins:
+        raise ValueError(_t(chat_id, "admin.only"))
+
+    if profiler.running:
+        raise ValueError(_t(chat_id, "profile.running"))
+
+    try:
+        seconds = float(context.args[0]) if context.args else PROFILE_SECONDS
+    except ValueError:
+        seconds = 0
+
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise ValueError(_t(chat_id, "profile.usage", max=PROFILE_MAX_SECONDS))
+
+    # handlers run in the event loop thread, the one sampled
+    path = profiler.start(seconds)
+
+    _ = await reply(context, update.message, _t(chat_id, "profile.started", seconds=seconds, path=path))
+
+
+async def handle_memory(update: Update, context: ContextTypes.DEFAULT_TYPE, admins: set[int]) -> None:
+    """
+    Handle an admin asking for the memory report.
+    :param admins: the user ids allowed to see it
+    """
+    if update.effective_user.id not in admins:
+        raise ValueError(_t(update.effective_chat.id, "admin.only"))
+
+    _ = await reply(context, update.message, memory_report().summary())
+
+
+async def handle_lag(update: Update, context: ContextTypes.DEFAULT_TYPE, admins: set[int]) -> None:
+    """
+    Handle an admin asking for the event loop lag report, with the state of the update pipeline.
+    :param admins: the user ids allowed to see it
+    """
+    if update.effective_user.id not in admins:
+        raise ValueError(_t(update.effective_chat.id, "admin.only"))
+
+    text = loopMonitor.summary()
+    if isinstance(processor := context.application.update_processor, PriorityUpdateProcessor):
+        text += "\n" + processor.summary()
+
+    _ = await reply(context, update.message, text)
+
+
+def memory_report() -> MemoryReport:
+    """
+    Account the memory of the live games and of the registry entries kept for them.
+    """
+    return memoryAccountant.report(
+        existingGames,
+        {
+            "polls": [(poll_id, entry[2], entry) for poll_id, entry in activePolls.items()],
+            "scoreboards": [(key, key, board) for key, board in scoreboards.items()],
+            "spectators": [(key, key, chats) for key, chats in spectatorFeed.subscriptions()],
+        },
+    )
+
+
+async def log_memory_reports(interval: float = MEMORY_REPORT_INTERVAL) -> None:
+    """
+    Log the memory report periodically, with leaked entries as errors. Runs until cancelled.
+    """
+    while True:
+        await asyncio.sleep(interval)
+
+        report = memory_report()
+        logger.warning(report.summary())
+        if report.leaks:
+            logger.error(f"{len(report.leaks)} registry entries leaked: {report.leaks[:10]}")
+
+
+def dump_state() -> bytes:
+    """
+    Serialize the games and the registries kept for them, to hand them over to a new process.
+    The users known to be reachable and the matchmaking queue come along, their times as
+    seconds left or waited, since the monotonic clock of this process means nothing to the new one,
+    and so do the bots serving each group and started by each user.
+    """
+    return pickle.dumps(
+        {
+            "version": STATE_VERSION,
+            "games": existingGames,
+            "polls": activePolls,
+            # the text of a board is rendered again by the new process, its message is kept
+            "scoreboards": {key: (board.message_id, board.text) for key, board in scoreboards.items()},
+            "spectators": spectatorFeed.subscriptions(),
+            "spectate_codes": spectatorFeed.codes(),
+            "tournaments": tournaments,
+            "languages": translator.chat_languages,
+            "reachable": reachableUsers.dump(),
+            "queue": matchmakingQueue.dump(),
+            "pool": botPool.dump(),
+        }
+    )
+
+
+def load_state(data: bytes) -> None:
+    """
+    Load the state serialized by dump_state in the process being replaced.
+    :raises ValueError: if the state was serialized by an incompatible version
+    """
+    state = pickle.loads(data)
+
+    if (version := state.get("version")) != STATE_VERSION:
+        raise ValueError(f"Cannot load the state of version {version}, expected {STATE_VERSION}.")
+
+    existingGames.update(state["games"])
+    activePolls.update(state["polls"])
+    tournaments.update(state["tournaments"])
+
+    for key, (message_id, text) in state["scoreboards"].items():
+        board = scoreboards[key] = Scoreboard(functools.partial(translator.render, key[0]))
+        board.message_id, board.text = message_id, text
+
+    for key, chats in state["spectators"]:
+        for chat_id in chats:
+            spectatorFeed.subscribe(key, chat_id)
+    for key, code in state["spectate_codes"].items():
+        spectatorFeed.restore_code(key, code)
+
+    for chat_id, language in state["languages"].items():
+        translator.set_language(chat_id, language)
+
+    reachableUsers.load(state["reachable"])
+    matchmakingQueue.load(state["queue"])
+    botPool.load(state["pool"])
+
+
+def dump_game(key: GameKey) -> tuple[bytes, list[str]] | None:
+    """
+    Serialize a game and the registry entries kept for it, to share it with the other nodes.
+    :return: the serialized game and the ids of its polls, None if there is no such game
+    """
+    if (game := existingGames.get(key)) is None:
+        return None
+
+    polls = {poll_id: entry for poll_id, entry in activePolls.items() if entry[2] == key}
+    board = scoreboards.get(key)
+
+    data = pickle.dumps(
+        {
+            "version": STATE_VERSION,
+            "game": game,
+            "polls": polls,
+            "scoreboard": (board.message_id, board.text) if board is not None else None,
+            "spectate_code": spectatorFeed.code(key),
+        }
+    )
+    return data, list(polls)
+
+
+def load_game(key: GameKey, data: bytes | None) -> None:
+    """
+    Replace the local copy of a game with the one serialized by dump_game on another node.
+    :param data: the serialized game, None if it was removed
+    :raises ValueError: if the game was serialized by an incompatible version
+    """
+    record = pickle.loads(data) if data is not None else None
+
+    if record is not None and (version := record.get("version")) != STATE_VERSION:
+        raise ValueError(f"Cannot load the game of version {version}, expected {STATE_VERSION}.")
+
+    _ = existingGames.pop(key, None)
+    _ = scoreboards.pop(key, None)
+    for poll_id in [p for p, entry in activePolls.items() if entry[2] == key]:
+        del activePolls[poll_id]
+
+    if record is None:
+        return
+
+    existingGames[key] = record["game"]
+    activePolls.update(record["polls"])
+
+    # the code shown when the game started, wherever it started
+    if record["spectate_code"] is not None:
+        spectatorFeed.restore_code(key, record["spectate_code"])
+
+    if record["scoreboard"] is not None:
+        board = scoreboards[key] = Scoreboard(functools.partial(translator.render, key[0]))
+        board.message_id, board.text = record["scoreboard"]
+
+
+def dump_shared() -> list[tuple[str, str, bytes | None]]:
+    """
+    Serialize the registry entries changed since the last call, to share them with the other nodes:
+    every node knows the reachable users, the matchmaking queue, the tournaments, the languages,
+    the bots serving each group and started by each user, and the chats following each game.
+    Times are sent as wall clock times, the monotonic clock of this node meaning nothing to the others.
+    :return: (registry, key, data) of each changed entry, data None if removed
+    """
+    now = time.time()
+    entries: list[tuple[str, str, Any]] = [
+        ("reachable", str(user_id), (seen[0], now + seen[1]) if seen is not None else None)
+        for user_id, seen in reachableUsers.changes().items()
+    ]
+    entries += [
+        ("queue", str(user_id), (entry[0], entry[1], now - entry[2]) if entry is not None else None)
+        for user_id, entry in matchmakingQueue.changes().items()
+    ]
+    entries += [("language", str(chat_id), language) for chat_id, language in translator.changes().items()]
+    chats, users = botPool.changes()
+    entries += [("chat_bot", str(chat_id), bot_id) for chat_id, bot_id in chats.items()]
+    entries += [("user_bot", str(user_id), bot_id) for user_id, bot_id in users.items()]
+    codes, subscriptions = spectatorFeed.changes()
+    entries += [("spectate_code", encode_key(key), code) for key, code in codes.items()]
+    entries += [
+        ("spectator", json.dumps([*key, chat_id]), True if subscribed else None)
+        for (key, chat_id), subscribed in subscriptions.items()
+    ]
+
+    # tournaments are only changed by the node holding their key, so they are shared whole
+    for chat_id in tournaments.keys() | tournamentDigests.keys():
+        if (tournament := tournaments.get(chat_id)) is None:
+            del tournamentDigests[chat_id]
+            entries.append(("tournament", str(chat_id), None))
+        elif tournamentDigests.get(chat_id) != (digest := hashlib.blake2b(pickle.dumps(tournament)).digest()):
+            tournamentDigests[chat_id] = digest
+            entries.append(("tournament", str(chat_id), tournament))
+
+    return [
+        (registry, key, pickle.dumps((STATE_VERSION, value)) if value is not None else None)
+        for registry, key, value in entries
+    ]
+
+
+def load_shared(entry: tuple[str, str, bytes | None]) -> None:
+    """
+    Replace the local copy of a registry entry with the one serialized by dump_shared on another node.
+    Entries of another version are left to the nodes running it.
+    """
+    registry, key, data = entry
+    version, value = pickle.loads(data) if data is not None else (STATE_VERSION, None)
+
+    if version != STATE_VERSION:
+        logger.warning(f"Skipped the {registry} entry {key} of version {version}, expected {STATE_VERSION}")
+        return
+
+    now = time.time()
+
+    if registry == "reachable":
+        reachableUsers.apply(int(key), (value[0], value[1] - now) if value is not None else None)
+    elif registry == "queue":
+        matchmakingQueue.apply(int(key), (value[0], value[1], now - value[2]) if value is not None else None)
+    elif registry == "language":
+        translator.apply(int(key), value)
+    elif registry == "chat_bot":
+        botPool.apply_chat(int(key), value)
+    elif registry == "user_bot":
+        botPool.apply_user(int(key), value)
+    elif registry == "spectate_code":
+        spectatorFeed.apply_code(decode_key(key), value)
+    elif registry == "spectator":
+        group_id, thread_id, chat_id = json.loads(key)
+        spectatorFeed.apply_subscription((group_id, thread_id), chat_id, value is not None)
+    elif registry == "tournament":
+        chat_id = int(key)
+        if value is None:
+            _ = tournaments.pop(chat_id, None)
+            _ = tournamentDigests.pop(chat_id, None)
+        else:
+            tournaments[chat_id] = value
+            # as dumped here, which is what dump_shared compares
+            tournamentDigests[chat_id] = hashlib.blake2b(pickle.dumps(value)).digest()
+
+
+def _remove_game(key: GameKey) -> None:
+    """
+    Forget a game and every registry entry kept for it.
+    """
+    del existingGames[key]
+    _ = scoreboards.pop(key, None)
+    spectatorFeed.close(key)
+
+    for poll_id in [p for p, entry in activePolls.items() if entry[2] == key]:
+        del activePolls[poll_id]
+
+
+def _humans(players: list[Player]) -> list[Player]:
+    """
+    :return: the players who are not agents, in the given order
+    """
+    return [p for p in players if not isinstance(p, Agent)]
+
+
+async def handle_join_queue(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, venue: int | None
+) -> None:
+    """
+    Handle a user joining the matchmaking queue from private chat.
+    :param venue: the forum group where matched games are played, None if matchmaking is off
+    """
+    chat_id = update.effective_chat.id
+
+    if venue is None:
+        raise ValueError(_t(chat_id, "queue.unavailable"))
+
+    if update.effective_chat.type != ChatType.PRIVATE:
+        raise ValueError(_t(chat_id, "queue.private_only"))
+
+    user = update.effective_user
+    counts, roles = parse_preferences(context.args or [])
+
+    # queuing in private chat proves the user is reachable, like /start
+    reachableUsers.mark_reachable(user.id)
+    botPool.note_user(user.id, context.bot.id)
+
+    # users blocking the bot leave the queue before a match, so no table waits for them
+    match = matchmakingQueue.enqueue(
+        Player(user.id, user.full_name), counts, roles, reachableUsers.is_reachable
+    )
+
+    if match is None:
+        _ = await reply(
+            context,
+            update.message,
+            _t(user.id, "queue.joined", waiting=len(matchmakingQueue))
+        )
+        return
+
+    await _routine_matched_game(context, venue, *match)
+
+
+async def handle_leave_queue(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle a user leaving the matchmaking queue.
+    """
+    user_id = update.effective_user.id
+
+    if not matchmakingQueue.dequeue(user_id):
+        raise KeyError(_t(user_id, "queue.not_queued"))
+
+    _ = await reply(context, update.message, _t(user_id, "queue.left"))
+
+
+async def _routine_matched_game(
+    context: ContextTypes.DEFAULT_TYPE,
+    venue: int,
+    num_players: int,
+    roles: frozenset[ROLE],
+    players: list[Player],
+) -> None:
+    """
+    Routine to open a new topic in the matchmaking group and start the matched game there.
+    If the game cannot start, its topic is closed and the players are told to queue again.
+    """
+    name = _t(venue, "queue.topic", count=num_players)
+
+    try:
+        game = await _open_table(
+            context, venue, name, players, roles, _t(venue, "queue.header")
+        )
+    except (BadRequest, Forbidden) as e:
+        logger.error(f"Error opening a matchmaking topic: {e}")
+        await _message_players(context, players, "queue.no_table")
+        return
+
+    title = chatTitles.get(venue)
+    for player in players:
+        try:
+            _ = await _private_bot(context, player.userid).send_message(
+                chat_id=player.userid,
+                text=_t(player.userid, "queue.found_in", name=name, title=title)
+                if title
+                else _t(player.userid, "queue.found", name=name),
+            )
+        except (BadRequest, Forbidden) as e:
+            # the start below names the player
+            logger.error(f"Error with private message: {e}")
+
+    try:
+        await _routine_start_game(context, game)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error starting a matched game: {e}")
+        await _close_table(context, game)
+        await _message_players(
+            context, players, "queue.failed", error=translator.explain(game.id, e)
+        )
+
+
+async def handle_create_tournament(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """
+    Handle the creation of a tournament, played in topics of the forum group.
+    """
+    chat = update.effective_chat
+
+    if not chat.is_forum:
+        raise ValueError(_t(chat.id, "tournament.forum_only"))
+
+    if chat.id in tournaments:
+        raise ValueError(_t(chat.id, "tournament.exists"))
+
+    try:
+        rounds = int(context.args[0]) if context.args else TOURNAMENT_ROUNDS
+    except ValueError:
+        raise ValueError(_t(chat.id, "tournament.usage"))
+
+    user = update.effective_user
+    tournaments[chat.id] = Tournament(Player(user.id, user.full_name), chat.id, rounds)
+
+    _ = await reply(
+        context,
+        update.message,
+        _t(chat.id, "tournament.created", rounds=rounds, organizer=user.full_name)
+    )
+
+
+async def handle_enter_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle a player entering the tournament of the group.
+    """
+    if (tournament := tournaments.get(update.effective_chat.id)) is None:
+        raise KeyError(_t(update.effective_chat.id, "tournament.none"))
+
+    user = update.effective_user
+    tournament.enter(Player(user.id, user.full_name))
+
+    txt = _t(
+        tournament.id,
+        "tournament.entered",
+        user=user.mention_html(),
+        count=len(tournament.roster),
+    )
+
+    # a hint unless the user is known to have started the bot
+    if reachableUsers.status(user.id) is not True:
+        txt += _t(tournament.id, "tournament.start_private")
+
+    _ = await reply(context, update.message, txt, ParseMode.HTML)
+
+
+async def handle_next_round(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle the start of the next round of the tournament, with all its tables at once.
+    """
+    if (tournament := tournaments.get(update.effective_chat.id)) is None:
+        raise KeyError(_t(update.effective_chat.id, "tournament.none"))
+
+    if update.effective_user.id != tournament.organizer.userid:
+        raise ValueError(_t(tournament.id, "tournament.organizer_only"))
+
+    # deleted tables will never finish
+    for key in tournament.pending:
+        if key not in existingGames:
+            tournament.abandon(key)
+
+    unreachable = set(reachableUsers.unreachable(p.userid for p in tournament.roster))
+
+    if len(unreachable) > 0:
+        raise ValueError(
+            _t(
+                tournament.id,
+                "tournament.unreachable",
+                players=", ".join(str(p) for p in tournament.roster if p.userid in unreachable),
+            )
+        )
+
+    tables = tournament.start_round()
+
+    _ = await reply(
+        context,
+        update.message,
+        _t(
+            tournament.id,
+            "tournament.round_starting",
+            round=tournament.round,
+            rounds=tournament.rounds,
+            tables=len(tables),
+        )
+    )
 
-    _ = await context.bot.send_message(
-        chat_id=game.id,
-        text=txt,
-        parse_mode="HTML",
+    # tables are independent games, none waits for another to start
+    _ = await asyncio.gather(
+        *(
+            _routine_start_table(context, tournament, number, players)
+            for number, players in enumerate(tables, 1)
+        )
     )
 
-    if len(game.players) == 10:
-        await _routine_start_game(context, game)
 
+async def handle_standings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle a request for the standings of the tournament.
+    """
+    if (tournament := tournaments.get(update.effective_chat.id)) is None:
+        raise KeyError(_t(update.effective_chat.id, "tournament.none"))
 
-async def handle_set_roles(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    _ = await reply(context, update.message, _standings_text(tournament), ParseMode.HTML)
+
+
+async def _routine_start_table(
+    context: ContextTypes.DEFAULT_TYPE,
+    tournament: Tournament,
+    number: int,
+    players: list[Player],
+) -> None:
     """
-    Handle the setting of roles for the players in the game.
+    Routine to open a table of the current round in its own topic and start its game.
     """
-    group_id = update.message.chat_id
+    name = _t(tournament.id, "tournament.table", round=tournament.round, number=number)
 
-    if (game := existingGames.get(group_id)) is None:
-        raise KeyError("There is no game in this group. Please create one first.")
+    try:
+        # the players of a game keep their role and status, so each table gets its own
+        game = await _open_table(
+            context,
+            tournament.id,
+            name,
+            [Player(p.userid, p.tg_name) for p in players],
+            frozenset(MANDATORY_ROLES),
+            name,
+        )
+    except (BadRequest, Forbidden) as e:
+        logger.error(f"Error opening a tournament table: {e}")
+        _ = await _group_bot(context, tournament.id).send_message(
+            chat_id=tournament.id,
+            text=_t(tournament.id, "tournament.no_table", name=name, error=e),
+        )
+        return
 
-    # check if the requesting user is the host
-    if update.effective_user.id != game.host.userid:
-        raise ValueError("Only the host can set roles.")
+    tournament.add_table(game.key)
 
-    if game.is_ongoing:
-        raise ValueError("The game is already ongoing.")
+    try:
+        await _routine_start_game(context, game)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Error starting a tournament table: {e}")
+        tournament.abandon(game.key)
+        # the topic stays, telling its players why their table never started
+        _ = await _announce(
+            context,
+            game,
+            text=_t(game.id, "tournament.table_failed", error=translator.explain(game.id, e)),
+        )
+        _remove_game(game.key)
 
-    special_roles_str = list(
-        str(x) for x in ROLE if x.is_special and x not in MANDATORY_ROLES
-    )
 
-    special_roles_str.insert(
-        0, "None (no special roles)"
-    )  # add the option to not use special roles
+async def _routine_end_round(context: ContextTypes.DEFAULT_TYPE, tournament: Tournament) -> None:
+    """
+    Routine to announce the standings when the last table of a round finishes.
+    """
+    if tournament.is_over:
+        del tournaments[tournament.id]
+        text = _t(tournament.id, "tournament.over")
+    else:
+        text = _t(
+            tournament.id,
+            "tournament.round_over",
+            round=tournament.round,
+            organizer=tournament.organizer.mention(),
+        )
 
-    txt = (
-        "Select special roles. If you select None, default roles will be used: "
-        f"{', '.join(str(r) for r in MANDATORY_ROLES)}"
-    )
-    # set roles for the players
-    _ = await _send_selection_poll(
-        context,
-        game.id,
-        game.host.userid,
-        special_roles_str,
-        txt,
-        POLLTYPE.REGULAR,
-        None,
+    _ = await _group_bot(context, tournament.id).send_message(
+        chat_id=tournament.id,
+        text=text + _standings_text(tournament),
+        parse_mode="HTML",
     )
 
 
-async def handle_leave_game(update: Update):
+def _standings_text(tournament: Tournament) -> str:
     """
-    Handle a player leaving the game.
+    :return: the standings of the tournament, one player per line
     """
+    return _t(tournament.id, "tournament.standings", round=tournament.round) + "\n".join(
+        _t(tournament.id, "tournament.standing", position=i, player=player.mention(), points=points)
+        for i, (player, points) in enumerate(tournament.standings(), 1)
+    )
 
-    group_id = update.message.chat_id
-    user = update.effective_user
 
-    game = existingGames[group_id]
+async def _open_table(
+    context: ContextTypes.DEFAULT_TYPE,
+    chat_id: int,
+    name: str,
+    players: list[Player],
+    roles: frozenset[ROLE],
+    header: str,
+) -> Game:
+    """
+    Open a new topic in a forum group and seat a game there, ready to start.
+    :param chat_id: the forum group
+    :param name: the name of the topic
+    :param players: the players of the game, the first one is the host
+    :param roles: the special roles of the game
+    :param header: the first line of the message listing the players
+    :return: the new game
+    """
+    topic = await _group_bot(context, chat_id).create_forum_topic(chat_id=chat_id, name=name)
 
-    player = game.lookup_player(user.id)
+    game = Game(players[0], chat_id, topic.message_thread_id)
+    for player in players[1:]:
+        game.player_join(player)
+    game.set_special_roles(list(roles))
 
-    # TODO: highlight the (new) host
-    old_host_name = str(game.host)
+    existingGames[game.key] = game
+    note_new_game(game.key)
 
-    # if there are no players left, remove the Game
-    if not game.player_leave(player):
-        # remove the game from the existing games
-        del existingGames[group_id]
+    _ = await _announce(
+        context,
+        game,
+        text=_t(
+            game.id,
+            "table.players",
+            header=header,
+            players=", ".join(p.mention() for p in game.players),
+            host=game.host.mention(),
+        ),
+        parse_mode="HTML",
+    )
 
-        text = "All players have left the game. The game has been removed."
+    return game
 
-    else:
-        text = (
-            f"{user.mention_html()} has left the game!\n"
-            f" Players waiting: {', '.join(str(p) for p in game.players if p.is_online)}\n"
-        )
-        # notify the group about the new host, in case the old one left
-        if old_host_name != str(game.host):
-            text += (
-                "The game host has left!\n"
-                f"{game.host.mention()} is the new host.\n"
-            )
 
-    _ = await update.message.reply_html(text)
+async def _message_players(
+    context: ContextTypes.DEFAULT_TYPE, recipients: list[Player], key: str, **kwargs: Any
+) -> None:
+    """
+    Send a message to every human player in private chat, in the language of each,
+    skipping the players the bot cannot reach.
+    """
+    for player in _humans(recipients):
+        try:
+            _ = await _private_bot(context, player.userid).send_message(
+                chat_id=player.userid,
+                text=_t(player.userid, key, **kwargs),
+            )
+        except (BadRequest, Forbidden) as e:
+            logger.error(f"Error with private message: {e}")
 
 
-async def handle_pass_host(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def _close_table(context: ContextTypes.DEFAULT_TYPE, game: Game) -> None:
     """
-    Handle the passing of the game host role to another player.
+    Forget a game that could not start and delete the topic opened for it.
     """
+    _remove_game(game.key)
 
-    group_id = update.message.chat_id
-    game = existingGames[group_id]
+    try:
+        _ = await _group_bot(context, game.id).delete_forum_topic(
+            chat_id=game.id, message_thread_id=game.thread_id
+        )
+    except (BadRequest, Forbidden) as e:
+        logger.error(f"Error deleting the topic of a game: {e}")
 
-    if game.lookup_player(update.effective_user.id) is not game.host:
-        raise KeyError("Only the host can pass the host.")
 
-    candidates = [str(x) for x in game.players if x is not game.host]
+async def handle_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handle a request for the state of the game, answered with the board as last rendered.
+    """
+    if (game := existingGames.get(game_key(update.message))) is None:
+        raise KeyError(_t(update.effective_chat.id, "error.no_game"))
 
-    if len(candidates) == 0:
-        raise ValueError(
-            "There are not enough players to pass the host. At least 2 players are required."
-        )
-    elif len(candidates) == 1:
-        # if there is only one candidate, pass the host immediately
-        await _routine_pass_host(0, game, context)
-    else:
-        _ = await _send_selection_poll(
-            context,
-            game.id,
-            game.host.userid,
-            candidates,
-            "Select a new host",
-            POLLTYPE.REGULAR,
-            None,
-            False,  # only one answer allowed
-        )
+    if (board := scoreboards.get(game.key)) is None:
+        raise ValueError(_t(game.id, "status.not_started"))
 
+    _ = await reply(context, update.message, board.text, ParseMode.HTML)
 
-async def handle_start_game(
-    update: Update,
-    context: ContextTypes.DEFAULT_TYPE,
-):
+
+async def _refresh_scoreboard(context: ContextTypes.DEFAULT_TYPE, game: Game) -> None:
     """
-    Handle the start of the game, checking for conditions such as host and player count.
+    Show what changed since the last phase on the board of the game, sending and pinning it first.
+    Call it once per phase transition, the message is only edited when its text changed.
     """
-    game = existingGames[update.message.chat_id]
+    if (board := scoreboards.get(game.key)) is None:
+        board = scoreboards[game.key] = Scoreboard(functools.partial(translator.render, game.id))
 
-    # check if the requesting user is the creator
-    if update.effective_user.id != game.host.userid:
-        raise ValueError("Only the creator can start the game.")
+    if not board.update(game):
+        return
 
-    # check if there are enough players
-    if len(game.players) < MIN_PLAYERS:
-        raise ValueError(
-            "Not enough players to start the game. Minimum 5 players required."
-        )
+    bot = _group_bot(context, game.id)
 
-    if game.is_ongoing:
-        raise ValueError("The game is already ongoing.")
+    try:
+        if board.message_id is None:
+            # sent right away, not merged by the outbox, to know the message to pin
+            msg = await _announce(
+                context, game, text=board.text, parse_mode="HTML", disable_notification=True
+            )
+            board.message_id = msg.message_id
+            _ = await bot.pin_chat_message(
+                chat_id=game.id, message_id=board.message_id, disable_notification=True
+            )
+        else:
+            _ = await bot.edit_message_text(
+                chat_id=game.id, message_id=board.message_id, text=board.text, parse_mode="HTML"
+            )
+    except (BadRequest, Forbidden) as e:
+        # e.g. the bot is not allowed to pin, the board is still served by /status
+        logger.error(f"Error updating the scoreboard: {e}")
 
-    # this effectively starts the game
-    await _routine_start_game(context, game)
+
+async def _announce(
+    context: ContextTypes.DEFAULT_TYPE, game: Game, text: str, **kwargs: Any
+) -> Any:
+    """
+    Send a message to the group of the game, in its topic if played in a forum.
+    """
+    return await _group_bot(context, game.id).send_message(
+        chat_id=game.id,
+        message_thread_id=game.thread_id,
+        text=text,
+        **kwargs,
+    )
 
 
-async def handle_delete_game(update: Update):
+def _broadcast(
+    context: ContextTypes.DEFAULT_TYPE, game: Game, text: str, parse_mode: str | None = None
+) -> None:
     """
-    Handle the deletion of a game.
+    Mirror an announcement made in the group to the spectators of the game, without waiting.
+    Only call it with texts the whole group sees, never with private role information.
     """
-    group_id = update.message.chat_id
+    if not spectatorFeed.has_subscribers(game.key):
+        return
 
-    if (game := existingGames.get(group_id)) is None:
-        raise KeyError("There is no game in this group. Please create one first.")
+    # rendered once, for all the spectators
+    title = html.escape(chatTitles.get(game.id) or "Avalon")
+    body = text if parse_mode == ParseMode.HTML else html.escape(text)
 
-    if update.effective_user.id != game.host.userid:
-        raise ValueError("Only the host can delete the game.")
+    # the feed sends after the update is handled, so it needs the bot behind the outbox
+    bot = _group_bot(context, game.id)
+    bot = bot.wrapped if isinstance(bot, Outbox) else bot
 
-    del existingGames[group_id]
-    _ = await update.message.reply_text("The game has been deleted.")
+    _ = spectatorFeed.publish(bot, game.key, f"👀 <b>{title}</b>\n{body}", ParseMode.HTML)
 
 
 async def _routine_start_game(context: ContextTypes.DEFAULT_TYPE, game: Game):
     """
     Routine to start the game, setting up roles and notifying players.
+    :raises ValueError: naming the players who could not be messaged in private chat,
+    in which case the game is left in the lobby
     """
-    game.start_game()
 
-    chat = await context.bot.get_chat(game.id)
+    async def load_title() -> str:
+        chat = await _group_bot(context, game.id).get_chat(game.id)
+        return chat.title or ""
 
-    try:
-        for player in game.players:
-            # announce the role in the respective game in private chat
-            # to trigger the bot in private chat
-            _ = await context.bot.send_message(
+    title = await chatTitles.get_or_load(game.id, load_title)
+
+    # announce the game in private chat before anything changes, so a player the bot
+    # cannot reach stops the start instead of a game missing a role
+    unreachable: list[Player] = []
+    for player in _humans(game.players):
+        try:
+            _ = await _private_bot(context, player.userid).send_message(
                 chat_id=player.userid,
-                text=f"Avalon game in group {chat.title} is starting!\n",
+                text=_t(player.userid, "start.group", title=title),
             )
+        except (BadRequest, Forbidden) as e:
+            logger.error(f"Error with private message: {e}")
+            reachableUsers.mark_unreachable(player.userid)
+            unreachable.append(player)
+
+    if len(unreachable) > 0:
+        raise ValueError(
+            _t(game.id, "error.unreachable", players=", ".join(str(p) for p in unreachable))
+        )
 
-        for player in game.players:
-            text = f"Your role is: {player.role}.\n"  # now role can't be None
+    game.start_game()
+
+    knowledge = game.night_knowledge()
+
+    for player in game.players:
+        if isinstance(player, Agent):
+            player.see(knowledge[player])
+
+    try:
+        for player in _humans(game.players):
+            text = _t(player.userid, "start.role", role=player.role)  # now role can't be None
 
             text += player.role.description()  # role description
             text += "\n\n"
 
-            if not player.is_good() and player.role != ROLE.OBERON:
-                text += f"Your teammates are: {', '.join(str(p) for p in game.evil_list() if p != player)}.\n"
-
-            if player.role == ROLE.MERLIN:
-                hidden = game.roles_to_players({ ROLE.MORDRED })
-                seekable = [
-                    x
-                    for x in game.evil_list()
-                    if x not in hidden
-                ]
-
-                text += f"Evil team is composed of: {', '.join(str(p) for p in seekable)}.\n"
-
-                if len(hidden) > 0:
-                    text += f"But be careful about the hidden presence of {'and '.join(str(r) for r in set(game.special_roles) & set(hidden))}!\n"
-            elif player.role == ROLE.PERCIVAL:
-                merlins = game.roles_to_players({ROLE.MERLIN, ROLE.MORGANA})
-                text += "You can see Merlin"
-                if len(merlins) > 1:
-                    text += " and Morgana, but you don't know who is who"
-                text += f": {', '.join(str(p) for p in merlins)}.\n"
-
-            _ = await context.bot.send_message(
+            text += _night_knowledge_text(player, knowledge[player], game)
+
+            _ = await _private_bot(context, player.userid).send_message(
                 chat_id=player.userid,
                 text=text,
                 parse_mode="HTML",
             )
-    except BadRequest as e:
+            reachableUsers.mark_reachable(player.userid)
+    except (BadRequest, Forbidden) as e:
+        # the player blocked the bot since the announcement above
         logger.error(f"Error with private message: {e}")
-        _ = await context.bot.send_message(
-            chat_id=game.id,
-            text="Not all players started the bot in private! Game cannot start yet",
+        reachableUsers.mark_unreachable(player.userid)  # pyright: ignore[reportPossiblyUnboundVariable]
+        _ = await _announce(
+            context,
+            game,
+            text=_t(game.id, "start.unreachable"),
         )
 
-    info_txt = (
-        f"Game started with {len(game.players)} players.\n"
-        f"Number of evil players: {len(game.evil_list())}\n"
-        f"Number of good players: {len(game.players) - len(game.evil_list())}\n"
+    info_txt = _t(
+        game.id,
+        "start.info",
+        players=len(game.players),
+        evils=len(game.evil_list()),
+        goods=len(game.players) - len(game.evil_list()),
     )
 
-    info_txt += "Special roles:\n"
+    info_txt += _t(game.id, "start.special_roles")
     info_txt += "\n".join(str(role) for role in game.special_roles)
 
-    info_txt += "\n\nTeam sizes for turns:\n"
+    info_txt += _t(game.id, "start.team_sizes")
     info_txt += "\n".join(
-        f"Turn {i + 1}: {x} players" for i, x in enumerate(game.team_sizes)
+        _t(game.id, "start.team_size", turn=i + 1, size=x) for i, x in enumerate(game.team_sizes)
     )
 
     if len(game.players) >= 7:
-        info_txt += "Remember that fourth mission is special, you can make it successful even with a negative vote!\n"
+        info_txt += _t(game.id, "start.special_mission")
 
-    _ = await context.bot.send_message(
-        chat_id=game.id,
+    info_txt += _t(game.id, "start.spectate", code=spectatorFeed.issue_code(game.key))
+
+    _ = await _announce(
+        context,
+        game,
         text=info_txt,
     )
 
     await _routine_pre_team_building(context, game)
 
 
+def _night_knowledge_text(
+    player: Player, seen: dict[Appearance, list[Player]], game: Game
+) -> str:
+    """
+    Describe what the player learns during the night phase.
+    :param player: the player receiving the description
+    :param seen: the players seen, grouped by how they appear
+    :param game: the game the player is in
+    :return: the text to append to the role message
+    """
+    text = ""
+    chat_id = player.userid
+
+    if teammates := seen.get(Appearance.TEAMMATE):
+        text += _t(chat_id, "night.teammates", players=", ".join(str(p) for p in teammates))
+
+    if evils := seen.get(Appearance.EVIL):
+        text += _t(chat_id, "night.evils", players=", ".join(str(p) for p in evils))
+
+        # evil roles in play that this role cannot see
+        hidden = [
+            r
+            for r in game.special_roles
+            if not r.is_good and r not in player.role.visibility  # pyright: ignore[reportOptionalMemberAccess]
+        ]
+        if len(hidden) > 0:
+            roles = _t(chat_id, "night.hidden_join").join(str(r) for r in hidden)
+            text += _t(chat_id, "night.hidden", roles=roles)
+
+    if merlins := seen.get(Appearance.MERLIN):
+        text += _t(
+            chat_id,
+            "night.merlin_morgana" if len(merlins) > 1 else "night.merlin",
+            players=", ".join(str(p) for p in merlins),
+        )
+
+    return text
+
+
 async def _routine_pre_team_building(context: ContextTypes.DEFAULT_TYPE, game: Game):
     """
     Routine to prepare the voting phase of the game (i.e. sending the poll to the team leader).
@@ -332,60 +1408,73 @@ async def _routine_pre_team_building(context: ContextTypes.DEFAULT_TYPE, game: G
     # 0 indexed turn, so +1 for readable format
     human_turn = game.turn + 1
 
-    text = (
-        f"Turn {human_turn} has started!\n"
-        f"Next leaders will be: {', '.join(str(p) for p in game.players[game.leader_idx + 1 :] + game.players[: game.leader_idx])}\n"
-        # check for next turns
-        f"{game.players[game.leader_idx].mention()} is the team leader for this round.\n"
-        "Wait for leader's team proposal.\n"
-    )
-
-    text += (
-        f"Next team sizes: {', '.join(str(x) for x in game.team_sizes[human_turn:])}\n\n"
-        if human_turn < len(game.team_sizes)
-        else "\n"
+    text = _t(
+        game.id,
+        "turn.started",
+        turn=human_turn,
+        leader=game.players[game.leader_idx].mention(),
     )
 
     if game.is_special_turn():
-        text += "⚠️ This is a special mission, you can make it succesful even with a negative vote!\n"
+        text += _t(game.id, "turn.special_mission")
 
-    _ = await context.bot.send_message(
-        chat_id=game.id,
+    _ = await _announce(
+        context,
+        game,
         text=text,
         parse_mode="HTML",
     )
+    _broadcast(context, game, text, ParseMode.HTML)
+
+    # leader order and team sizes are on the board, edited after the announcements to merge them
+    await _refresh_scoreboard(context, game)
+
+    if isinstance(leader := game.players[game.leader_idx], Agent):
+        game.create_team(leader.propose_team(game))
+
+        _ = await _announce(
+            context,
+            game,
+            text=_t(game.id, "team.proposed", players=", ".join(str(p) for p in game.team)),
+        )
+
+        await _send_public_decision_message(game.players, context, game)
+        return
 
     _ = await _send_selection_poll(
         context,
-        game.id,
-        game.players[game.leader_idx].userid,
+        game.key,
+        leader.userid,
         [str(x) for x in game.players],
         # turn - 1 cause of 0-indexing
-        f"Leader, select a team of {game.team_sizes[game.turn]} players",
+        _t(leader.userid, "team.select", size=game.team_sizes[game.turn]),
         POLLTYPE.REGULAR,
         None,
+        UPDATE.TEAM_POLL,
     )
 
 
 async def _send_selection_poll(
     context: ContextTypes.DEFAULT_TYPE,
-    game_id: int,
+    key: GameKey,
     recipient: int,
     opts_str: list[str],
     poll_msg: str,
     poll_type: POLLTYPE,
     correct_opt_id: int | None,
+    event: UPDATE,
     are_multiple_answers: bool = True,
 ) -> Message:
     """
     Send a poll to the recipient with the given options.
     :param context: the context of the bot
-    :param game: the game object
+    :param key: the key of the game
     :param recipient: the recipient of the poll (the team leader)
     :param people_name: the names of the players to be included in the poll
     :param poll_msg: the message to be sent with the poll
     :param poll_type: the type of the poll (regular or quiz)
     :param correct_opt_id: the index of the correct option (if any, for quiz polls)
+    :param event: the event dispatched when the poll is answered
     :param are_multiple_answers: whether the poll allows multiple answers
     """
 
@@ -401,19 +1490,18 @@ async def _send_selection_poll(
     if poll_type == "quiz" and correct_opt_id is not None:
         poll_kwargs["correct_option_id"] = correct_opt_id
 
-    msg = await context.bot.send_poll(**poll_kwargs)  # pyright: ignore[reportArgumentType]
+    msg = await _private_bot(context, recipient).send_poll(**poll_kwargs)  # pyright: ignore[reportArgumentType]
 
-    payload = {
-        msg.poll.id: (msg.poll, msg.message_id, game_id),  # pyright: ignore[reportOptionalMemberAccess]
-    }
-    context.bot_data.update(payload)
+    activePolls[msg.poll.id] = (event, msg.message_id, key)  # pyright: ignore[reportOptionalMemberAccess]
 
     return msg
 
 
+@dispatcher.register(UPDATE.ROLES_POLL, PHASE.LOBBY)
 async def handle_select_special_roles(
     aswer_roles: tuple[int, ...],
     message_id: int,
+    update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     game: Game,
 ) -> None:
@@ -426,25 +1514,33 @@ async def handle_select_special_roles(
         selected_roles = []
     else:
         # consider the shift in the options
-        selected_roles = [list(ROLE)[i - 1] for i in aswer_roles]
+        selected_roles = [SELECTABLE_ROLES[i - 1] for i in aswer_roles]
 
     game.set_special_roles(selected_roles)
 
-    _ = await context.bot.send_message(
-        chat_id=game.id,
-        text=f"Special roles set: {', '.join(str(r) for r in game.special_roles)}.\n",
+    _ = await _announce(
+        context,
+        game,
+        text=_t(
+            game.id,
+            "game.roles_set",
+            roles=", ".join(str(r) for r in game.special_roles),
+            required=game.required_players,
+        ),
     )
 
     # not necessary to stop the poll
-    _ = await context.bot.delete_message(
+    _ = await _private_bot(context, game.host.userid).delete_message(
         chat_id=game.host.userid,
         message_id=message_id,
     )
 
 
+@dispatcher.register(UPDATE.HOST_POLL, *(p for p in PHASE if p != PHASE.GAME_OVER))
 async def handle_pass_host_choice(
     answer: tuple[int, ...],
     message_id: int,
+    update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     game: Game,
 ) -> None:
@@ -453,7 +1549,7 @@ async def handle_pass_host_choice(
     """
     # delete the original message with the poll
     # not necessary to stop the poll
-    _ = await context.bot.delete_message(
+    _ = await _private_bot(context, game.host.userid).delete_message(
         chat_id=game.host.userid,
         message_id=message_id,
     )
@@ -467,20 +1563,23 @@ async def _routine_pass_host(
     """
     Routine to pass the game host role to a new player.
     """
-    candidates = [x for x in game.players if x != game.host]
+    candidates = [x for x in _humans(game.players) if x != game.host]
 
     game.pass_host(candidates[new_host_idx])
 
-    _ = await context.bot.send_message(
-        chat_id=game.id,
-        text=f"{game.host.mention()} is the new host.",
+    _ = await _announce(
+        context,
+        game,
+        text=_t(game.id, "game.new_host", host=game.host.mention()),
         parse_mode="HTML",
     )
 
 
+@dispatcher.register(UPDATE.TEAM_POLL, PHASE.BUILD_TEAM)
 async def handle_build_team_answer(
     answer_team: tuple[int, ...],
     message_id: int,
+    update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     game: Game,
 ) -> None:
@@ -491,7 +1590,7 @@ async def handle_build_team_answer(
 
     # TODO: replace message with warning
     # stop the poll if the team size is correct
-    _ = await context.bot.stop_poll(
+    _ = await _private_bot(context, leader_userid).stop_poll(
         chat_id=leader_userid,
         message_id=message_id,
         reply_markup=None,
@@ -501,20 +1600,22 @@ async def handle_build_team_answer(
     game.create_team([game.players[i] for i in answer_team])
 
     # close poll and update game state
-    _ = await context.bot.send_message(
-        text="Let's see if the others approve the team... go back to the game.",
+    _ = await _private_bot(context, leader_userid).send_message(
+        text=_t(leader_userid, "team.wait"),
         chat_id=leader_userid,
     )
 
     # forward the poll to the group chat
-    _ = await context.bot.forward_message(
-        chat_id=game.id,
-        from_chat_id=leader_userid,
-        message_id=message_id,
+    await _forward_poll_to_group(
+        context,
+        game,
+        leader_userid,
+        message_id,
+        _t(game.id, "team.proposed", players=", ".join(str(p) for p in game.team)),
     )
 
     # delete the original message with the poll
-    _ = await context.bot.delete_message(
+    _ = await _private_bot(context, leader_userid).delete_message(
         chat_id=leader_userid,
         message_id=message_id,
     )
@@ -524,6 +1625,32 @@ async def handle_build_team_answer(
     await _send_public_decision_message(game.players, context, game)
 
 
+async def _forward_poll_to_group(
+    context: ContextTypes.DEFAULT_TYPE,
+    game: Game,
+    user_id: int,
+    message_id: int,
+    fallback_text: str,
+) -> None:
+    """
+    Show a poll answered in private chat in the group chat.
+    A bot can only forward from chats it is in, so when the user's bot is not the group's one
+    the answer is described by the group's bot instead.
+    """
+    private_bot = _private_bot(context, user_id)
+    group_bot = _group_bot(context, game.id)
+
+    if private_bot is group_bot:
+        _ = await group_bot.forward_message(
+            chat_id=game.id,
+            message_thread_id=game.thread_id,
+            from_chat_id=user_id,
+            message_id=message_id,
+        )
+    else:
+        _ = await _announce(context, game, fallback_text)
+
+
 async def _send_public_decision_message(
     people: list[Player],
     context: ContextTypes.DEFAULT_TYPE,
@@ -531,22 +1658,31 @@ async def _send_public_decision_message(
 ) -> None:
     """
     Send a public decision message to the group chat with inline buttons for approval or rejection.
+    Agents among the voters vote right away, without buttons.
     """
+    for agent in people:
+        if isinstance(agent, Agent):
+            _ = game.add_player_vote(agent, agent.decide(game))
+
+    if len(people := _humans(people)) == 0:
+        await dispatcher.resolve(game.phase, UPDATE.VOTES_COMPLETE)(context, game)
+        return
 
     keyboard = [
         [
             InlineKeyboardButton(
-                "Approve", callback_data=json.dumps({"vote": "yes", "gid": game.id})
+                _t(game.id, "vote.approve"), callback_data=json.dumps({"vote": "yes", "gid": game.id, "tid": game.thread_id})
             ),
             InlineKeyboardButton(
-                "Reject", callback_data=json.dumps({"vote": "no", "gid": game.id})
+                _t(game.id, "vote.reject"), callback_data=json.dumps({"vote": "no", "gid": game.id, "tid": game.thread_id})
             ),
         ]
     ]
 
-    _ = await context.bot.send_message(
-        chat_id=game.id,
-        text=f"Needs to vote: {', '.join(p.mention() for p in people)}\n",
+    _ = await _announce(
+        context,
+        game,
+        text=_t(game.id, "vote.needed", players=", ".join(p.mention() for p in people)),
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode="HTML",
     )
@@ -556,20 +1692,22 @@ async def _routine_pre_mission_phase(context: ContextTypes.DEFAULT_TYPE, game: G
     """
     Routine to prepare the mission phase of the game.
     """
-    text = (
-        "The team has been approved! Team, go vote for the success of the mission.\n"
-        "Do you want to make the mission successful?\n"
-        f"Missions so far: {_bool_to_emoji([x for x in game.missions if x is not None])}\n"
+    text = _t(
+        game.id,
+        "team.approved",
+        missions=_bool_to_emoji([x for x in game.missions if x is not None]),
     )
 
     if game.is_special_turn():
-        text += "⚠️ This is a special mission, you can make it succesful even with a negative vote!\n"
+        text += _t(game.id, "turn.special_mission")
 
     # notify players in the group about the mission phase
-    _ = await context.bot.send_message(
-        chat_id=game.id,
+    _ = await _announce(
+        context,
+        game,
         text=text,
     )
+    await _refresh_scoreboard(context, game)
 
     await _send_public_decision_message(game.team, context, game)
 
@@ -583,7 +1721,8 @@ async def button_vote_handler(
         data = json.loads(query.data)
         vote = data.get("vote")
 
-        game = existingGames[data.get("gid")]
+        # buttons sent before topics were supported have no "tid"
+        game = existingGames[(data.get("gid"), data.get("tid"))]
 
         player = game.lookup_player(query.from_user.id)
 
@@ -593,18 +1732,19 @@ async def button_vote_handler(
             vote == "yes",
         )
 
-        _ = await query.answer(text="Vote received", show_alert=False)
+        _ = await query.answer(text=_t(game.id, "vote.received"), show_alert=False)
 
         # repeat the process until the voting is succesful
         if len(missing_voters) == 0:
             _ = await query.delete_message()
-            if game.phase == PHASE.BUILD_TEAM:
-                await _routine_post_team_approval_phase(context, game)
-            elif game.phase == PHASE.QUEST:
-                await _routine_post_mission_phase(context, game)
+            await dispatcher.resolve(game.phase, UPDATE.VOTES_COMPLETE)(context, game)
         else:
             _ = await query.edit_message_text(
-                text=f"People missing: {', '.join(p.mention() for p in missing_voters)}.\n",
+                text=_t(
+                    game.id,
+                    "vote.missing",
+                    players=", ".join(p.mention() for p in missing_voters),
+                ),
                 # remove the inline keyboard if the voting is ended
                 reply_markup=buttons,
                 parse_mode="HTML",
@@ -613,20 +1753,30 @@ async def button_vote_handler(
     except json.JSONDecodeError as e:
         logger.error(f"Error in button_vote_handler: {e}")
         _ = await query.answer(
-            text="An error occurred while processing your vote. Please try again later.",
+            text=_t(query.from_user.id, "error.vote"),
             show_alert=True,
         )
     except ValueError as e:
         logger.error(f"ValueError in button_vote_handler: {e}")
-        _ = await query.answer(text=str(e), show_alert=True)
+        _ = await query.answer(
+            text=translator.explain(query.from_user.id, e),
+            show_alert=True,
+        )
     except KeyError as e:
         logger.error(f"KeyError in button_vote_handler: {e}")
         _ = await query.answer(
-            text="There is no game in this group. Please create one first.",
+            text=_t(query.from_user.id, "error.no_game"),
             show_alert=True,
         )
+    except TelegramError as e:
+        # e.g. a private poll through a bot the player never started, once the vote is counted:
+        # the group is told, rather than the game waiting for a poll nobody got
+        logger.error(f"TelegramError in button_vote_handler: {e}")
+        if (game := existingGames.get((data.get("gid"), data.get("tid")))) is not None:  # pyright: ignore[reportPossiblyUnboundVariable]
+            _ = await _announce(context, game, text=_t(game.id, "error.private_failed", error=e))
 
 
+@dispatcher.register(UPDATE.VOTES_COMPLETE, PHASE.BUILD_TEAM)
 async def _routine_post_team_approval_phase(
     context: ContextTypes.DEFAULT_TYPE, game: Game
 ) -> None:
@@ -639,23 +1789,27 @@ async def _routine_post_team_approval_phase(
     # this updates the game state
     approval_result = game.update_after_team_decision()
 
-    text = (
-        "The team was "
-        f"{'approved' if approval_result else f'rejected (Times rejected: {game.rejection_count})'}!\n"
-        f"Votes:\n{_bool_to_emoji(list(votes.values()), list(votes.keys()))}\n"
+    for agent in game.players:
+        if isinstance(agent, Agent):
+            agent.observe_votes(game.team, votes)
+
+    text = _t(
+        game.id,
+        "team.result_approved" if approval_result else "team.result_rejected",
+        rejections=game.rejection_count,
+        votes=_bool_to_emoji(list(votes.values()), list(votes.keys())),
     )
 
     if 0 < game.rejection_count < MAX_TEAM_REJECTS:
-        text += (
-            "Vote will be repeated again.\n"
-            f"⚠️ If the team is rejected {MAX_TEAM_REJECTS} times in a row, evil wins!\n"
-        )
+        text += _t(game.id, "team.rejections_warning", max=MAX_TEAM_REJECTS)
 
     # send the result to the group chat
-    _ = await context.bot.send_message(
-        chat_id=game.id,
+    _ = await _announce(
+        context,
+        game,
         text=text,
     )
+    _broadcast(context, game, text)
 
     if game.winner is not None:
         await _routine_end_game(context, game)
@@ -668,6 +1822,7 @@ async def _routine_post_team_approval_phase(
             await _routine_pre_team_building(context, game)
 
 
+@dispatcher.register(UPDATE.VOTES_COMPLETE, PHASE.QUEST)
 async def _routine_post_mission_phase(
     context: ContextTypes.DEFAULT_TYPE, game: Game
 ) -> None:
@@ -678,16 +1833,24 @@ async def _routine_post_mission_phase(
     votes = game.votes.copy()
 
     result = game.update_after_mission()
-    text = (
-        f"The mission was {'successful' if result else 'failed'}!\n"
-        f"Votes: {_bool_to_emoji(list(votes.values()))}\n"
-        f"Missions results: {_bool_to_emoji([x for x in game.missions if x is not None])}\n"
+
+    for agent in game.players:
+        if isinstance(agent, Agent):
+            agent.observe_mission(game.team, list(votes.values()).count(False))
+
+    text = _t(
+        game.id,
+        "mission.successful" if result else "mission.failed",
+        votes=_bool_to_emoji(list(votes.values())),
+        missions=_bool_to_emoji([x for x in game.missions if x is not None]),
     )
     # send the result to the group chat
-    _ = await context.bot.send_message(
-        chat_id=game.id,
+    _ = await _announce(
+        context,
+        game,
         text=text,
     )
+    _broadcast(context, game, text)
 
     if game.winner is None:
         # repeat the team building phase
@@ -697,10 +1860,13 @@ async def _routine_post_mission_phase(
         await _routine_last_chance_phase(context, game)
     else:
         # good lose immediately
-        _ = await context.bot.send_message(
-            chat_id=game.id,
-            text="3 mission failed!",
+        text = _t(game.id, "mission.three_failed")
+        _ = await _announce(
+            context,
+            game,
+            text=text,
         )
+        _broadcast(context, game, text)
 
         await _routine_end_game(context, game)
 
@@ -712,28 +1878,45 @@ async def _routine_last_chance_phase(
     Routine to prepare the last chance phase of the game.
     """
     # notify players in the group about the last chance phase
-    _ = await context.bot.send_message(
-        chat_id=game.id,
-        text="The evil team has a last chance to win the game. Assassin, choose a player to kill! If you choose Merlin, you win the game.",
+    _ = await _announce(
+        context,
+        game,
+        text=_t(game.id, "assassin.last_chance"),
     )
+    await _refresh_scoreboard(context, game)
 
     goods = [x for x in game.players if x.is_good()]
     merlin_idx = [x.role for x in goods].index(ROLE.MERLIN)
-    assassin_tg_id = game.players[
-        [x.role for x in game.players].index(ROLE.ASSASSIN)
-    ].userid
+    assassin = game.players[[x.role for x in game.players].index(ROLE.ASSASSIN)]
+
+    if isinstance(assassin, Agent):
+        assassin_guess = assassin.assassinate(goods)
+        game.update_winner_after_assassination(assassin_guess)
+
+        _ = await _announce(
+            context,
+            game,
+            text=_t(game.id, "assassin.chose", player=goods[assassin_guess]),
+        )
+
+        await _routine_end_game(context, game)
+        return
+
+    assassin_tg_id = assassin.userid
 
     _ = await _send_selection_poll(
         context,
-        game.id,
+        game.key,
         assassin_tg_id,
         [str(x) for x in goods],
-        "Assassin, try to kill Merlin... who you want to kill?",
+        _t(assassin_tg_id, "assassin.select"),
         POLLTYPE.QUIZ,
         merlin_idx,
+        UPDATE.ASSASSIN_POLL,
     )
 
 
+@dispatcher.register(UPDATE.ASSASSIN_POLL, PHASE.LAST_CHANCE)
 async def handle_assassin_choice(
     answer: tuple[int, ...],
     msg_id: int,
@@ -744,7 +1927,7 @@ async def handle_assassin_choice(
     if not (assassin := update.effective_user):
         return
 
-    _ = await context.bot.stop_poll(
+    _ = await _private_bot(context, assassin.id).stop_poll(
         chat_id=assassin.id,
         message_id=msg_id,
         reply_markup=None,
@@ -755,37 +1938,120 @@ async def handle_assassin_choice(
 
     game.update_winner_after_assassination(assassin_guess)
 
-    _ = await assassin.forward_messages_to(
-        game.id,
-        [msg_id],  # requires sequence of messageIDs
+    goods = [p for p in game.players if p.is_good()]
+    await _forward_poll_to_group(
+        context,
+        game,
+        assassin.id,
+        msg_id,
+        _t(game.id, "assassin.chose", player=goods[assassin_guess]),
     )
 
     await _routine_end_game(context, game)
 
 
 async def _routine_end_game(context: ContextTypes.DEFAULT_TYPE, game: Game) -> None:
-    _ = await context.bot.send_message(
-        chat_id=game.id,
-        text=f"{game.winner and 'Good' or 'Evil'} team wins the game!",
+    winner_text = _t(game.id, "end.good_wins" if game.winner else "end.evil_wins")
+
+    _ = await _announce(
+        context,
+        game,
+        text=winner_text,
     )
 
     # send the final game state to the group chat
-    final_state = (
-        f"Let's reveal the roles!\n"
-        "Evil team:\n"
-        f"{', '.join(f'{p.role}: {str(p)}' for p in game.players if not p.is_good())}\n\n"
-        "Good team:\n"
-        f"{', '.join(f'{p.role}: {str(p)}' for p in game.players if p.is_good())}\n\n"
-        f"Missions: {_bool_to_emoji([x for x in game.missions if x is not None])}\n"
+    final_state = _t(
+        game.id,
+        "end.reveal",
+        evils=", ".join(
+            _t(game.id, "end.role", role=p.role, player=p) for p in game.players if not p.is_good()
+        ),
+        goods=", ".join(
+            _t(game.id, "end.role", role=p.role, player=p) for p in game.players if p.is_good()
+        ),
+        missions=_bool_to_emoji([x for x in game.missions if x is not None]),
     )
 
-    _ = await context.bot.send_message(
-        chat_id=game.id,
+    _ = await _announce(
+        context,
+        game,
         text=final_state,
     )
 
+    # roles are public once the game is over
+    _broadcast(context, game, f"{winner_text}\n{final_state}")
+
+    # the board stays pinned with the result
+    await _refresh_scoreboard(context, game)
+
+    # posted when ready, without holding back the end of the game
+    task = asyncio.create_task(_routine_post_mortem(context, game, GameRecord(game)))
+    postMortems.add(task)
+    task.add_done_callback(postMortems.discard)
+
     # cleanup the game
-    del existingGames[game.id]
+    _remove_game(game.key)
+
+    # score the table, if part of a tournament
+    if (tournament := tournaments.get(game.id)) is not None and tournament.record(game):
+        await _routine_end_round(context, tournament)
+
+
+async def _routine_post_mortem(context: ContextTypes.DEFAULT_TYPE, game: Game, record: GameRecord) -> None:
+    """
+    Analyse the votes of a finished game in a worker process, and post the summary to its group.
+    """
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(analysisPool, analyse, record)
+    except (BrokenExecutor, RuntimeError) as e:
+        # e.g. the pool is shut down while stopping
+        logger.error(f"Error analysing the game: {e}")
+        return
+
+    text = _post_mortem_text(game.id, record, result)
+
+    # sent after the update is handled, so it needs the bot behind the outbox
+    bot = _group_bot(context, game.id)
+    bot = bot.wrapped if isinstance(bot, Outbox) else bot
+
+    try:
+        _ = await bot.send_message(chat_id=game.id, message_thread_id=game.thread_id, text=text)
+    except TelegramError as e:
+        logger.error(f"Error posting the analysis of the game: {e}")
+        return
+
+    _broadcast(context, game, text)
+
+
+def _post_mortem_text(chat_id: int, record: GameRecord, result: PostMortem) -> str:
+    """
+    Summary of the analysis of a game: the players voting most and least alike, how often teams
+    were approved by the number of evils in them, and who proposed or approved the failed missions.
+    """
+    lines = [_t(chat_id, "analysis.title")]
+
+    if pairs := result.pairs():
+        for key, (agreement, i, j) in (("analysis.alike", pairs[0]), ("analysis.unlike", pairs[-1])):
+            lines.append(
+                _t(chat_id, key, first=record.names[i], second=record.names[j], share=round(agreement * 100))
+            )
+
+    # e.g. 😇 3/4, 😈 1/3, 😈😈 0/2
+    rates = ", ".join(
+        f"{'😈' * evils or '😇'} {yes}/{total}" for evils, (yes, total) in sorted(result.approval.items())
+    )
+    lines.append(_t(chat_id, "analysis.approval", rates=rates))
+
+    def blamed(counts: list[int]) -> str:
+        ranked = sorted(zip(counts, record.names), key=lambda x: -x[0])
+        return ", ".join(name if n == 1 else f"{name} ×{n}" for n, name in ranked if n)
+
+    if any(result.proposed):
+        lines.append(
+            _t(chat_id, "analysis.failed", proposed=blamed(result.proposed), approved=blamed(result.approved))
+        )
+
+    return "\n".join(lines)
 
 
 def _bool_to_emoji(bs: list[bool], players: list[Player] | None = None) -> str:
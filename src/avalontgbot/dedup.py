@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from telegram import Update
+
+from .constants import DEDUP_WINDOW
+
+
+class UpdateDeduplicator:
+    """
+    Remembers the most recent updates to drop the ones Telegram delivers twice.
+    An update is a duplicate if its update id or callback query id was already seen within the window.
+    Poll answers only have the update id: the same answer can come again after a retracted vote.
+    """
+
+    def __init__(self, window: int = DEDUP_WINDOW):
+        """
+        :param window: number of keys remembered, the oldest are forgotten first
+        """
+        self._window: int = window
+        self._seen: OrderedDict[Hashable, None] = OrderedDict()
+        # number of duplicates dropped so far
+        self.suppressed: int = 0
+
+    def is_duplicate(self, update: Update) -> bool:
+        """
+        Check the update against the recent ones, and remember it.
+        :param update: the incoming update
+        :return: True if the update was already seen, False otherwise
+        """
+        keys = _identity(update)
+
+        if any(k in self._seen for k in keys):
+            self.suppressed += 1
+            return True
+
+        for k in keys:
+            self._seen[k] = None
+
+        while len(self._seen) > self._window:
+            _ = self._seen.popitem(last=False)
+
+        return False
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+def _identity(update: Update) -> list[Hashable]:
+    """
+    Collect the keys identifying an update.
+    """
+    keys: list[Hashable] = [("update", update.update_id)]
+
+    if (query := update.callback_query) is not None:
+        keys.append(("callback", query.id))
+
+    return keys
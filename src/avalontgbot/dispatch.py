@@ -0,0 +1,70 @@
+from collections.abc import Callable
+from enum import Enum, auto
+from typing import Any
+
+from .gamephase import GamePhase as PHASE
+from .i18n import CatalogError
+
+
+class UpdateEvent(Enum):
+    """
+    Enum representing the kinds of incoming updates that drive a game.
+    Poll events are stored together with the poll, so an answer can be routed
+    without inspecting the poll itself.
+    """
+    VOTES_COMPLETE = auto()
+    ROLES_POLL = auto()
+    HOST_POLL = auto()
+    TEAM_POLL = auto()
+    ASSASSIN_POLL = auto()
+
+    def __str__(self):
+        return self.name
+
+
+class Dispatcher:
+    """
+    Registry of handlers keyed by (phase, event).
+    Handlers are registered once at import time, so resolving one is a single
+    dictionary lookup regardless of how many rule variants are registered.
+    """
+
+    def __init__(self):
+        self._handlers: dict[tuple[PHASE, UpdateEvent], Callable[..., Any]] = {}
+
+    def register(
+        self, event: UpdateEvent, *phases: PHASE
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Decorator registering a handler for the event in the given phases.
+        :param event: the event handled
+        :param phases: the phases in which the event is allowed
+        :return: the decorator, which returns the handler unchanged
+        """
+
+        def decorator(handler: Callable[..., Any]) -> Callable[..., Any]:
+            for phase in phases:
+                if (phase, event) in self._handlers:
+                    raise ValueError(f"Handler for {event} during {phase} already registered.")
+
+                self._handlers[(phase, event)] = handler
+
+            return handler
+
+        return decorator
+
+    def resolve(self, phase: PHASE, event: UpdateEvent) -> Callable[..., Any]:
+        """
+        Looks up the handler for the event in the given phase.
+        :param phase: the current phase of the game
+        :param event: the event received
+        :return: the registered handler
+        :raises CatalogError: if the event is not allowed in the current phase
+        """
+        try:
+            return self._handlers[(phase, event)]
+        except KeyError:
+            raise CatalogError("error.not_allowed") from None
+
+    def __contains__(self, key: tuple[PHASE, UpdateEvent]) -> bool:
+        return key in self._handlers
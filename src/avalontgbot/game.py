@@ -1,31 +1,61 @@
 import random
 from .constants import (
+    LEGAL_SETUPS,
     MAX_PLAYERS,
     MAX_TEAM_REJECTS,
-    MIN_PLAYERS,
     PLAYERS_TO_RULES,
     MANDATORY_ROLES,
+    SETUP_MIN_PLAYERS,
 )
+from .role import Appearance
 from .role import Role as ROLE
+from .gamephase import GameEvent as EVENT
 from .gamephase import GamePhase as PHASE
-from collections import Counter
+from .gamephase import next_phase
+from .i18n import CatalogError
+from collections import Counter, defaultdict
 from .player import Player
 
+# (group id, forum topic id or None), identifies a game
+GameKey = tuple[int, int | None]
+
+
+class Election:
+    """
+    A vote on a proposed team, kept for the analysis at the end of the game.
+    """
+
+    def __init__(self, turn: int, leader: int, team: list[int], votes: dict[int, bool]):
+        """
+        :param turn: index of the mission the team was proposed for
+        :param leader: user id of the player who proposed the team
+        :param team: user ids of the players in the team
+        :param votes: user id => True if the player approved the team
+        """
+        self.turn: int = turn
+        self.leader: int = leader
+        self.team: list[int] = team
+        self.votes: dict[int, bool] = votes
+
 
 class Game:
-    def __init__(self, creator: Player, id: int):
+    def __init__(self, creator: Player, id: int, thread_id: int | None = None):
         """
         Initialize the Game instance.
         :param id: Unique identifier for the game, takes the group ID.
         :param creator: Player object representing the creator of the game.
+        :param thread_id: ID of the forum topic the game is played in, if any.
         """
 
         self._id: int = id
+        self._thread_id: int | None = thread_id
         self.turn: int = -1
         self.missions: list[bool | None] = [None, None, None, None, None]
         self.winner: bool | None = None
         self.rejection_count: int = 0
         self.votes: dict[Player, bool] = {}
+        # every vote on a team, in order
+        self.elections: list[Election] = []
         self.host: Player = creator
         self._players: list[Player] = [creator]
         self.team: list[Player] = []
@@ -40,7 +70,7 @@ class Game:
         :param player: Player object to be added.
         """
         if len(self.players) >= MAX_PLAYERS:
-            raise ValueError("Maximum number of players reached.")
+            raise CatalogError("error.full")
 
         if player in self.players:
             index = self.players.index(player)
@@ -48,11 +78,11 @@ class Game:
                 # player is already in the game, but offline, so set online status to True
                 self.players[index].is_online = True
             else:
-                raise ValueError("Player is already in the game and online.")
+                raise CatalogError("error.already_joined")
         else:
             # player is not in the game, so add them if game hasn't started yet
             if self.is_ongoing:
-                raise ValueError("Cannot join the game after it has started.")
+                raise CatalogError("error.join_ongoing")
 
             self.players.append(player)
 
@@ -67,7 +97,7 @@ class Game:
         :return: True there is at least one player left/online in the game, False otherwise.
         """
         if player not in self.players:
-            raise ValueError("Player not in game.")
+            raise CatalogError("error.not_in_game")
 
         index = self.players.index(player)
         if self.is_ongoing:
@@ -89,9 +119,9 @@ class Game:
         :param player: Player object to whom the host role is passed.
         """
         if player not in self.players:
-            raise ValueError("Player not in game.")
+            raise CatalogError("error.not_in_game")
         elif player == self.host:
-            raise ValueError("You are already the host of the game!")
+            raise CatalogError("error.already_host")
 
         self.host = player
 
@@ -114,6 +144,8 @@ class Game:
         goods = [p for p in self.players if p.is_good()]
         choice = goods[choice_goods_idx]
 
+        self.__change_phase(EVENT.ASSASSINATION)
+
         self.winner = not choice.role == ROLE.MERLIN
 
     def update_after_mission(self) -> bool:
@@ -129,7 +161,12 @@ class Game:
 
         self.__update_winner()
 
-        self.__change_phase()
+        if self.winner is None:
+            self.__change_phase(EVENT.MISSION_COMPLETED)
+        elif self.winner:
+            self.__change_phase(EVENT.MISSIONS_WON)
+        else:
+            self.__change_phase(EVENT.EVIL_WON)
 
         self.votes.clear()  # clear votes for the next phase
 
@@ -142,11 +179,24 @@ class Game:
         """
 
         result = list(self.votes.values()).count(True) > len(self.votes) / 2
+
+        self.elections.append(
+            Election(
+                self.turn,
+                self.players[self.leader_idx].userid,
+                [p.userid for p in self.team],
+                {p.userid: v for p, v in self.votes.items()},
+            )
+        )
+
         self.__setup_new_election(result)
 
         # if rejected 3 times, the game is over
         self.__update_winner()
 
+        if self.winner is False:
+            self.__change_phase(EVENT.EVIL_WON)
+
         return result
 
     def add_player_vote(self, player: Player | None, vote: bool) -> list[Player]:
@@ -160,7 +210,7 @@ class Game:
         voters = [p for p in voters if p not in self.votes]
 
         if player not in voters:
-            raise ValueError("Player not allowed to vote.")
+            raise CatalogError("error.not_voter")
 
         self.votes[player] = vote
 
@@ -175,25 +225,15 @@ class Game:
         current list of special roles.
         :return: True if there are enough players, False otherwise.
         """
-        num_players = len(self.players)
-        num_special = len(self.special_roles)
-        num_good = len([r for r in self.special_roles if r.is_good])
-        num_bad = num_special - num_good
-
-        return (
-            (num_players >= self.__required_players)
-            and (num_players <= MAX_PLAYERS)
-            and (num_good <= PLAYERS_TO_RULES[num_players]["num_goods"])
-            and (num_bad <= num_players - PLAYERS_TO_RULES[num_players]["num_goods"])
-        )
+        return (len(self.players), frozenset(self.special_roles)) in LEGAL_SETUPS
 
     @property
-    def __required_players(self) -> int:
+    def required_players(self) -> int:
         """
         Returns the minimum number of players required for the game based on the special roles.
         :return: Minimum number of players required.
         """
-        return max(MIN_PLAYERS, len(self.special_roles))
+        return SETUP_MIN_PLAYERS[frozenset(self.special_roles)]
 
     def set_special_roles(self, roles: list[ROLE]):
         """
@@ -201,13 +241,15 @@ class Game:
         :param roles: List of ROLE objects representing the special roles.
         """
         if self.phase != PHASE.LOBBY:
-            raise ValueError("Cannot set special roles after the game has started.")
+            raise CatalogError("error.roles_ongoing")
 
         if ROLE.MORGANA in roles and ROLE.PERCIVAL not in roles:
-            raise ValueError("Percival must be included if Morgana is included.")
+            raise CatalogError("error.morgana_without_percival")
 
-        roles_set = set(roles)
-        roles_set.update(MANDATORY_ROLES)
+        roles_set = frozenset(roles).union(MANDATORY_ROLES)
+
+        if roles_set not in SETUP_MIN_PLAYERS:
+            raise CatalogError("error.roles_together", roles=", ".join(str(r) for r in roles_set))
 
         self.special_roles = list(roles_set)
 
@@ -224,25 +266,22 @@ class Game:
         return None
 
     # helpers
-    def __change_phase(self):
+    def __change_phase(self, event: EVENT):
         """
-        Changes the phase of the game based on the current phase.
+        Changes the phase of the game following the transition table.
         Called at the end of each phase.
+        :param event: the event that ended the current phase
+        :raises CatalogError: if the event is not allowed in the current phase
         """
-        if self.phase == PHASE.LOBBY:
-            self.phase = PHASE.BUILD_TEAM
-        elif self.phase == PHASE.BUILD_TEAM:
-            self.phase = PHASE.QUEST
-        elif self.phase == PHASE.QUEST:
-            if self.winner is None:
-                self.phase = PHASE.BUILD_TEAM
-            elif self.winner:
-                self.phase = PHASE.LAST_CHANCE
+        self.phase = next_phase(self.phase, event)
 
     def start_game(self):
         """
         Starts the game by initializing the game state.
         """
+        # reject the start before touching roles if the phase does not allow it
+        _ = next_phase(self.phase, EVENT.START)
+
         num_players = len(self.players)
 
         self.team_sizes = PLAYERS_TO_RULES[num_players]["team_sizes"]
@@ -258,46 +297,23 @@ class Game:
 
         self.turn += 1
         # finally change the phase to TEAM_BUILD
-        self.__change_phase()
+        self.__change_phase(EVENT.START)
 
     def __set_roles(self):
         """
         Assigns roles to players based on the game rules.
         """
-        # shuffle the special roles to ensure randomness
-        random.shuffle(self.special_roles)
-
         num_players = len(self.players)
-        num_special = len(self.special_roles)
-        num_good = PLAYERS_TO_RULES[num_players]["num_goods"]
-
-        if not self.are_enough_players():
-            text = (
-                "Not enough players for the given special roles.\n"
-                f"With {num_players}, include maximum {num_good} good roles"
-                f"and {num_players - num_good} evil roles.\n"
-            )
-            raise ValueError(text)
 
-        num_of_servants = num_good - [x[1] for x in self.special_roles].count(True)
-        num_of_minions = num_players - num_of_servants - num_special
-
-        current_index = 0
-
-        # Assign special roles
-        for i in range(num_special):
-            self.players[current_index].role = self.special_roles[i]
-            current_index += 1
-
-        # Assign servant roles
-        for _ in range(num_of_servants):
-            self.players[current_index].role = ROLE.LSOA
-            current_index += 1
+        if (roles := LEGAL_SETUPS.get((num_players, frozenset(self.special_roles)))) is None:
+            num_good = PLAYERS_TO_RULES[num_players]["num_goods"]
+            raise CatalogError(
+                "error.roles_players", players=num_players, goods=num_good, evils=num_players - num_good
+            )
 
-        # Assign minion roles
-        for _ in range(num_of_minions):
-            self.players[current_index].role = ROLE.MOM
-            current_index += 1
+        # players are shuffled afterwards, so the deck order does not matter
+        for player, role in zip(self.players, roles):
+            player.role = role
 
     def __setup_new_election(self, result: bool):
         """
@@ -308,8 +324,7 @@ class Game:
         self.votes.clear()
 
         # change phase to QUEST if the team was approved, otherwise stay in BUILD_TEAM
-        if result:
-            self.__change_phase()
+        self.__change_phase(EVENT.TEAM_APPROVED if result else EVENT.TEAM_REJECTED)
 
         # if team rejected, increment the rejection count, else reset it
         self.rejection_count = (self.rejection_count + 1) * (not result)
@@ -322,9 +337,7 @@ class Game:
         :param team: List of Player objects representing the team members.
         """
         if len(team) != self.team_sizes[self.turn]:
-            raise ValueError(
-                f"Team size must be {self.team_sizes[self.turn]} for this mission."
-            )
+            raise CatalogError("error.team_size", size=self.team_sizes[self.turn])
 
         self.team = team
 
@@ -357,6 +370,31 @@ class Game:
             if not p.is_good() and (not real or p.role != ROLE.OBERON)
         ]
 
+    def night_knowledge(self) -> dict[Player, dict[Appearance, list[Player]]]:
+        """
+        Computes what every player learns during the night phase, in one pass.
+        :return: for each player, the other players they see grouped by how they appear,
+            in seat order so that the order does not reveal roles.
+        """
+        by_role: dict[ROLE | None, list[Player]] = defaultdict(list)
+        for player in self.players:
+            by_role[player.role].append(player)
+
+        seat = {p: i for i, p in enumerate(self.players)}
+
+        knowledge: dict[Player, dict[Appearance, list[Player]]] = {}
+        for player in self.players:
+            seen: dict[Appearance, list[Player]] = defaultdict(list)
+
+            for role, appearance in player.role.visibility.items():  # pyright: ignore[reportOptionalMemberAccess]
+                seen[appearance].extend(p for p in by_role[role] if p is not player)
+
+            knowledge[player] = {
+                a: sorted(ps, key=seat.__getitem__) for a, ps in seen.items() if ps
+            }
+
+        return knowledge
+
     def roles_to_players(self, roles: set[ROLE]) -> list[Player]:
         """
         Returns a list of players with specific roles.
@@ -382,3 +420,13 @@ class Game:
     @id.setter
     def id(self, value: int):
         self._id = value
+
+    @property
+    def thread_id(self) -> int | None:
+        """The forum topic of the game, None outside forum topics."""
+        return self._thread_id
+
+    @property
+    def key(self) -> GameKey:
+        """The key of the game among the existing ones."""
+        return (self._id, self._thread_id)
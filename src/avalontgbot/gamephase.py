@@ -1,14 +1,60 @@
-from enum import Enum
+from enum import Enum, auto
+
+from .i18n import CatalogError
 
 class GamePhase(Enum):
     """
     Enum representing the different phases of a game.
     """
     LOBBY = 0
-    PREPARATION = 1
     BUILD_TEAM = 2
     QUEST = 3
     LAST_CHANCE = 4
+    GAME_OVER = 5
+
+    def __str__(self):
+        return self.name
+
+
+class GameEvent(Enum):
+    """
+    Enum representing the events that move a game from one phase to another.
+    """
+    START = auto()
+    TEAM_APPROVED = auto()
+    TEAM_REJECTED = auto()
+    MISSION_COMPLETED = auto()
+    MISSIONS_WON = auto()
+    EVIL_WON = auto()
+    ASSASSINATION = auto()
 
     def __str__(self):
         return self.name
+
+
+# every legal (phase, event) pair and the phase it leads to,
+# anything not listed here is an invalid transition
+TRANSITIONS: dict[tuple[GamePhase, GameEvent], GamePhase] = {
+    (GamePhase.LOBBY, GameEvent.START): GamePhase.BUILD_TEAM,
+    (GamePhase.BUILD_TEAM, GameEvent.TEAM_APPROVED): GamePhase.QUEST,
+    (GamePhase.BUILD_TEAM, GameEvent.TEAM_REJECTED): GamePhase.BUILD_TEAM,
+    (GamePhase.BUILD_TEAM, GameEvent.EVIL_WON): GamePhase.GAME_OVER,
+    (GamePhase.QUEST, GameEvent.MISSION_COMPLETED): GamePhase.BUILD_TEAM,
+    (GamePhase.QUEST, GameEvent.MISSIONS_WON): GamePhase.LAST_CHANCE,
+    (GamePhase.QUEST, GameEvent.EVIL_WON): GamePhase.GAME_OVER,
+    (GamePhase.LAST_CHANCE, GameEvent.ASSASSINATION): GamePhase.GAME_OVER,
+}
+
+
+def next_phase(phase: GamePhase, event: GameEvent) -> GamePhase:
+    """
+    Looks up the phase reached when the event happens in the given phase.
+    :param phase: the current phase of the game
+    :param event: the event that happened
+    :return: the next phase
+    :raises CatalogError: if the event is not allowed in the current phase
+    """
+    try:
+        return TRANSITIONS[(phase, event)]
+    except KeyError:
+        raise CatalogError("error.phase", event=event, phase=phase) from None
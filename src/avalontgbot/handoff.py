@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import struct
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from .constants import HANDOFF_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+_TAKEOVER = b"TAKEOVER\n"
+_ACK = b"ACK\n"
+# wall clock time the running process stopped taking updates, and length of its state
+_HEADER = struct.Struct("!dQ")
+
+
+def handoff_socket(bot_id: int) -> Path:
+    """
+    :return: the local socket where the running process of a bot waits for its successor,
+        one per bot so the processes of other bots on the machine never take its games
+    """
+    return Path(tempfile.gettempdir()) / f"avalontgbot-handoff-{bot_id}.sock"
+
+
+class HandoffServer:
+    """
+    Hands the games of the running process over to a new process of the bot, on restarts.
+    The new process connects to the socket and asks; this process stops taking updates,
+    handles the ones already taken and sends its state; the new process loads it,
+    acknowledges, and starts taking updates where this one stopped.
+    Without the acknowledgement this process takes updates again, so a failed deploy loses nothing.
+    The state is trusted as sent by the same user, the socket is only open to them.
+    """
+
+    def __init__(
+        self,
+        release: Callable[[], Awaitable[bytes]],
+        resume: Callable[[], Awaitable[None]],
+        on_handoff: Callable[[], None],
+        path: Path,
+        timeout: float = HANDOFF_TIMEOUT,
+    ):
+        """
+        :param release: stops taking updates, waits for the ones taken, and returns the state
+        :param resume: takes updates again after a failed handoff
+        :param on_handoff: called once the new process took over, to exit
+        :param path: the socket
+        :param timeout: seconds to wait for the acknowledgement of the new process
+        """
+        self._release: Callable[[], Awaitable[bytes]] = release
+        self._resume: Callable[[], Awaitable[None]] = resume
+        self._on_handoff: Callable[[], None] = on_handoff
+        self._path: Path = path
+        self._timeout: float = timeout
+        self._server: asyncio.AbstractServer | None = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self.handed_over: bool = False
+
+    async def start(self) -> None:
+        """
+        Listen for a new process, replacing the socket of the process this one took over, if any.
+        """
+        self._path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle, path=self._path)
+        os.chmod(self._path, 0o600)
+
+    async def close(self) -> None:
+        """
+        Stop listening. The socket is left to the new process after a handoff.
+        """
+        if self._server is None:
+            return
+
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+        if not self.handed_over:
+            self._path.unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # a single handoff at a time, and none after the first succeeded
+            if self._lock.locked() or self.handed_over:
+                return
+
+            async with self._lock:
+                if await asyncio.wait_for(reader.readline(), self._timeout) != _TAKEOVER:
+                    return
+                await self._hand_over(reader, writer)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logger.error(f"Error in the handoff request: {e}")
+        finally:
+            writer.close()
+
+    async def _hand_over(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        released_at = time.time()
+
+        try:
+            state = await self._release()
+            writer.write(_HEADER.pack(released_at, len(state)) + state)
+            await writer.drain()
+
+            if await asyncio.wait_for(reader.readline(), self._timeout) != _ACK:
+                raise ConnectionError("the new process refused the state")
+        # whatever went wrong, the games must go on here
+        except Exception as e:
+            logger.error(f"Handoff failed, taking updates again: {e}")
+            await self._resume()
+            return
+
+        self.handed_over = True
+        logger.warning(f"Handed {len(state)} bytes of state over to the new process")
+        self._on_handoff()
+
+
+async def take_over(
+    load: Callable[[bytes], object],
+    path: Path,
+    timeout: float = HANDOFF_TIMEOUT,
+) -> float | None:
+    """
+    Ask the running process of the bot, if any, to hand its games over.
+    Call it before taking any update, and take updates as soon as it returns.
+    :param load: loads the state, raising to refuse it, in which case the running process goes on
+    :param path: the socket of the running process
+    :param timeout: seconds to wait for the state, the running process first handles the updates it took
+    :return: the wall clock time the running process stopped taking updates, None if none was running
+    """
+    try:
+        reader, writer = await asyncio.open_unix_connection(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+    try:
+        writer.write(_TAKEOVER)
+        await writer.drain()
+
+        released_at, size = _HEADER.unpack(await asyncio.wait_for(reader.readexactly(_HEADER.size), timeout))
+        _ = load(await asyncio.wait_for(reader.readexactly(size), timeout))
+
+        writer.write(_ACK)
+        await writer.drain()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+    return released_at
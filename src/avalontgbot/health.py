@@ -0,0 +1,170 @@
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from types import FrameType
+
+from .constants import LAG_BUCKETS, LAG_INTERVAL, LAG_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# event loop implementations, chosen with EVENT_LOOP
+EVENT_LOOPS = ("asyncio", "uvloop")
+
+
+def loop_factory(name: str) -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """
+    :param name: the event loop implementation, one of EVENT_LOOPS
+    :return: builds event loops of the implementation, None for the default one of asyncio
+    :raises ValueError: if the implementation is unknown or not installed
+    """
+    if name == "asyncio":
+        return None
+    if name != "uvloop":
+        raise ValueError(f"Unknown event loop: {name}. Available: {', '.join(EVENT_LOOPS)}")
+
+    try:
+        import uvloop
+    except ImportError:
+        raise ValueError("The uvloop event loop needs the uvloop package: pip install uvloop") from None
+
+    return uvloop.new_event_loop
+
+
+class LagHistogram:
+    """
+    How late the event loop ran a callback scheduled at a given time, i.e. the delay every
+    update waits on top of its own work, counted in buckets.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LAG_BUCKETS):
+        """
+        :param buckets: upper bounds of the buckets in seconds, increasing; longer lags go in a last one
+        """
+        self.buckets: tuple[float, ...] = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def record(self, lag: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, lag)] += 1
+        self.total += lag
+        self.max = max(self.max, lag)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> float:
+        """
+        :return: the upper bound of the bucket holding the quantile, inf if past the last bound
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return 0.0
+
+    def summary(self) -> str:
+        """
+        :return: the histogram in a few lines, for admins and logs
+        """
+        if not self.count:
+            return "Event loop lag: no samples yet"
+
+        lines = [
+            f"Event loop lag: {self.count} samples, mean {self.total / self.count * 1000:.1f} ms, "
+            f"p99 ≤ {self.quantile(0.99) * 1000:.0f} ms, max {self.max * 1000:.0f} ms"
+        ]
+        low = 0.0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            if count:
+                lines.append(f"  {low * 1000:.0f}-{bound * 1000:.0f} ms: {count}")
+            low = bound
+
+        return "\n".join(lines)
+
+
+class LoopMonitor:
+    """
+    Watches the event loop for callbacks holding it, e.g. blocking calls in a handler, which delay
+    the updates of every group at once.
+    A task wakes up every interval and records how late it woke up; a watchdog thread checks
+    that the task keeps waking up, and when the loop is held for longer than the threshold it logs
+    the stack of the loop thread, attributed to its handler and game phase as by the profiler.
+    """
+
+    def __init__(
+        self,
+        collapse: Callable[[FrameType], str],
+        interval: float = LAG_INTERVAL,
+        threshold: float = LAG_THRESHOLD,
+    ):
+        """
+        :param collapse: collapses a stack of the loop thread into "handler;phase;frame;..."
+        :param interval: seconds between two wake-ups of the task
+        :param threshold: seconds the loop can be held before the culprit is logged
+        """
+        self._collapse: Callable[[FrameType], str] = collapse
+        self._interval: float = interval
+        self._threshold: float = threshold
+        self.histogram: LagHistogram = LagHistogram()
+        # handler => stalls logged by the watchdog
+        self.stalls: Counter[str] = Counter()
+        # monotonic time the task should wake up at, read by the watchdog
+        self._due: float = 0.0
+
+    async def run(self) -> None:
+        """
+        Measure the lag of the running loop, with the watchdog in the background. Runs until cancelled.
+        """
+        stop = threading.Event()
+        self._due = time.monotonic() + self._interval
+        watchdog = threading.Thread(
+            target=self._watch, args=(threading.get_ident(), stop), name="loop-watchdog", daemon=True
+        )
+        watchdog.start()
+
+        try:
+            while True:
+                await asyncio.sleep(self._interval)
+                now = time.monotonic()
+                self.histogram.record(max(0.0, now - self._due))
+                self._due = now + self._interval
+        finally:
+            stop.set()
+
+    def _watch(self, thread_id: int, stop: threading.Event) -> None:
+        reported = 0.0
+
+        while not stop.wait(self._threshold / 2):
+            due = self._due
+            # the task did not wake up in time, and this stall is not reported yet
+            if time.monotonic() - due < self._threshold or due == reported:
+                continue
+            if (frame := sys._current_frames().get(thread_id)) is None:
+                return
+
+            handler, phase, *frames = self._collapse(frame).split(";")
+            del frame
+            reported = due
+            self.stalls[handler] += 1
+
+            logger.warning(
+                f"Event loop held for over {self._threshold * 1000:.0f} ms by {handler} ({phase}), "
+                f"in {' < '.join(reversed(frames[-5:]))}"
+            )
+
+    def summary(self) -> str:
+        """
+        :return: the lag histogram and the handlers that held the loop, for admins and logs
+        """
+        lines = [self.histogram.summary()]
+        lines += [f"  held by {handler}: {count} times" for handler, count in self.stalls.most_common()]
+        return "\n".join(lines)
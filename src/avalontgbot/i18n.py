@@ -0,0 +1,226 @@
+import json
+import string
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+
+from .constants import DEFAULT_LANGUAGE
+
+LOCALES_DIR = Path(__file__).parent.parent.parent / "resources/locales"
+
+# renders a template from its named arguments
+Formatter = Callable[..., str]
+
+# conversion of a field, e.g. "{name!r}"
+_CONVERSIONS: dict[str | None, Callable[[Any], Any]] = {
+    None: lambda value: value,
+    "s": str,
+    "r": repr,
+    "a": ascii,
+}
+
+def compile_template(template: str) -> Formatter:
+    """
+    Parse a str.format template with named fields, e.g. "Hi {name}!", once into literal and field segments.
+    Templates without fields are rendered here once; unused arguments are ignored.
+    :param template: the template, fields must be plain names, with optional conversion and spec
+    :return: a function rendering the template from keyword arguments
+    :raises ValueError: if a field is not a plain name
+    """
+    # (literal text, field name, conversion, format spec) of each field
+    segments: list[tuple[str, str, Callable[[Any], Any], str]] = []
+    # literal text since the last field, split by parse at escaped braces
+    tail = ""
+
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        tail += literal
+        if field is None:
+            continue
+
+        # no positional fields, attribute or item lookups, nor fields nested in the spec
+        if not field.isidentifier():
+            raise ValueError(f"Invalid field {{{field}}} in template: {template!r}")
+        if spec and any(c in spec for c in "{}"):
+            raise ValueError(f"Invalid format spec {spec!r} in template: {template!r}")
+        if conversion not in _CONVERSIONS:
+            raise ValueError(f"Invalid conversion !{conversion} in template: {template!r}")
+
+        segments.append((tail, field, _CONVERSIONS[conversion], spec or ""))
+        tail = ""
+
+    if not segments:
+        return lambda **_: tail
+
+    def render(**kwargs: Any) -> str:
+        return "".join([
+            literal + format(convert(kwargs[field]), spec)
+            for literal, field, convert, spec in segments
+        ]) + tail
+
+    return render
+
+
+class CatalogError(ValueError):
+    """
+    An error told to users, by the catalog key of its message, so each chat reads it in its language.
+    """
+
+    def __init__(self, key: str, **fields: Any):
+        """
+        :param key: the key of the message in the catalogs
+        :param fields: the field values of the message
+        """
+        super().__init__(key)
+        self.key: str = key
+        self.fields: dict[str, Any] = fields
+
+
+class Catalog:
+    """
+    The templates of one language, compiled once when loaded.
+    Keys missing from the language use the formatters of the fallback catalog.
+    """
+
+    def __init__(
+        self,
+        language: str,
+        templates: Mapping[str, str],
+        fallback: "Catalog | None" = None,
+    ):
+        """
+        :param language: the language code, e.g. "en"
+        :param templates: key => str.format template with named fields
+        :param fallback: the catalog of the default language
+        """
+        self.language: str = language
+        formatters = dict(fallback._formatters) if fallback is not None else {}
+        formatters.update({k: compile_template(t) for k, t in templates.items()})
+        self._formatters: Mapping[str, Formatter] = MappingProxyType(formatters)
+
+    def render(self, key: str, **kwargs: Any) -> str:
+        """
+        :return: the message of the key, with the given field values
+        """
+        return self._formatters[key](**kwargs)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._formatters
+
+
+class Translator:
+    """
+    Message catalogs of every language, and the language chosen by each chat.
+    Static pages (e.g. the rules) are also rendered once per language and kept.
+    """
+
+    def __init__(self, catalogs: Mapping[str, Catalog], default: str = DEFAULT_LANGUAGE):
+        """
+        :param catalogs: language code => catalog
+        :param default: the language of the chats that did not choose one
+        """
+        self._catalogs: Mapping[str, Catalog] = catalogs
+        self._default: Catalog = catalogs[default]
+        # chat id => catalog of the chosen language
+        self._chats: dict[int, Catalog] = {}
+        # (language, page name) => rendered page
+        self._pages: dict[tuple[str, str], str] = {}
+        # chats choosing a language since the last call to changes, None until its first call
+        self._changed: set[int] | None = None
+
+    @classmethod
+    def load(cls, directory: Path = LOCALES_DIR, default: str = DEFAULT_LANGUAGE) -> "Translator":
+        """
+        Load and compile the catalogs of a directory, one <language>.json file each.
+        """
+        templates = json.loads((directory / f"{default}.json").read_text(encoding="utf-8"))
+        fallback = Catalog(default, templates)
+        catalogs = {default: fallback}
+
+        for path in sorted(directory.glob("*.json")):
+            if path.stem != default:
+                templates = json.loads(path.read_text(encoding="utf-8"))
+                catalogs[path.stem] = Catalog(path.stem, templates, fallback)
+
+        return cls(MappingProxyType(catalogs), default)
+
+    @property
+    def languages(self) -> list[str]:
+        return list(self._catalogs)
+
+    def set_language(self, chat_id: int, language: str) -> None:
+        """
+        Choose the language of a chat.
+        """
+        if (catalog := self._catalogs.get(language)) is None:
+            raise ValueError(f"Unknown language: {language}. Available: {', '.join(self._catalogs)}")
+
+        self._chats[chat_id] = catalog
+        if self._changed is not None:
+            self._changed.add(chat_id)
+
+    def changes(self) -> dict[int, str]:
+        """
+        Take the chats choosing a language since the last call, to share them with other nodes.
+        Changes are tracked from the first call on.
+        :return: chat id => language code
+        """
+        changed, self._changed = self._changed or set(), set()
+        return {chat_id: self._chats[chat_id].language for chat_id in changed}
+
+    def apply(self, chat_id: int, language: str) -> None:
+        """
+        Take the language chosen by a chat on another node, unless chosen here since the last
+        call to changes, which is shared next.
+        """
+        if (self._changed is None or chat_id not in self._changed) and (
+            catalog := self._catalogs.get(language)
+        ) is not None:
+            self._chats[chat_id] = catalog
+
+    @property
+    def chat_languages(self) -> dict[int, str]:
+        """
+        :return: chat id => language code, of the chats that chose one
+        """
+        return {chat_id: catalog.language for chat_id, catalog in self._chats.items()}
+
+    def language(self, chat_id: int) -> str:
+        """
+        :return: the language code of the chat
+        """
+        return self._chats.get(chat_id, self._default).language
+
+    def render(self, chat_id: int, key: str, **kwargs: Any) -> str:
+        """
+        :return: the message of the key in the language of the chat
+        """
+        return self._chats.get(chat_id, self._default)._formatters[key](**kwargs)
+
+    def render_in(self, language: str, key: str, **kwargs: Any) -> str:
+        """
+        :return: the message of the key in the given language
+        """
+        return self._catalogs[language]._formatters[key](**kwargs)
+
+    def explain(self, chat_id: int, error: Exception) -> str:
+        """
+        :return: the message of a catalog error in the language of the chat, other errors as they are
+        """
+        if isinstance(error, CatalogError):
+            return self.render(chat_id, error.key, **error.fields)
+        return str(error)
+
+    def page(self, chat_id: int, name: str, build: Callable[[str], str]) -> str:
+        """
+        Render a static page in the language of the chat, building it only once per language.
+        :param name: the name of the page, e.g. "rules"
+        :param build: builds the page from a language code
+        :return: the page
+        """
+        key = (self.language(chat_id), name)
+
+        if (page := self._pages.get(key)) is None:
+            page = self._pages[key] = build(key[0])
+
+        return page
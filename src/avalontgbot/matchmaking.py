@@ -0,0 +1,199 @@
+import time
+from collections.abc import Callable, Iterable, Sequence
+from itertools import islice
+
+from .constants import LEGAL_SETUPS, MANDATORY_ROLES, PLAYERS_TO_RULES
+from .i18n import CatalogError
+from .player import Player
+from .role import Role as ROLE
+
+# (number of players, special roles), the kind of game a queued user accepts
+Bucket = tuple[int, frozenset[ROLE]]
+
+# (number of players, special roles, matched players in queue order)
+Match = tuple[int, frozenset[ROLE], list[Player]]
+
+
+def parse_preferences(args: Sequence[str]) -> tuple[list[int], list[ROLE]]:
+    """
+    Parse the arguments of /queue, e.g. ["5-7", "percival", "morgana"].
+    :param args: an optional player count or range, followed by optional role names
+    :return: the accepted player counts and the requested special roles
+    """
+    counts = list(PLAYERS_TO_RULES)
+    roles: list[ROLE] = []
+
+    if args and args[0][0].isdigit():
+        low, _, high = args[0].partition("-")
+        try:
+            low_n, high_n = int(low), int(high or low)
+        except ValueError:
+            raise CatalogError("queue.invalid_count", count=args[0])
+
+        counts = [n for n in PLAYERS_TO_RULES if low_n <= n <= high_n]
+        args = args[1:]
+
+    for name in args:
+        role = next((r for r in ROLE if r.name.lower() == name.lower()), None)
+        if role is None:
+            raise CatalogError("queue.unknown_role", role=name)
+        roles.append(role)
+
+    return counts, roles
+
+
+class MatchmakingQueue:
+    """
+    Users waiting to be grouped into a new game, across all groups.
+    Users wait in one bucket per kind of game they accept; a bucket of n players
+    forms a match as soon as it holds n users, the ones waiting longest first.
+    Buckets are insertion-ordered dicts, so joining, leaving and matching only touch
+    the buckets of the users involved, however many users are waiting.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        :param clock: monotonic clock, replaceable in tests
+        """
+        self._clock: Callable[[], float] = clock
+        # bucket => ids of the waiting users, longest waiting first
+        self._buckets: dict[Bucket, dict[int, None]] = {}
+        # user id => (player, buckets the user waits in, time of joining the queue)
+        self._waiting: dict[int, tuple[Player, list[Bucket], float]] = {}
+        # users joining or leaving since the last call to changes, None until its first call
+        self._changed: set[int] | None = None
+
+    def enqueue(
+        self,
+        player: Player,
+        counts: Iterable[int],
+        roles: Iterable[ROLE],
+        reachable: Callable[[int], bool] = lambda _: True,
+    ) -> Match | None:
+        """
+        Add a user to the queue, matching them right away if possible.
+        Users a match would need but who cannot get private messages leave the queue first,
+        the others keep their place and waiting time.
+        :param player: the queuing user
+        :param counts: the numbers of players the user accepts
+        :param roles: the special roles the user wants, the mandatory ones are added
+        :param reachable: whether a user can get private messages, from the user id
+        :return: the match formed by the user, or None if the user is waiting
+        """
+        if player.userid in self._waiting:
+            raise CatalogError("queue.already_queued")
+
+        roles_set = frozenset(roles).union(MANDATORY_ROLES)
+        # largest games first, so that a user completing several buckets fills the biggest
+        buckets = [
+            (n, roles_set)
+            for n in sorted(set(counts), reverse=True)
+            if (n, roles_set) in LEGAL_SETUPS
+        ]
+
+        if len(buckets) == 0:
+            raise CatalogError("queue.roles_players", roles=", ".join(str(r) for r in roles_set))
+
+        self._add(player, buckets, self._clock())
+        if self._changed is not None:
+            self._changed.add(player.userid)
+
+        for bucket in buckets:
+            num_players, _ = bucket
+            waiting = self._buckets.get(bucket, {})
+            while len(waiting) >= num_players:
+                matched = list(islice(waiting, num_players))
+                if unreachable := [u for u in matched if not reachable(u)]:
+                    for user_id in unreachable:
+                        _ = self.dequeue(user_id)
+                    continue
+
+                players = [self._waiting[u][0] for u in matched]
+                for user_id in matched:
+                    _ = self.dequeue(user_id)
+                return num_players, roles_set, players
+
+        return None
+
+    def dequeue(self, user_id: int) -> bool:
+        """
+        Remove a user from the queue.
+        :return: True if the user was waiting, False otherwise
+        """
+        if not self._remove(user_id):
+            return False
+
+        if self._changed is not None:
+            self._changed.add(user_id)
+
+        return True
+
+    def waited(self, user_id: int) -> float | None:
+        """
+        :return: seconds the user has been waiting, or None if not in the queue
+        """
+        entry = self._waiting.get(user_id)
+        return self._clock() - entry[2] if entry is not None else None
+
+    def dump(self) -> list[tuple[Player, list[Bucket], float]]:
+        """
+        :return: (player, buckets the user waits in, seconds waited) of the waiting users,
+            longest waiting first, the monotonic times of this process meaning nothing to another one
+        """
+        now = self._clock()
+        return [(player, buckets, now - joined) for player, buckets, joined in self._waiting.values()]
+
+    def load(self, entries: list[tuple[Player, list[Bucket], float]]) -> None:
+        """
+        Take over the users of a queue dumped by another process, after the ones waiting here.
+        """
+        now = self._clock()
+        for player, buckets, waited in entries:
+            if player.userid not in self._waiting:
+                self._add(player, buckets, now - waited)
+
+    def changes(self) -> dict[int, tuple[Player, list[Bucket], float] | None]:
+        """
+        Take the users joining or leaving since the last call, to share them with other nodes.
+        Changes are tracked from the first call on.
+        :return: user id => (player, buckets the user waits in, seconds waited), None if left
+        """
+        changed, self._changed = self._changed or set(), set()
+        now = self._clock()
+        return {
+            user_id: (entry[0], entry[1], now - entry[2]) if (entry := self._waiting.get(user_id)) else None
+            for user_id in changed
+        }
+
+    def apply(self, user_id: int, entry: tuple[Player, list[Bucket], float] | None) -> None:
+        """
+        Take a user joining or leaving on another node, without matching anyone: the nodes
+        change the queue one at a time, so the other node matched the users it could.
+        :param entry: (player, buckets the user waits in, seconds waited), None if left
+        """
+        _ = self._remove(user_id)
+        if entry is not None:
+            self._add(entry[0], entry[1], self._clock() - entry[2])
+
+    def _add(self, player: Player, buckets: list[Bucket], joined: float) -> None:
+        self._waiting[player.userid] = (player, buckets, joined)
+        for bucket in buckets:
+            self._buckets.setdefault(bucket, {})[player.userid] = None
+
+    def _remove(self, user_id: int) -> bool:
+        if (entry := self._waiting.pop(user_id, None)) is None:
+            return False
+
+        for bucket in entry[1]:
+            waiting = self._buckets[bucket]
+            del waiting[user_id]
+            if len(waiting) == 0:
+                del self._buckets[bucket]
+
+        return True
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._waiting
+
+    def __len__(self) -> int:
+        return len(self._waiting)
@@ -0,0 +1,176 @@
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from enum import Enum
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Any
+
+from .constants import MEMORY_MAX_AGE
+from .game import Game, GameKey
+
+# objects shared by the whole process, never held by a single game
+_SHARED = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, Enum)
+
+
+def deep_size(obj: Any, seen: set[int] | None = None) -> int:
+    """
+    Estimate the bytes held by an object and everything it references.
+    Classes, modules, functions and enum members are shared, so they are not counted.
+    :param seen: ids of the objects already counted, shared to count common objects once
+    :return: the estimated size in bytes
+    """
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _SHARED):
+            continue
+
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+
+        if isinstance(o, Mapping):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+
+        if (attrs := getattr(o, "__dict__", None)) is not None and isinstance(attrs, dict):
+            stack.append(attrs)
+        for slot in getattr(type(o), "__slots__", ()):
+            if hasattr(o, slot):
+                stack.append(getattr(o, slot))
+
+    return size
+
+
+class Leak:
+    """
+    A registry entry that should have been removed.
+    """
+
+    def __init__(self, registry: str, entry: Hashable, reason: str, size: int):
+        """
+        :param registry: the name of the registry, e.g. "polls"
+        :param entry: the key of the entry in the registry
+        :param reason: "orphan" if its game no longer exists, "stale" if older than allowed
+        :param size: the estimated bytes held by the entry
+        """
+        self.registry: str = registry
+        self.entry: Hashable = entry
+        self.reason: str = reason
+        self.size: int = size
+
+    def __repr__(self) -> str:
+        return f"Leak({self.registry}, {self.entry!r}, {self.reason}, {self.size} B)"
+
+
+class MemoryReport:
+    """
+    Estimated memory held by the live games and the registries around them.
+    """
+
+    def __init__(self):
+        # game key => bytes of the game and of its entries in the other registries
+        self.games: dict[GameKey, int] = {}
+        # phase name => number of games, and their bytes
+        self.phase_games: Counter[str] = Counter()
+        self.phase_bytes: Counter[str] = Counter()
+        # registry name => number of entries, and their bytes
+        self.entries: Counter[str] = Counter()
+        self.bytes: Counter[str] = Counter()
+        self.leaks: list[Leak] = []
+
+    @property
+    def total(self) -> int:
+        return sum(self.bytes.values())
+
+    def summary(self) -> str:
+        """
+        :return: the report in a few lines, for admins and logs
+        """
+        lines = [f"Memory: {len(self.games)} games, {self.total / 1024:.1f} KiB"]
+        lines += [
+            f"  {name}: {self.entries[name]} entries, {self.bytes[name] / 1024:.1f} KiB"
+            for name in sorted(self.entries)
+        ]
+        lines += [
+            f"  phase {phase}: {self.phase_games[phase]} games, {self.phase_bytes[phase] / 1024:.1f} KiB"
+            for phase in sorted(self.phase_games)
+        ]
+        lines += [f"  leak: {leak.registry} {leak.entry!r} ({leak.reason}, {leak.size} B)" for leak in self.leaks]
+
+        return "\n".join(lines)
+
+
+class MemoryAccountant:
+    """
+    Builds memory reports, remembering when each registry entry was first seen
+    so that entries living longer than allowed are flagged.
+    """
+
+    def __init__(self, max_age: float = MEMORY_MAX_AGE, clock: Callable[[], float] = time.monotonic):
+        """
+        :param max_age: seconds an entry can live before being flagged as stale
+        :param clock: monotonic clock, replaceable in tests
+        """
+        self._max_age: float = max_age
+        self._clock: Callable[[], float] = clock
+        # (registry name, entry key) => time the entry was first seen
+        self._first_seen: dict[tuple[str, Hashable], float] = {}
+
+    def report(
+        self,
+        games: Mapping[GameKey, Game],
+        registries: Mapping[str, Iterable[tuple[Hashable, GameKey, Any]]],
+    ) -> MemoryReport:
+        """
+        Account the games and the entries of the other registries to the games they belong to.
+        :param games: the live games
+        :param registries: registry name => (entry key, key of its game, entry value) triples
+        :return: the report
+        """
+        now = self._clock()
+        report = MemoryReport()
+        # objects already counted for each game, so shared ones are counted once per game
+        seen: dict[GameKey, set[int]] = {key: set() for key in games}
+        alive: set[tuple[str, Hashable]] = set()
+
+        for key, game in games.items():
+            size = deep_size(game, seen[key])
+            report.games[key] = size
+            report.entries["games"] += 1
+            report.bytes["games"] += size
+            if self._is_stale(("games", key), now, alive):
+                report.leaks.append(Leak("games", key, "stale", size))
+
+        for name, entries in registries.items():
+            for entry, key, value in entries:
+                size = deep_size(value, seen.get(key))
+                report.entries[name] += 1
+                report.bytes[name] += size
+
+                if key not in games:
+                    report.leaks.append(Leak(name, entry, "orphan", size))
+                    continue
+
+                report.games[key] += size
+                if self._is_stale((name, entry), now, alive):
+                    report.leaks.append(Leak(name, entry, "stale", size))
+
+        for key, game in games.items():
+            report.phase_games[game.phase.name] += 1
+            report.phase_bytes[game.phase.name] += report.games[key]
+
+        # forget the entries that were removed
+        for entry in self._first_seen.keys() - alive:
+            del self._first_seen[entry]
+
+        return report
+
+    def _is_stale(self, entry: tuple[str, Hashable], now: float, alive: set[tuple[str, Hashable]]) -> bool:
+        alive.add(entry)
+        return now - self._first_seen.setdefault(entry, now) > self._max_age
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Least recently used cache whose entries also expire after a fixed time.
+    Loads through get_or_load are single-flight: concurrent lookups of the same
+    missing key share one load.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param maxsize: maximum number of entries, the least recently used is evicted first
+        :param ttl: seconds after which an entry is stale
+        :param clock: monotonic clock, replaceable in tests
+        """
+        self._maxsize: int = maxsize
+        self._ttl: float = ttl
+        self._clock: Callable[[], float] = clock
+        # key => (expiry time, value), least recently used first
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._inflight: dict[K, asyncio.Future[V]] = {}
+
+    def get(self, key: K) -> V | None:
+        """
+        Look up a fresh entry.
+        :return: the cached value, or None if missing or expired
+        """
+        if (entry := self._entries.get(key)) is None:
+            return None
+
+        expires, value = entry
+        if expires < self._clock():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """
+        Store a value, refreshing its TTL and evicting the least recently used entry if full.
+        """
+        self._entries[key] = (self._clock() + self._ttl, value)
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self._maxsize:
+            _ = self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        """
+        Look up an entry, loading and storing it if missing.
+        :param key: the key to look up
+        :param loader: called at most once at a time per key to load the value
+        :return: the cached or loaded value
+        """
+        if (value := self.get(key)) is not None:
+            return value
+
+        if (pending := self._inflight.get(key)) is not None:
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[V] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # mark the exception as retrieved if nobody else was waiting
+            _ = future.exception()
+            raise
+        except BaseException:
+            _ = future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+        self.set(key, value)
+        future.set_result(value)
+
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,162 @@
+import functools
+import html
+import inspect
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from telegram import Update
+from telegram.constants import MessageLimit, ParseMode
+from telegram.ext import Application, CallbackContext, ExtBot
+
+
+class Outbox:
+    """
+    Wrapper around the bot that merges consecutive text messages to the same group (and topic).
+    Text messages are held back, one buffer per group and topic, until any other API call or
+    the end of the update, and sent as a single message when they fit Telegram's limit.
+    A buffer is taken before any send is awaited, so routines of an update running
+    concurrently, e.g. the tables of a tournament round, never send to each other's topic.
+    """
+
+    def __init__(self, bot: ExtBot[Any]):
+        self._bot: ExtBot[Any] = bot
+        # (chat id, forum topic id) => pending (text, parse mode) pairs addressed to it
+        self._pending: dict[tuple[int, int | None], list[tuple[str, str | None]]] = {}
+
+    @property
+    def wrapped(self) -> ExtBot[Any]:
+        """The bot sending the messages, for calls outliving the current update."""
+        return self._bot
+
+    async def send_message(
+        self,
+        chat_id: int,
+        text: str,
+        parse_mode: str | None = None,
+        message_thread_id: int | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Queue a text message, merging it with the pending ones of its group and topic when possible.
+        Messages with extra arguments (e.g. a keyboard), parse modes other than HTML and
+        private messages are sent immediately, so delivery errors surface where they are sent.
+        :return: the sent message, or None if the message was queued
+        """
+        if kwargs or chat_id > 0 or parse_mode not in (None, ParseMode.HTML):
+            await self.flush()
+            return await self._bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode,
+                message_thread_id=message_thread_id,
+                **kwargs,
+            )
+
+        target = (chat_id, message_thread_id)
+        pending = self._pending.setdefault(target, [])
+
+        if pending and len(_merge([*pending, (text, parse_mode)])[0]) > MessageLimit.MAX_TEXT_LENGTH:
+            # the message starts the next buffer before the full one is sent
+            self._pending[target] = [(text, parse_mode)]
+            await self._send(target, pending)
+        else:
+            pending.append((text, parse_mode))
+
+        return None
+
+    async def flush(self) -> None:
+        """
+        Send the pending messages, if any, as a single message per group and topic.
+        """
+        pending, self._pending = self._pending, {}
+
+        for target, parts in pending.items():
+            await self._send(target, parts)
+
+    async def _send(self, target: tuple[int, int | None], parts: list[tuple[str, str | None]]) -> None:
+        text, parse_mode = _merge(parts)
+        chat_id, message_thread_id = target
+
+        _ = await self._bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=parse_mode,
+            message_thread_id=message_thread_id,
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._bot, name)
+
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        # any other API call flushes first, to keep the messages in order
+        @functools.wraps(attr)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            await self.flush()
+            return await attr(*args, **kwargs)
+
+        return call
+
+
+def _merge(parts: list[tuple[str, str | None]]) -> tuple[str, str | None]:
+    """
+    Join text messages into one.
+    :param parts: (text, parse mode) pairs, parse mode being None or HTML
+    :return: the merged text and its parse mode; plain parts are escaped if any part is HTML
+    """
+    if all(parse_mode is None for _, parse_mode in parts):
+        return "\n".join(text for text, _ in parts), None
+
+    return (
+        "\n".join(text if parse_mode else html.escape(text) for text, parse_mode in parts),
+        ParseMode.HTML,
+    )
+
+
+class BufferedContext(CallbackContext[ExtBot[Any], dict[Any, Any], dict[Any, Any], dict[Any, Any]]):
+    """
+    Callback context whose bot is an Outbox, created once per update.
+    """
+
+    def __init__(
+        self,
+        application: Application[Any, Any, Any, Any, Any, Any],
+        chat_id: int | None = None,
+        user_id: int | None = None,
+    ):
+        super().__init__(application, chat_id, user_id)
+        self._outbox: Outbox = Outbox(application.bot)
+
+    @property
+    def bot(self) -> Outbox:  # pyright: ignore[reportIncompatibleMethodOverride]
+        return self._outbox
+
+
+async def reply(context: Any, message: Any, text: str, parse_mode: str | None = None) -> Any:
+    """
+    Reply to a message after the messages the outbox of the update holds, which a direct reply
+    would overtake.
+    """
+    if isinstance(context.bot, Outbox):
+        await context.bot.flush()
+
+    return await message.reply_text(text, parse_mode=parse_mode)
+
+
+def flushing(
+    callback: Callable[[Update, Any], Awaitable[None]],
+) -> Callable[[Update, Any], Awaitable[None]]:
+    """
+    Decorator sending the messages still queued in the outbox when the handler returns.
+    """
+
+    @functools.wraps(callback)
+    async def wrapper(update: Update, context: Any) -> None:
+        try:
+            await callback(update, context)
+        finally:
+            if isinstance(context.bot, Outbox):
+                await context.bot.flush()
+
+    return wrapper
@@ -0,0 +1,295 @@
+import asyncio
+import contextlib
+import inspect
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from contextlib import AbstractAsyncContextManager
+from enum import IntEnum
+from typing import Any
+
+from telegram.constants import ChatType
+from telegram.error import TelegramError
+from telegram.ext import BaseUpdateProcessor
+
+from .constants import (
+    PIPELINE_COMMAND_CAPACITY,
+    PIPELINE_GAME_CAPACITY,
+    PIPELINE_INFO_CAPACITY,
+    PIPELINE_REPORT_INTERVAL,
+    PIPELINE_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# commands that change the state of a game
+GAME_COMMANDS = {
+    "create", "join", "leave", "startgame", "delete", "setroles", "passhost", "queue", "unqueue",
+    "tournament", "enter", "nextround", "addbots",
+}
+
+class Lane(IntEnum):
+    """
+    Priority lanes of the update pipeline, lower values are served first.
+    """
+    GAME = 0  # votes and poll answers, never dropped
+    COMMAND = 1  # commands changing a game
+    INFO = 2  # everything else, e.g. /rules and /help
+
+    def __str__(self):
+        return self.name
+
+
+def command_of(update: object) -> str | None:
+    """
+    :return: the command of the message of the update, without the bot name, None if not a command
+    """
+    message = getattr(update, "effective_message", None)
+    text: str = getattr(message, "text", None) or ""
+
+    if not text.startswith("/"):
+        return None
+
+    return text.split()[0][1:].split("@")[0].lower()
+
+
+def is_private_start(update: object) -> bool:
+    """
+    Check whether the update is a /start in private chat, which lets the bot message the user
+    and so must never be dropped.
+    """
+    chat = getattr(update, "effective_chat", None)
+    return getattr(chat, "type", None) == ChatType.PRIVATE and command_of(update) == "start"
+
+
+def classify(update: object) -> Lane:
+    """
+    Pick the lane of an update.
+    """
+    if getattr(update, "callback_query", None) or getattr(update, "poll_answer", None):
+        return Lane.GAME
+
+    if command_of(update) in GAME_COMMANDS or is_private_start(update):
+        return Lane.COMMAND
+
+    return Lane.INFO
+
+
+def chat_of(update: object) -> Hashable | None:
+    """
+    Default key of an update: the id of the chat it comes from.
+    """
+    chat = getattr(update, "effective_chat", None)
+    return chat.id if chat is not None else None
+
+
+class PriorityUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update processor serving game updates before commands and commands before the rest.
+    Each lane is bounded: when full, commands and info requests are dropped with a reply,
+    while game updates and private /start wait for room. Within a lane chats take turns.
+    At most one update per chat runs at a time, and the updates of a chat run in the order
+    they came whatever their lanes, so game state is never changed concurrently or out of order.
+    """
+
+    def __init__(
+        self,
+        workers: int = PIPELINE_WORKERS,
+        capacities: Mapping[Lane, int] | None = None,
+        key: Callable[[object], Hashable | None] = chat_of,
+        around: Callable[[Hashable | None], AbstractAsyncContextManager[Any]] | None = None,
+        busy_text: Callable[[object], str] | None = None,
+    ):
+        """
+        :param workers: number of updates handled at the same time
+        :param capacities: number of updates each lane can queue
+        :param key: groups the updates that must not run concurrently, e.g. by chat
+        :param around: context entered around the handling of each update, from its key,
+            e.g. to hold the game of the update among several nodes
+        :param busy_text: the reply to a dropped update, e.g. in the language of its chat;
+            dropped updates get no reply if None
+        """
+        self._workers: int = workers
+        self._capacities: dict[Lane, int] = {
+            Lane.GAME: PIPELINE_GAME_CAPACITY,
+            Lane.COMMAND: PIPELINE_COMMAND_CAPACITY,
+            Lane.INFO: PIPELINE_INFO_CAPACITY,
+        }
+        self._capacities.update(capacities or {})
+        self._busy_text: Callable[[object], str] | None = busy_text
+        self._key: Callable[[object], Hashable | None] = key
+        self._around: Callable[[Hashable | None], AbstractAsyncContextManager[Any]] = around or (
+            lambda _: contextlib.nullcontext()
+        )
+
+        # the base semaphore only has to hold the running and queued updates
+        super().__init__(workers + sum(self._capacities.values()))
+
+        # lane => chats whose next update is in the lane and can run, in the order they became ready
+        self._ready: dict[Lane, deque[Hashable]] = {lane: deque() for lane in Lane}
+        self._depths: dict[Lane, int] = {lane: 0 for lane in Lane}
+        self._shed: dict[Lane, int] = {lane: 0 for lane in Lane}
+        self._space_waiters: dict[Lane, deque[asyncio.Future[None]]] = {
+            lane: deque() for lane in Lane
+        }
+        # chat => lanes and turns of its queued updates, in the order they came
+        self._arrivals: dict[Hashable, deque[tuple[Lane, asyncio.Future[None]]]] = {}
+        # chats with a running update
+        self._busy: set[Hashable] = set()
+        self._running: int = 0
+
+    # nothing to set up or tear down, so the applications of several bots can share the processor
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        lane = classify(update)
+        update_key = self._key(update)
+        # updates without a chat never wait for each other
+        key = update_key if update_key is not None else object()
+
+        if self._depths[lane] >= self._capacities[lane]:
+            if lane != Lane.GAME and not is_private_start(update):
+                await self._shed_update(lane, update, coroutine)
+                return
+
+            await self._wait_for_space(lane)
+
+        turn: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        arrivals = self._arrivals.setdefault(key, deque())
+        arrivals.append((lane, turn))
+        self._depths[lane] += 1
+        if len(arrivals) == 1:
+            self._mark_ready(key)
+        self._schedule()
+
+        try:
+            await turn
+        except asyncio.CancelledError:
+            # the turn may have been given right before the cancellation
+            if turn.done() and not turn.cancelled():
+                self._release(key)
+            raise
+
+        try:
+            async with self._around(update_key):
+                await coroutine
+        except Exception as e:
+            # handlers report their own errors, these come from the context
+            logger.error(f"Dropped an update, error around its handling: {e}")
+        finally:
+            # never started if the context failed
+            if inspect.iscoroutine(coroutine):
+                coroutine.close()
+            self._release(key)
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Snapshot of the pipeline state.
+        :return: running updates, queued updates per lane and dropped updates per lane
+        """
+        return {
+            "running": self._running,
+            "depth": {str(lane): depth for lane, depth in self._depths.items()},
+            "shed": {str(lane): shed for lane, shed in self._shed.items()},
+        }
+
+    def summary(self) -> str:
+        """
+        :return: the metrics in a line, for admins and logs
+        """
+        metrics = self.metrics()
+        depth = ", ".join(f"{lane} {n}" for lane, n in metrics["depth"].items())
+        shed = ", ".join(f"{lane} {n}" for lane, n in metrics["shed"].items())
+        return f"Pipeline: {metrics['running']} running, queued {depth}, dropped {shed}"
+
+    async def log_metrics(self, interval: float = PIPELINE_REPORT_INTERVAL) -> None:
+        """
+        Log the metrics periodically. Runs until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            logger.warning(self.summary())
+
+    def _schedule(self) -> None:
+        """
+        Give turns to queued updates while there are free workers.
+        """
+        while self._running < self._workers and (item := self._next()) is not None:
+            key, turn = item
+            self._running += 1
+            self._busy.add(key)
+            turn.set_result(None)
+
+    def _next(self) -> tuple[Hashable, asyncio.Future[None]] | None:
+        """
+        Pop the next update to run: highest lane first, ready chats in turn.
+        A chat is ready in the lane of its oldest update while none of its updates runs,
+        so this never looks at busy chats nor at chats with an older update in another lane.
+        """
+        for lane in Lane:
+            if ready := self._ready[lane]:
+                key = ready.popleft()
+                arrivals = self._arrivals[key]
+                _, turn = arrivals.popleft()
+                if not arrivals:
+                    del self._arrivals[key]
+                self._depths[lane] -= 1
+
+                self._wake_space_waiter(lane)
+
+                # cancelled while waiting
+                if turn.done():
+                    self._mark_ready(key)
+                    return self._next()
+
+                return key, turn
+
+        return None
+
+    def _mark_ready(self, key: Hashable) -> None:
+        """
+        Queue a chat in the lane of its oldest update, if it has one and none of its updates runs.
+        """
+        if key not in self._busy and (arrivals := self._arrivals.get(key)):
+            self._ready[arrivals[0][0]].append(key)
+
+    def _release(self, key: Hashable) -> None:
+        self._running -= 1
+        self._busy.discard(key)
+        self._mark_ready(key)
+        self._schedule()
+
+    async def _wait_for_space(self, lane: Lane) -> None:
+        while self._depths[lane] >= self._capacities[lane]:
+            waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            self._space_waiters[lane].append(waiter)
+            await waiter
+
+    def _wake_space_waiter(self, lane: Lane) -> None:
+        waiters = self._space_waiters[lane]
+        while waiters:
+            if not (waiter := waiters.popleft()).done():
+                waiter.set_result(None)
+                return
+
+    async def _shed_update(self, lane: Lane, update: object, coroutine: Awaitable[Any]) -> None:
+        """
+        Drop an update, politely telling the user to try again.
+        """
+        self._shed[lane] += 1
+        if inspect.iscoroutine(coroutine):
+            coroutine.close()
+
+        logger.warning(f"Pipeline lane {lane} is full, dropped an update")
+
+        if self._busy_text is not None and (
+            message := getattr(update, "effective_message", None)
+        ) is not None:
+            try:
+                _ = await message.reply_text(self._busy_text(update))
+            except TelegramError as e:
+                logger.error(f"Error replying to a dropped update: {e}")
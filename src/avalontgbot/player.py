@@ -1,3 +1,5 @@
+import html
+
 from .role import Role as ROLE
 
 class Player:
@@ -10,12 +12,26 @@ class Player:
     def __str__(self):
         return self.tg_name
 
+    @property
+    def tg_name(self) -> str:
+        """The Telegram display name of the player."""
+        return self._tg_name
+
+    @tg_name.setter
+    def tg_name(self, value: str):
+        self._tg_name: str = value
+        # rendered lazily by mention()
+        self._mention: str | None = None
+
     def mention(self) -> str:
         """
         Returns a string that mentions the player in Telegram.
         :return: A string formatted for mentioning the player.
         """
-        return f'<a href="tg://user?id={self.userid}">{self.tg_name}</a>'
+        if self._mention is None:
+            self._mention = f'<a href="tg://user?id={self.userid}">{html.escape(self.tg_name)}</a>'
+
+        return self._mention
 
     def is_good(self) -> bool:
         """
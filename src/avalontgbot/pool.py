@@ -0,0 +1,102 @@
+from typing import Any
+
+
+class BotPool:
+    """
+    Bots running in the same process, one per token, sharing the same games.
+    Every group is pinned to the first bot handling an update from it, and every user
+    to the last bot they started in private chat, which is the one able to message them.
+    """
+
+    def __init__(self):
+        # bot id => bot
+        self._bots: dict[int, Any] = {}
+        # group id => id of the bot serving it
+        self._chats: dict[int, int] = {}
+        # user id => id of the bot the user started in private chat
+        self._users: dict[int, int] = {}
+        # groups pinned and users noted since the last call to changes, None until its first call
+        self._changed: tuple[set[int], set[int]] | None = None
+
+    def add(self, bot: Any) -> None:
+        """
+        Add an initialized bot to the pool.
+        """
+        self._bots[bot.id] = bot
+
+    def pin_chat(self, chat_id: int, bot_id: int) -> int:
+        """
+        Pin a group to a bot, unless already pinned.
+        :return: the id of the bot serving the group
+        """
+        if chat_id not in self._chats and self._changed is not None:
+            self._changed[0].add(chat_id)
+
+        return self._chats.setdefault(chat_id, bot_id)
+
+    def note_user(self, user_id: int, bot_id: int) -> None:
+        """
+        Record the bot a user started in private chat.
+        """
+        if self._users.get(user_id) != bot_id and self._changed is not None:
+            self._changed[1].add(user_id)
+
+        self._users[user_id] = bot_id
+
+    def for_chat(self, chat_id: int) -> Any | None:
+        """
+        :return: the bot serving the group, or None if not pinned
+        """
+        bot_id = self._chats.get(chat_id)
+        return self._bots.get(bot_id) if bot_id is not None else None
+
+    def for_user(self, user_id: int) -> Any | None:
+        """
+        :return: the bot able to message the user in private chat, or None if unknown
+        """
+        bot_id = self._users.get(user_id)
+        return self._bots.get(bot_id) if bot_id is not None else None
+
+    def dump(self) -> tuple[dict[int, int], dict[int, int]]:
+        """
+        :return: the ids of the bots serving each group and started by each user, the bots
+            themselves being built again by every process
+        """
+        return dict(self._chats), dict(self._users)
+
+    def load(self, maps: tuple[dict[int, int], dict[int, int]]) -> None:
+        """
+        Take over the groups and users of a pool dumped by another process.
+        """
+        chats, users = maps
+        for chat_id, bot_id in chats.items():
+            _ = self._chats.setdefault(chat_id, bot_id)
+        self._users.update(users)
+
+    def changes(self) -> tuple[dict[int, int], dict[int, int]]:
+        """
+        Take the groups pinned and users noted since the last call, to share them with other nodes,
+        which serve the same tokens. Changes are tracked from the first call on.
+        :return: the ids of the bots serving the groups and started by the users
+        """
+        (chats, users), self._changed = self._changed or (set(), set()), (set(), set())
+        return {c: self._chats[c] for c in chats}, {u: self._users[u] for u in users}
+
+    def apply_chat(self, chat_id: int, bot_id: int) -> None:
+        """
+        Take the bot serving a group pinned on another node, unless pinned here since the last
+        call to changes, which is shared next.
+        """
+        if self._changed is None or chat_id not in self._changed[0]:
+            self._chats[chat_id] = bot_id
+
+    def apply_user(self, user_id: int, bot_id: int) -> None:
+        """
+        Take the bot a user started, noted on another node, unless noted here since the last
+        call to changes, which is shared next.
+        """
+        if self._changed is None or user_id not in self._changed[1]:
+            self._users[user_id] = bot_id
+
+    def __len__(self) -> int:
+        return len(self._bots)
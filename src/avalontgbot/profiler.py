@@ -0,0 +1,128 @@
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+from .constants import PROFILE_INTERVAL, PROFILE_MAX_SECONDS
+from .game import Game
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR = Path(__file__).parent.parent.parent / "profiles"
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the event loop thread from a background thread, for a bounded window.
+    Samples are attributed to the handler of bot.py running and to the phase of its game,
+    and written as collapsed stacks ("frame;frame;frame count" lines), the input of flamegraph
+    tools. Nothing runs between windows, so the bot pays nothing while not profiling.
+    """
+
+    def __init__(
+        self,
+        interval: float = PROFILE_INTERVAL,
+        directory: Path = PROFILES_DIR,
+        handlers_module: str = "avalontgbot.bot",
+    ):
+        """
+        :param interval: seconds between two samples
+        :param directory: where the profiles are written
+        :param handlers_module: the module of the handlers the samples are attributed to
+        """
+        self._interval: float = interval
+        self._directory: Path = directory
+        self._handlers_module: str = handlers_module
+        self._thread: threading.Thread | None = None
+        self._stop: threading.Event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, thread_id: int | None = None) -> Path:
+        """
+        Start sampling a thread for a while, in the background.
+        :param seconds: length of the window, at most PROFILE_MAX_SECONDS
+        :param thread_id: the thread to sample, the calling one (the event loop) by default
+        :return: the file the profile will be written to
+        """
+        if self.running:
+            raise ValueError("A profile is already running.")
+        if not 0 < seconds <= PROFILE_MAX_SECONDS:
+            raise ValueError(f"Profiles last between 1 and {PROFILE_MAX_SECONDS} seconds.")
+
+        path = self._directory / f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(thread_id or threading.get_ident(), seconds, path),
+            name="profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+        return path
+
+    def stop(self) -> None:
+        """
+        End the current window early, writing what was sampled so far.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapse(self, frame: FrameType) -> str:
+        """
+        Collapse a stack into a line of a profile: handler;phase;outermost frame;...;innermost frame.
+        """
+        frames: list[FrameType] = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back  # pyright: ignore[reportAssignmentType]
+        frames.reverse()
+
+        handler = "loop"
+        phase = "no game"
+        names: list[str] = []
+
+        for f in frames:
+            module = f.f_globals.get("__name__", "?")
+            names.append(f"{module}:{f.f_code.co_name}")
+
+            # the handler is the outermost frame of the running task, not of what started the loop
+            if module.startswith("asyncio."):
+                handler = "loop"
+            elif module == self._handlers_module and handler == "loop":
+                handler = f.f_code.co_name
+
+            # the innermost game in scope tells the phase
+            if "game" in f.f_code.co_varnames and isinstance(game := f.f_locals.get("game"), Game):
+                phase = game.phase.name
+
+        return ";".join([handler, phase, *names])
+
+    def _run(self, thread_id: int, seconds: float, path: Path) -> None:
+        stacks: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline and not self._stop.is_set():
+            if (frame := sys._current_frames().get(thread_id)) is None:
+                break
+            stacks[self.collapse(frame)] += 1
+            del frame
+            _ = self._stop.wait(self._interval)
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _ = path.write_text(
+                "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()),
+                encoding="utf-8",
+            )
+            logger.warning(f"Profile of {sum(stacks.values())} samples written to {path}")
+        except OSError as e:
+            logger.error(f"Error writing the profile: {e}")
@@ -0,0 +1,126 @@
+import time
+from collections.abc import Callable, Iterable
+
+from .constants import REACHABILITY_TTL
+
+
+class ReachabilityCache:
+    """
+    Remembers which users can receive private messages from the bot.
+    A user is reachable after starting the bot in private chat or receiving a message from it,
+    and unreachable after a private message to it failed; either lasts for the TTL after the
+    last sign of it. Users never seen, e.g. who started the bot before a restart, are worth a try.
+    """
+
+    def __init__(
+        self,
+        ttl: float = REACHABILITY_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param ttl: seconds the last sign of a user is trusted
+        :param clock: monotonic clock, replaceable in tests
+        """
+        self._ttl: float = ttl
+        self._clock: Callable[[], float] = clock
+        # user id => (whether the user was reachable, time after which it is forgotten)
+        self._seen: dict[int, tuple[bool, float]] = {}
+        # users marked or forgotten since the last call to changes, None until its first call
+        self._changed: set[int] | None = None
+
+    def mark_reachable(self, user_id: int) -> None:
+        """
+        Record that the user can receive private messages, refreshing the TTL.
+        """
+        self._seen[user_id] = (True, self._clock() + self._ttl)
+        self._track(user_id)
+
+    def mark_unreachable(self, user_id: int) -> None:
+        """
+        Record that a private message to the user failed.
+        """
+        self._seen[user_id] = (False, self._clock() + self._ttl)
+        self._track(user_id)
+
+    def forget(self, user_id: int) -> None:
+        """
+        Forget what is known of the user, who is worth a try again.
+        """
+        _ = self._seen.pop(user_id, None)
+        self._track(user_id)
+
+    def _track(self, user_id: int) -> None:
+        if self._changed is not None:
+            self._changed.add(user_id)
+
+    def status(self, user_id: int) -> bool | None:
+        """
+        :return: whether the user was reachable at the last sign of it, None if unknown or expired
+        """
+        if (seen := self._seen.get(user_id)) is None:
+            return None
+
+        if seen[1] < self._clock():
+            del self._seen[user_id]
+            return None
+
+        return seen[0]
+
+    def is_reachable(self, user_id: int) -> bool:
+        """
+        Check whether a private message to the user is worth sending, without any API call.
+        """
+        return self.status(user_id) is not False
+
+    def unreachable(self, user_ids: Iterable[int]) -> list[int]:
+        """
+        Filter the users known not to receive private messages.
+        :param user_ids: the users to check
+        :return: the unreachable users, in the given order
+        """
+        return [u for u in user_ids if not self.is_reachable(u)]
+
+    def dump(self) -> dict[int, tuple[bool, float]]:
+        """
+        :return: user id => (whether the user was reachable, seconds left before it is forgotten),
+            the monotonic times of this process meaning nothing to another one
+        """
+        now = self._clock()
+        return {user_id: (reachable, expires - now) for user_id, (reachable, expires) in self._seen.items()}
+
+    def load(self, entries: dict[int, tuple[bool, float]]) -> None:
+        """
+        Take over the users of a cache dumped by another process.
+        """
+        now = self._clock()
+        self._seen.update({user_id: (reachable, now + left) for user_id, (reachable, left) in entries.items()})
+
+    def changes(self) -> dict[int, tuple[bool, float] | None]:
+        """
+        Take the users marked or forgotten since the last call, to share them with other nodes.
+        Changes are tracked from the first call on.
+        :return: user id => (whether the user was reachable, seconds left), None if forgotten
+        """
+        changed, self._changed = self._changed or set(), set()
+        now = self._clock()
+        return {
+            user_id: (seen[0], seen[1] - now) if (seen := self._seen.get(user_id)) is not None else None
+            for user_id in changed
+        }
+
+    def apply(self, user_id: int, entry: tuple[bool, float] | None) -> None:
+        """
+        Take a user marked or forgotten by another node, unless changed here since the last
+        call to changes, which is shared next.
+        :param entry: (whether the user was reachable, seconds left), None if forgotten
+        """
+        if self._changed is not None and user_id in self._changed:
+            return
+
+        if entry is None or entry[1] <= 0:
+            _ = self._seen.pop(user_id, None)
+        else:
+            self._seen[user_id] = (entry[0], self._clock() + entry[1])
+
+    def __len__(self) -> int:
+        return len(self._seen)
@@ -1,5 +1,7 @@
+from collections.abc import Mapping
 from pathlib import Path
-from enum import Enum
+from enum import Enum, auto
+from types import MappingProxyType
 
 
 class Role(Enum):
@@ -70,3 +72,51 @@ class Role(Enum):
     @property
     def is_special(self) -> bool:
         return self not in {self.MOM, self.LSOA}
+
+    @property
+    def visibility(self) -> Mapping["Role", "Appearance"]:
+        """
+        The roles this role sees during the night phase, and how they appear.
+        """
+        return VISIBILITY[self]
+
+
+class Appearance(Enum):
+    """
+    Enum representing how a player appears to another during the night phase.
+    """
+    TEAMMATE = auto()
+    EVIL = auto()
+    MERLIN = auto()
+
+
+def _compile_visibility() -> Mapping[Role, Mapping[Role, Appearance]]:
+    """
+    Builds the read-only visibility matrix from the rules of the game.
+    :return: mapping from each role to the roles it sees and how they appear.
+    """
+    evils = [r for r in Role if not r.is_good]
+
+    rules: dict[Role, dict[Role, Appearance]] = {r: {} for r in Role}
+
+    # minions know each other, but Oberon neither sees nor is seen by them
+    for r in evils:
+        if r != Role.OBERON:
+            rules[r] = {o: Appearance.TEAMMATE for o in evils if o != Role.OBERON}
+
+    # Merlin sees the evil team, except Mordred and Oberon
+    rules[Role.MERLIN] = {
+        o: Appearance.EVIL for o in evils if o not in {Role.MORDRED, Role.OBERON}
+    }
+
+    # Percival sees Merlin, but Morgana looks the same to him
+    rules[Role.PERCIVAL] = {
+        Role.MERLIN: Appearance.MERLIN,
+        Role.MORGANA: Appearance.MERLIN,
+    }
+
+    return MappingProxyType({r: MappingProxyType(seen) for r, seen in rules.items()})
+
+
+# role => roles it sees during the night phase => how they appear
+VISIBILITY = _compile_visibility()
@@ -0,0 +1,99 @@
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from .constants import MAX_TEAM_REJECTS
+from .game import Game
+from .gamephase import GamePhase as PHASE
+
+# renders a message of the catalog in the language of the game, e.g. render("board.turn", turn=1)
+Render = Callable[..., str]
+
+
+def _missions(render: Render, game: Game) -> str:
+    icons = "".join("⬜" if x is None else "✅" if x else "❌" for x in game.missions)
+    return render("board.missions", missions=icons)
+
+
+def _turn(render: Render, game: Game) -> str:
+    return render(
+        "board.turn",
+        turn=game.turn + 1,
+        turns=len(game.team_sizes),
+        leader=game.players[game.leader_idx].mention(),
+    )
+
+
+def _leaders(render: Render, game: Game) -> str:
+    queue = game.players[game.leader_idx + 1 :] + game.players[: game.leader_idx]
+    return render("board.leaders", leaders=", ".join(str(p) for p in queue))
+
+
+def _team_sizes(render: Render, game: Game) -> str:
+    sizes = ", ".join(
+        f"[{x}]" if i == game.turn else str(x) for i, x in enumerate(game.team_sizes)
+    )
+    return render("board.team_sizes", sizes=sizes)
+
+
+def _rejections(render: Render, game: Game) -> str:
+    return render("board.rejections", count=game.rejection_count, max=MAX_TEAM_REJECTS)
+
+
+def _result(render: Render, game: Game) -> str:
+    if game.phase != PHASE.GAME_OVER or game.winner is None:
+        return ""
+    return render("end.good_wins" if game.winner else "end.evil_wins")
+
+
+# fields of a section never rendered
+_UNSET = object()
+
+# sections of the board, top to bottom: (fields the section shows, section renderer)
+_SECTIONS: tuple[tuple[Callable[[Game], Hashable], Callable[[Render, Game], str]], ...] = (
+    (lambda g: tuple(g.missions), _missions),
+    (lambda g: (g.turn, g.players[g.leader_idx].mention()), _turn),
+    (lambda g: (g.leader_idx, tuple(str(p) for p in g.players)), _leaders),
+    (lambda g: g.turn, _team_sizes),
+    (lambda g: g.rejection_count, _rejections),
+    (lambda g: (g.phase, g.winner), _result),
+)
+
+
+class Scoreboard:
+    """
+    The state of a game at a glance, kept in a single pinned message of its group.
+    Only the sections whose fields changed are rendered again, and the text is
+    kept so that showing the board costs no rendering at all.
+    """
+
+    def __init__(self, render: Render):
+        """
+        :param render: renders a message of the catalog, in the language of the game
+        """
+        self._render: Render = render
+        # (fields, text) of each section, as last rendered
+        self._sections: list[tuple[Any, str]] = [(_UNSET, "") for _ in _SECTIONS]
+        # the message showing the board, once sent
+        self.message_id: int | None = None
+        self.text: str = ""
+
+    def update(self, game: Game) -> bool:
+        """
+        Render again the sections of the board whose fields changed.
+        :param game: the started game shown by the board
+        :return: True if the text of the board changed, False otherwise
+        """
+        changed = False
+
+        for i, (fields, render) in enumerate(_SECTIONS):
+            if (value := fields(game)) != self._sections[i][0]:
+                self._sections[i] = (value, render(self._render, game))
+                changed = True
+
+        if not changed:
+            return False
+
+        text = "\n".join(text for _, text in self._sections if text)
+        changed, self.text = text != self.text, text
+
+        return changed
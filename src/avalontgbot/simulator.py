@@ -0,0 +1,75 @@
+import random
+from collections.abc import Iterable
+
+from .agent import Agent
+from .game import Game
+from .gamephase import GamePhase as PHASE
+from .role import Role as ROLE
+
+
+def agent_game(
+    num_players: int,
+    special_roles: Iterable[ROLE] = (),
+    rng: random.Random | None = None,
+    id: int = -1,
+) -> Game:
+    """
+    Seat agents at a new game and start it.
+    :param num_players: the number of agents
+    :param special_roles: the optional roles of the game
+    :param rng: source of randomness of the agents
+    :param id: the id of the game, agents' ids are only unique within it
+    :return: the started game
+    """
+    agents = [Agent(-i, rng=rng) for i in range(1, num_players + 1)]
+
+    game = Game(agents[0], id)
+    for agent in agents[1:]:
+        game.player_join(agent)
+    game.set_special_roles(list(special_roles))
+    game.start_game()
+
+    knowledge = game.night_knowledge()
+    for agent in agents:
+        agent.see(knowledge[agent])
+
+    return game
+
+
+def play(game: Game) -> Game:
+    """
+    Play a started game of agents to the end, through the same calls the controller makes.
+    :return: the finished game
+    """
+    agents: list[Agent] = game.players  # pyright: ignore[reportAssignmentType]
+
+    while game.phase != PHASE.GAME_OVER:
+        if game.phase == PHASE.BUILD_TEAM:
+            leader = agents[game.leader_idx]
+            game.create_team(leader.propose_team(game))
+
+            for agent in agents:
+                _ = game.add_player_vote(agent, agent.decide(game))
+
+            votes = game.votes.copy()
+            _ = game.update_after_team_decision()
+
+            for agent in agents:
+                agent.observe_votes(game.team, votes)
+
+        elif game.phase == PHASE.QUEST:
+            for agent in game.team:
+                _ = game.add_player_vote(agent, agent.decide(game))  # pyright: ignore[reportAttributeAccessIssue]
+
+            fails = list(game.votes.values()).count(False)
+            _ = game.update_after_mission()
+
+            for agent in agents:
+                agent.observe_mission(game.team, fails)
+
+        elif game.phase == PHASE.LAST_CHANCE:
+            (assassin,) = game.roles_to_players({ROLE.ASSASSIN})
+            goods = [p for p in agents if p.is_good()]
+            game.update_winner_after_assassination(assassin.assassinate(goods))  # pyright: ignore[reportAttributeAccessIssue]
+
+    return game
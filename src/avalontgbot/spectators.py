@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import secrets
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from telegram.error import BadRequest, Forbidden, TelegramError
+
+from .constants import SPECTATE_CODE_BYTES, SPECTATOR_QUEUE_CAPACITY, SPECTATOR_RATE
+from .game import GameKey
+
+logger = logging.getLogger(__name__)
+
+
+class SpectatorFeed:
+    """
+    Mirrors public game announcements to the chats following the game.
+    Publishing only queues the rendered event, shared by all its subscribers; a background
+    task sends it to each of them under a global rate limit, so the game's own group never
+    waits for spectators. When the queue is full, new events are dropped.
+    Chats follow a game with a random code issued for it, so only the ones it was shown to can.
+    Codes and subscriptions can be shared with other nodes, so whichever node handles the next
+    update of a game mirrors it.
+    """
+
+    def __init__(
+        self,
+        rate: float = SPECTATOR_RATE,
+        capacity: int = SPECTATOR_QUEUE_CAPACITY,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        """
+        :param rate: messages sent per second, across all games
+        :param capacity: number of events waiting to be sent
+        :param clock: monotonic clock, replaceable in tests
+        :param sleep: coroutine waiting some seconds, replaceable in tests
+        """
+        self._interval: float = 1 / rate
+        self._capacity: int = capacity
+        self._clock: Callable[[], float] = clock
+        self._sleep: Callable[[float], Awaitable[Any]] = sleep
+        # game key => subscriber chat ids
+        self._subscribers: dict[GameKey, set[int]] = {}
+        # game key => code of the game, and back
+        self._codes: dict[GameKey, str] = {}
+        self._games: dict[str, GameKey] = {}
+        # games whose code changed, and (game key, chat id) subscriptions changed, since the last
+        # call to changes, None until its first call
+        self._changed: tuple[set[GameKey], set[tuple[GameKey, int]]] | None = None
+        # (bot, text, parse mode, subscriber chat ids) of the events to send
+        self._events: deque[tuple[Any, str, str | None, tuple[int, ...]]] = deque()
+        # earliest time of the next message
+        self._next_send: float = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        # number of events dropped because the queue was full
+        self.dropped: int = 0
+
+    def issue_code(self, key: GameKey) -> str:
+        """
+        :return: the code spectators follow the game with, issued on the first call
+        """
+        if (code := self._codes.get(key)) is None:
+            code = secrets.token_urlsafe(SPECTATE_CODE_BYTES)
+            self.restore_code(key, code)
+            if self._changed is not None:
+                self._changed[0].add(key)
+
+        return code
+
+    def code(self, key: GameKey) -> str | None:
+        """
+        :return: the code of the game, None if not issued yet
+        """
+        return self._codes.get(key)
+
+    def restore_code(self, key: GameKey, code: str) -> None:
+        """
+        Keep the code issued for a game elsewhere, e.g. by the node or process that started it.
+        """
+        self._codes[key] = code
+        self._games[code] = key
+
+    def find(self, code: str) -> GameKey | None:
+        """
+        :return: the key of the game with the code, None if there is none
+        """
+        return self._games.get(code)
+
+    def codes(self) -> dict[GameKey, str]:
+        """
+        :return: the codes issued, by game key
+        """
+        return dict(self._codes)
+
+    def subscribe(self, key: GameKey, chat_id: int) -> None:
+        """
+        Start mirroring the announcements of a game to a chat.
+        """
+        self._subscribers.setdefault(key, set()).add(chat_id)
+        if self._changed is not None:
+            self._changed[1].add((key, chat_id))
+
+    def unsubscribe(self, key: GameKey, chat_id: int) -> bool:
+        """
+        Stop mirroring the announcements of a game to a chat.
+        :return: True if the chat was subscribed, False otherwise
+        """
+        if not self._remove(key, chat_id):
+            return False
+
+        if self._changed is not None:
+            self._changed[1].add((key, chat_id))
+
+        return True
+
+    def _remove(self, key: GameKey, chat_id: int) -> bool:
+        if chat_id not in (chats := self._subscribers.get(key, set())):
+            return False
+
+        chats.remove(chat_id)
+        if len(chats) == 0:
+            del self._subscribers[key]
+
+        return True
+
+    def close(self, key: GameKey) -> None:
+        """
+        Drop the subscribers and the code of a finished game, events already published are still sent.
+        """
+        if self._changed is not None:
+            self._changed[0].add(key)
+            self._changed[1].update((key, chat_id) for chat_id in self._subscribers.get(key, ()))
+
+        self._drop(key)
+
+    def _drop(self, key: GameKey) -> None:
+        _ = self._subscribers.pop(key, None)
+        if (code := self._codes.pop(key, None)) is not None:
+            del self._games[code]
+
+    def changes(self) -> tuple[dict[GameKey, str | None], dict[tuple[GameKey, int], bool]]:
+        """
+        Take the codes and subscriptions changed since the last call, to share them with other nodes.
+        Changes are tracked from the first call on.
+        :return: game key => code, None if closed, and (game key, chat id) => whether subscribed
+        """
+        (codes, subscriptions), self._changed = self._changed or (set(), set()), (set(), set())
+        return (
+            {key: self._codes.get(key) for key in codes},
+            {(key, chat_id): chat_id in self._subscribers.get(key, ()) for key, chat_id in subscriptions},
+        )
+
+    def apply_code(self, key: GameKey, code: str | None) -> None:
+        """
+        Take the code of a game started on another node, or drop the game closed there.
+        """
+        if code is None:
+            self._drop(key)
+        else:
+            self.restore_code(key, code)
+
+    def apply_subscription(self, key: GameKey, chat_id: int, subscribed: bool) -> None:
+        """
+        Take a chat following a game, or no longer, from another node, unless changed here since
+        the last call to changes, which is shared next. Games without a code are closed, and
+        the chats following them are left out.
+        """
+        if key not in self._codes or (self._changed is not None and (key, chat_id) in self._changed[1]):
+            return
+
+        if subscribed:
+            self._subscribers.setdefault(key, set()).add(chat_id)
+        else:
+            _ = self._remove(key, chat_id)
+
+    def has_subscribers(self, key: GameKey) -> bool:
+        return key in self._subscribers
+
+    def subscriptions(self) -> list[tuple[GameKey, set[int]]]:
+        """
+        :return: (game key, subscriber chat ids) pairs of the games followed
+        """
+        return list(self._subscribers.items())
+
+    def publish(self, bot: Any, key: GameKey, text: str, parse_mode: str | None = None) -> bool:
+        """
+        Queue an event for the subscribers of a game, without waiting for it to be sent.
+        :param bot: the bot sending the event, not an outbox bound to an update
+        :param text: the rendered event
+        :return: True if queued, False if nobody follows the game or the queue is full
+        """
+        if (chats := self._subscribers.get(key)) is None:
+            return False
+
+        if len(self._events) >= self._capacity:
+            self.dropped += 1
+            logger.warning(f"Spectator queue is full, dropped an event ({self.dropped} so far)")
+            return False
+
+        self._events.append((bot, text, parse_mode, tuple(chats)))
+        self._ensure_worker().set()
+
+        return True
+
+    async def drain(self) -> None:
+        """
+        Wait until every queued event is sent.
+        """
+        # events leave the queue once sent to every subscriber
+        while self._events:
+            await asyncio.sleep(0)
+
+    def _ensure_worker(self) -> asyncio.Event:
+        """
+        Start the background task of the running event loop, if not running yet.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+        return self._wakeup  # pyright: ignore[reportReturnType]
+
+    async def _run(self) -> None:
+        wakeup: asyncio.Event = self._wakeup  # pyright: ignore[reportAssignmentType]
+
+        while True:
+            await wakeup.wait()
+
+            while self._events:
+                bot, text, parse_mode, chats = self._events[0]
+                for chat_id in chats:
+                    await self._send(bot, chat_id, text, parse_mode)
+                _ = self._events.popleft()
+
+            wakeup.clear()
+
+    async def _send(self, bot: Any, chat_id: int, text: str, parse_mode: str | None) -> None:
+        if (delay := self._next_send - self._clock()) > 0:
+            await self._sleep(delay)
+        self._next_send = max(self._next_send, self._clock()) + self._interval
+
+        try:
+            _ = await bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+        except (BadRequest, Forbidden) as e:
+            # the chat removed the bot or cannot be written to anymore
+            logger.error(f"Error mirroring to spectator chat {chat_id}: {e}")
+            for key in [k for k, chats in self._subscribers.items() if chat_id in chats]:
+                _ = self.unsubscribe(key, chat_id)
+        except TelegramError as e:
+            logger.error(f"Error mirroring to spectator chat {chat_id}: {e}")
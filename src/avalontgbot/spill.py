@@ -0,0 +1,155 @@
+import sqlite3
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from .backend import decode_key, encode_key
+from .constants import SPILL_IDLE
+from .game import Game, GameKey
+from .gamephase import GamePhase as PHASE
+
+
+def spill_database(bot_id: int) -> Path:
+    """
+    :return: the local database of the lobbies spilled by a bot, shared with its next process on
+        handoffs, one per bot so the processes of other bots on the machine never drop its lobbies
+    """
+    return Path(tempfile.gettempdir()) / f"avalontgbot-spill-{bot_id}.db"
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (key TEXT PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS polls (poll_id TEXT PRIMARY KEY, key TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS polls_key ON polls (key);
+"""
+
+
+class SpillStore:
+    """
+    Lobbies nobody touched for a while, moved out of memory to a local SQLite database,
+    and moved back on the next update of their game, before it is handled.
+    The spilled keys are also kept in memory, so updates of other games never read the database.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        dump: Callable[[GameKey], tuple[bytes, list[str]] | None],
+        load: Callable[[GameKey, bytes | None], None],
+        games: dict[GameKey, Game],
+        idle: float = SPILL_IDLE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param path: the database file, created if missing
+        :param dump: serializes a local game, with the ids of its polls
+        :param load: replaces a local game with a serialized one, or removes it given None
+        :param games: the local games
+        :param idle: seconds a lobby is kept in memory after its last update
+        :param clock: monotonic clock, replaceable in tests
+        """
+        self._dump: Callable[[GameKey], tuple[bytes, list[str]] | None] = dump
+        self._load: Callable[[GameKey, bytes | None], None] = load
+        self._games: dict[GameKey, Game] = games
+        self._idle: float = idle
+        self._clock: Callable[[], float] = clock
+        # game key => time of its last update
+        self._touched: dict[GameKey, float] = {}
+        self._spilled: set[GameKey] = set()
+
+        # spilled games only have to outlive the process until its successor takes them, not a crash
+        self._db: sqlite3.Connection = sqlite3.connect(path)
+        _ = self._db.execute("PRAGMA journal_mode=WAL")
+        _ = self._db.execute("PRAGMA synchronous=OFF")
+        _ = self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def recover(self, handed_over: bool) -> None:
+        """
+        Take over the games spilled by the previous process, or forget them if its games were lost.
+        Called once the previous process stopped spilling, i.e. after the handoff.
+        :param handed_over: True if the previous process handed its games over
+        """
+        if not handed_over:
+            with self._db:
+                _ = self._db.execute("DELETE FROM games")
+                _ = self._db.execute("DELETE FROM polls")
+
+        self._spilled = {decode_key(key) for (key,) in self._db.execute("SELECT key FROM games")}
+
+    def touch(self, key: GameKey) -> None:
+        """
+        Mark a game as used, moving it back to memory if spilled. Call it before handling its updates.
+        """
+        self._touched[key] = self._clock()
+
+        if key not in self._spilled:
+            return
+
+        row = self._db.execute("SELECT data FROM games WHERE key = ?", (encode_key(key),)).fetchone()
+
+        # a copy in memory is newer, e.g. taken over while the previous process was spilling
+        if row is not None and key not in self._games:
+            self._load(key, row[0])
+
+        # only once loaded, so a game failing to load stays on disk for the next try
+        self._spilled.discard(key)
+        with self._db:
+            _ = self._db.execute("DELETE FROM games WHERE key = ?", (encode_key(key),))
+            _ = self._db.execute("DELETE FROM polls WHERE key = ?", (encode_key(key),))
+
+    def spill(self) -> int:
+        """
+        Move the lobbies idle for longer than allowed out of memory.
+        :return: the number of lobbies moved
+        """
+        now = self._clock()
+
+        # games never updated here, e.g. taken over, are idle from now on
+        for key in self._games.keys() - self._touched.keys():
+            self._touched[key] = now
+        for key in self._touched.keys() - self._games.keys():
+            del self._touched[key]
+
+        idle = [
+            (key, dumped)
+            for key, game in self._games.items()
+            if game.phase == PHASE.LOBBY
+            and now - self._touched[key] >= self._idle
+            and (dumped := self._dump(key)) is not None
+        ]
+        if not idle:
+            return 0
+
+        with self._db:
+            for key, (data, polls) in idle:
+                _ = self._db.execute("INSERT OR REPLACE INTO games VALUES (?, ?)", (encode_key(key), data))
+                _ = self._db.executemany(
+                    "INSERT OR REPLACE INTO polls VALUES (?, ?)", ((p, encode_key(key)) for p in polls)
+                )
+
+        for key, _ in idle:
+            self._load(key, None)
+            self._spilled.add(key)
+            del self._touched[key]
+
+        return len(idle)
+
+    def find_poll(self, poll_id: str) -> GameKey | None:
+        """
+        :return: the key of the spilled game that sent the poll, None if not spilled
+        """
+        if not self._spilled:
+            return None
+
+        row = self._db.execute("SELECT key FROM polls WHERE poll_id = ?", (poll_id,)).fetchone()
+        return decode_key(row[0]) if row is not None else None
+
+    def __contains__(self, key: GameKey) -> bool:
+        return key in self._spilled
+
+    def __len__(self) -> int:
+        return len(self._spilled)
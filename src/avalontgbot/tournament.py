@@ -0,0 +1,136 @@
+import math
+import random
+
+from .constants import MAX_PLAYERS, MIN_PLAYERS
+from .game import Game, GameKey
+from .i18n import CatalogError
+from .player import Player
+
+
+def seat_tables(players: list[Player]) -> list[list[Player]]:
+    """
+    Split players into as few tables as possible, with sizes differing by at most one.
+    :param players: the players to seat, in seating order
+    :return: the tables, consecutive players sitting together
+    """
+    if len(players) < MIN_PLAYERS:
+        raise CatalogError("tournament.few_players", min=MIN_PLAYERS)
+
+    num_tables = math.ceil(len(players) / MAX_PLAYERS)
+    size, bigger = divmod(len(players), num_tables)
+
+    tables: list[list[Player]] = []
+    start = 0
+    for i in range(num_tables):
+        end = start + size + (i < bigger)
+        tables.append(players[start:end])
+        start = end
+
+    return tables
+
+
+class Tournament:
+    """
+    A series of rounds played by a roster at many tables at once, in topics of a forum group.
+    The first round is seated at random, the next ones by standings (Swiss style), so
+    players with similar scores meet. Every player on the winning side of a game scores a point.
+    """
+
+    def __init__(self, organizer: Player, id: int, rounds: int):
+        """
+        :param organizer: the player running the tournament
+        :param id: the id of the forum group hosting the tables
+        :param rounds: the number of rounds to play
+        """
+        if rounds < 1:
+            raise CatalogError("tournament.no_rounds")
+
+        self.organizer: Player = organizer
+        self.id: int = id
+        self.rounds: int = rounds
+        self.round: int = 0
+        self.roster: list[Player] = [organizer]
+        # user id => points, players of the tables are not the roster objects
+        self.points: dict[int, int] = {organizer.userid: 0}
+        # tables of the current round still playing
+        self._pending: set[GameKey] = set()
+
+    def enter(self, player: Player) -> None:
+        """
+        Add a player to the roster, before the first round.
+        """
+        if self.round > 0:
+            raise CatalogError("tournament.started")
+        if player.userid in self.points:
+            raise CatalogError("tournament.already_entered")
+
+        self.roster.append(player)
+        self.points[player.userid] = 0
+
+    def start_round(self, rng: random.Random | None = None) -> list[list[Player]]:
+        """
+        Seat the roster for the next round.
+        :param rng: source of randomness for the first round, replaceable in tests
+        :return: the players of each table
+        """
+        if self._pending:
+            raise CatalogError("tournament.playing", tables=len(self._pending))
+        if self.is_over:
+            raise CatalogError("tournament.finished")
+
+        if self.round == 0:
+            order = list(self.roster)
+            (rng or random.Random()).shuffle(order)
+        else:
+            # stable, so ties keep the order of the previous round
+            order = sorted(self.roster, key=lambda p: -self.points[p.userid])
+
+        tables = seat_tables(order)
+        self.round += 1
+
+        return tables
+
+    def add_table(self, key: GameKey) -> None:
+        """
+        Record a table of the current round as playing.
+        """
+        self._pending.add(key)
+
+    def abandon(self, key: GameKey) -> None:
+        """
+        Forget a table that will not finish, e.g. a deleted game, without scoring it.
+        """
+        self._pending.discard(key)
+
+    def record(self, game: Game) -> bool:
+        """
+        Score a finished table of the current round.
+        :param game: the finished game
+        :return: True if it was the last table of the round, False otherwise
+        """
+        if game.key not in self._pending:
+            return False
+
+        self._pending.remove(game.key)
+
+        for player in game.players:
+            if game.winner is not None and player.is_good() == game.winner:
+                self.points[player.userid] += 1
+
+        return len(self._pending) == 0
+
+    def standings(self) -> list[tuple[Player, int]]:
+        """
+        :return: (player, points) pairs, best first
+        """
+        return sorted(
+            ((p, self.points[p.userid]) for p in self.roster), key=lambda x: -x[1]
+        )
+
+    @property
+    def pending(self) -> set[GameKey]:
+        return set(self._pending)
+
+    @property
+    def is_over(self) -> bool:
+        return self.round == self.rounds and len(self._pending) == 0
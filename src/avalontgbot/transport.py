@@ -0,0 +1,141 @@
+from collections.abc import Mapping
+from typing import Any
+
+import httpx
+from telegram.ext import ApplicationBuilder
+from telegram.request import HTTPXRequest
+
+
+class TransportProfile:
+    """
+    HTTP settings of the connections of a bot to the Bot API. Long polling (get_updates)
+    has a pool of its own, so that a waiting poll never holds a connection the sends need.
+    """
+
+    # field => type, as set from the environment
+    FIELDS: dict[str, type] = {
+        "pool_size": int,
+        "updates_pool_size": int,
+        "keepalive": int,
+        "keepalive_expiry": float,
+        "http2": bool,
+        "connect_timeout": float,
+        "read_timeout": float,
+        "write_timeout": float,
+        "pool_timeout": float,
+    }
+
+    def __init__(
+        self,
+        name: str,
+        pool_size: int = 256,
+        updates_pool_size: int = 1,
+        keepalive: int = 256,
+        keepalive_expiry: float = 5.0,
+        http2: bool = False,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 5.0,
+        write_timeout: float = 5.0,
+        pool_timeout: float = 1.0,
+    ):
+        """
+        The defaults are the ones of python-telegram-bot.
+        :param pool_size: connections open at most for the sends (messages, polls, edits...)
+        :param updates_pool_size: connections open at most for get_updates
+        :param keepalive: idle connections kept open, to be reused without connecting again
+        :param keepalive_expiry: seconds an idle connection is kept open
+        :param http2: send the requests over HTTP/2, which needs python-telegram-bot[http2]
+        :param connect_timeout: seconds to connect to the Bot API
+        :param read_timeout: seconds to wait for a response, long polling waits longer
+        :param write_timeout: seconds to send a request
+        :param pool_timeout: seconds to wait for a free connection of the pool
+        """
+        if min(pool_size, updates_pool_size) < 1 or keepalive < 0:
+            raise ValueError("Pools need at least a connection, and cannot keep a negative number of them.")
+
+        self.name: str = name
+        self.pool_size: int = pool_size
+        self.updates_pool_size: int = updates_pool_size
+        self.keepalive: int = keepalive
+        self.keepalive_expiry: float = keepalive_expiry
+        self.http2: bool = http2
+        self.connect_timeout: float = connect_timeout
+        self.read_timeout: float = read_timeout
+        self.write_timeout: float = write_timeout
+        self.pool_timeout: float = pool_timeout
+
+    def __repr__(self) -> str:
+        return f"TransportProfile({self.name}, {', '.join(f'{f}={getattr(self, f)}' for f in self.FIELDS)})"
+
+    def request(self, pool_size: int) -> HTTPXRequest:
+        """
+        :return: a client with the settings of the profile and a pool of the given size
+        """
+        return HTTPXRequest(
+            connection_pool_size=pool_size,
+            read_timeout=self.read_timeout,
+            write_timeout=self.write_timeout,
+            connect_timeout=self.connect_timeout,
+            pool_timeout=self.pool_timeout,
+            http_version="2" if self.http2 else "1.1",
+            httpx_kwargs={
+                "limits": httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=min(self.keepalive, pool_size),
+                    keepalive_expiry=self.keepalive_expiry,
+                )
+            },
+        )
+
+    def configure(self, builder: ApplicationBuilder) -> ApplicationBuilder:
+        """
+        Set the clients of the profile on an application being built.
+        :raises RuntimeError: if HTTP/2 is asked but not installed
+        """
+        return builder.request(self.request(self.pool_size)).get_updates_request(
+            self.request(self.updates_pool_size)
+        )
+
+
+# named profiles, chosen with TRANSPORT_PROFILE
+PROFILES: dict[str, TransportProfile] = {
+    # as python-telegram-bot connects by default
+    "default": TransportProfile("default"),
+    # bursts of sends (role DMs, vote edits): a few connections stay open between the phases
+    # of a game, and a burst waits for them instead of opening one per send, which costs more
+    # than it saves, see benchmarks/bench_transport.py
+    "burst": TransportProfile("burst", pool_size=16, keepalive=16, keepalive_expiry=120.0, pool_timeout=10.0),
+    # fewest connections, e.g. on a small host
+    "lean": TransportProfile("lean", pool_size=4, keepalive=4, keepalive_expiry=30.0, pool_timeout=30.0),
+    # every send multiplexed over a few HTTP/2 connections
+    "http2": TransportProfile("http2", pool_size=4, keepalive=4, keepalive_expiry=120.0, http2=True, pool_timeout=10.0),
+}
+
+
+def load_profile(name: str = "default", overrides: Mapping[str, str] | None = None) -> TransportProfile:
+    """
+    Pick a named profile, changing some of its settings.
+    :param overrides: field => value as text, e.g. {"pool_size": "32", "http2": "true"}
+    :return: the profile
+    :raises ValueError: if the profile, a field or a value is not valid
+    """
+    if (profile := PROFILES.get(name)) is None:
+        raise ValueError(f"Unknown transport profile: {name}. Available: {', '.join(PROFILES)}")
+
+    fields: dict[str, Any] = {f: getattr(profile, f) for f in TransportProfile.FIELDS}
+
+    for field, text in (overrides or {}).items():
+        if (kind := TransportProfile.FIELDS.get(field)) is None:
+            raise ValueError(f"Unknown transport setting: {field}. Available: {', '.join(TransportProfile.FIELDS)}")
+
+        if kind is bool:
+            if text.lower() not in ("1", "0", "true", "false", "yes", "no"):
+                raise ValueError(f"Transport setting {field} must be true or false, not {text}.")
+            fields[field] = text.lower() in ("1", "true", "yes")
+        else:
+            try:
+                fields[field] = kind(text)
+            except ValueError:
+                raise ValueError(f"Transport setting {field} must be a number, not {text}.") from None
+
+    return TransportProfile(name, **fields)
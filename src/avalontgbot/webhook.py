@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Any
+
+from telegram import Update
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookRouter:
+    """
+    One web server taking the updates of every bot from Telegram, each bot at the path of its
+    token and its updates put in the queue of its application, since the bots share one port.
+    Needs the webhooks extra of python-telegram-bot, whose request handler it uses.
+    """
+
+    def __init__(self, url: str, port: int, listen: str = "0.0.0.0"):
+        """
+        :param url: the public url Telegram sends the updates to, the token of each bot is appended
+        :param port: the local port of the server
+        :param listen: the local address of the server
+        """
+        self._url: str = url.rstrip("/")
+        self._port: int = port
+        self._listen: str = listen
+        self._server: Any = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    async def start(self, applications: list[Application], drop_pending_updates: bool = False) -> None:
+        """
+        Serve the webhooks of the applications, then point each bot to its own.
+        :param drop_pending_updates: True to drop the updates sent before, e.g. stale ones
+        """
+        try:
+            from telegram.ext._utils.webhookhandler import TelegramHandler, WebhookAppClass, WebhookServer
+        except ImportError:
+            raise RuntimeError(
+                "Webhooks need the webhooks extra: pip install 'python-telegram-bot[webhooks]'"
+            ) from None
+
+        first, *others = applications
+        app = WebhookAppClass(f"/{first.bot.token}", first.bot, first.update_queue)
+        app.add_handlers(
+            r".*",
+            [
+                (
+                    rf"/{a.bot.token}/?",
+                    TelegramHandler,
+                    {"bot": a.bot, "update_queue": a.update_queue, "secret_token": None},
+                )
+                for a in others
+            ],
+        )
+
+        server = WebhookServer(self._listen, self._port, app, None)
+        ready = asyncio.Event()
+        await server.serve_forever(ready)
+        await ready.wait()
+        self._server = server
+
+        for application in applications:
+            _ = await application.bot.set_webhook(
+                url=f"{self._url}/{application.bot.token}",
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=drop_pending_updates,
+            )
+
+        logger.warning(f"Taking the updates of {len(applications)} bots on port {self._port}")
+
+    async def stop(self) -> None:
+        """
+        Stop taking updates, the ones already taken stay in the queues of the applications.
+        The webhooks stay set, so Telegram keeps the updates for the next server.
+        """
+        if self._server is None:
+            return
+
+        await self._server.shutdown()
+        self._server = None
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+
+class FakeBot:
+    """
+    Stand-in for the Telegram bot recording every API call.
+    """
+
+    def __init__(self, id: int = 0):
+        self.id: int = id
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+        self._next_id: int = 0
+
+    def _record(self, method: str, kwargs: dict[str, Any]) -> int:
+        self.calls.append((method, kwargs))
+        self._next_id += 1
+        return self._next_id
+
+    def count(self, method: str | None = None) -> int:
+        return sum(1 for m, _ in self.calls if method is None or m == method)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any):
+        msg_id = self._record("send_message", {"chat_id": chat_id, "text": text, **kwargs})
+        return SimpleNamespace(message_id=msg_id, chat_id=chat_id, text=text)
+
+    async def send_poll(self, chat_id: int, question: str, options: list[str], **kwargs: Any):
+        msg_id = self._record(
+            "send_poll", {"chat_id": chat_id, "question": question, "options": options, **kwargs}
+        )
+        return SimpleNamespace(message_id=msg_id, poll=SimpleNamespace(id=f"poll{msg_id}"))
+
+    async def get_chat(self, chat_id: int):
+        _ = self._record("get_chat", {"chat_id": chat_id})
+        return SimpleNamespace(id=chat_id, title="Test group")
+
+    async def create_forum_topic(self, chat_id: int, name: str, **kwargs: Any):
+        thread_id = self._record("create_forum_topic", {"chat_id": chat_id, "name": name, **kwargs})
+        return SimpleNamespace(message_thread_id=thread_id, name=name)
+
+    def __getattr__(self, name: str):
+        async def call(**kwargs: Any) -> bool:
+            _ = self._record(name, kwargs)
+            return True
+
+        return call
+
+
+@pytest.fixture
+def fake_bot() -> FakeBot:
+    return FakeBot()
+
+
+def fake_context(bot: Any) -> SimpleNamespace:
+    return SimpleNamespace(bot=bot, bot_data={})
@@ -0,0 +1,106 @@
+import asyncio
+import pickle
+import random
+from types import SimpleNamespace
+from typing import Any
+
+from avalontgbot import controller
+from avalontgbot.agent import Agent, next_agent_id
+from avalontgbot.controller import handle_add_bots, handle_start_game
+from avalontgbot.game import Game
+from avalontgbot.gamephase import GamePhase as PHASE
+from avalontgbot.player import Player
+from avalontgbot.role import Role as ROLE
+from avalontgbot.simulator import agent_game, play
+
+from conftest import FakeBot, fake_context
+
+GROUP_ID = -500
+
+
+def test_agents_play_to_the_end():
+    rng = random.Random(0)
+
+    for n in range(5, 11):
+        game = play(agent_game(n, [ROLE.PERCIVAL, ROLE.MORGANA] if n >= 7 else [], rng))
+
+        assert game.phase == PHASE.GAME_OVER
+        assert game.winner is not None
+
+
+def test_decisions_follow_knowledge():
+    game = agent_game(5, rng=random.Random(1))
+    merlin = next(p for p in game.players if p.role == ROLE.MERLIN)
+    evil = game.evil_list()
+
+    # Merlin never proposes evil players and rejects their teams
+    team = merlin.propose_team(game)  # pyright: ignore[reportAttributeAccessIssue]
+    assert not any(p in evil for p in team)
+
+    game.create_team([merlin, evil[0]])
+    assert not merlin.decide(game)  # pyright: ignore[reportAttributeAccessIssue]
+    assert evil[1].decide(game)  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test_only_first_evil_fails():
+    game = agent_game(7, rng=random.Random(2))
+    evil = game.evil_list()
+    good = [p for p in game.players if p.is_good()]
+
+    for team in ([good[0], evil[0], evil[1]], [good[0], evil[1], evil[0]]):
+        game.team = team
+        game.phase = PHASE.QUEST
+        assert [p.decide(game) for p in team] == [True, False, True]  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test_bots_fill_the_lobby(fake_bot: FakeBot):
+    async def reply_text(text: str, **kwargs: Any):
+        return None
+
+    host = Player(1, "Host")
+    game = Game(host, GROUP_ID)
+    controller.existingGames[game.key] = game
+    controller.reachableUsers.mark_reachable(1)
+
+    update = SimpleNamespace(
+        message=SimpleNamespace(
+            chat_id=GROUP_ID, message_thread_id=None, is_topic_message=False, reply_text=reply_text
+        ),
+        effective_user=SimpleNamespace(id=1),
+    )
+    context = fake_context(fake_bot)
+    context.args = []
+
+    try:
+        asyncio.run(handle_add_bots(update, context))  # pyright: ignore[reportArgumentType]
+        assert len(game.players) == 5
+        assert all(isinstance(p, Agent) for p in game.players[1:])
+        assert [p.userid for p in game.players[1:]] == [-1, -2, -3, -4]
+
+        # agents need no private chat
+        asyncio.run(handle_start_game(update, context))  # pyright: ignore[reportArgumentType]
+
+        assert game.phase != PHASE.LOBBY
+        private = {
+            kw["chat_id"]
+            for method, kw in fake_bot.calls
+            if method in ("send_message", "send_poll") and kw["chat_id"] > 0
+        }
+        assert private == {1}
+    finally:
+        # the game waits for a human leader, remove it with its polls and board
+        controller._remove_game(game.key)
+
+
+def test_agent_ids_come_from_the_game():
+    game = Game(Player(1, "Host"), GROUP_ID)
+    assert next_agent_id(game) == -1
+
+    game.player_join(Agent(next_agent_id(game)))
+    game.player_join(Agent(next_agent_id(game)))
+
+    # a new process, or another node, goes on from the game it took over
+    copy = pickle.loads(pickle.dumps(game))
+    copy.player_join(Agent(next_agent_id(copy)))
+
+    assert [p.userid for p in copy.players] == [1, -1, -2, -3]
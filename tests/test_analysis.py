@@ -0,0 +1,81 @@
+import asyncio
+
+from conftest import FakeBot, fake_context
+
+from avalontgbot.analysis import GameRecord, analyse
+from avalontgbot.controller import _routine_end_game, existingGames, postMortems
+from avalontgbot.game import Game
+from avalontgbot.player import Player
+from avalontgbot.role import Role as ROLE
+
+GROUP_ID = -1200
+
+
+def played_game() -> Game:
+    """
+    Two missions on five seats, the first two evil: the first mission, with an evil
+    in the team, is approved by all but seat 3 and fails; the second, all good, is only
+    approved by its team and succeeds.
+    """
+    game = Game(Player(1, "Player1"), GROUP_ID)
+    for i in range(2, 6):
+        game.player_join(Player(i, f"Player{i}"))
+    game.start_game()
+
+    game.players.sort(key=lambda p: p.userid)
+    for player, role in zip(game.players, [ROLE.ASSASSIN, ROLE.MOM, ROLE.MERLIN, ROLE.LSOA, ROLE.LSOA]):
+        player.role = role
+
+    for team, approvals, outcome in (
+        ([0, 2], [True, True, True, False, True], [False, True]),
+        ([2, 3, 4], [False, False, True, True, True], [True, True, True]),
+    ):
+        game.create_team([game.players[s] for s in team])
+        for player, vote in zip(game.players, approvals):
+            _ = game.add_player_vote(player, vote)
+        assert game.update_after_team_decision()
+
+        for player, vote in zip(game.team, outcome):
+            _ = game.add_player_vote(player, vote)
+        _ = game.update_after_mission()
+
+    return game
+
+
+def test_vote_matrices():
+    result = analyse(GameRecord(played_game()))
+
+    # the evils voted alike, seat 3 voted against both every time
+    assert result.agreement[0][1] == result.agreement[1][0] == 1.0
+    assert result.agreement[0][3] == 0.0
+    assert result.agreement[2][2] == 1.0
+    assert result.agreement[1][3] == 0.0
+    assert result.pairs()[0] == (1.0, 0, 1) and result.pairs()[-1][0] == 0.0
+
+    assert result.approval == {0: (1, 1), 1: (1, 1)}
+    assert result.proposed == [1, 0, 0, 0, 0]
+    assert result.approved == [1, 1, 1, 0, 1]
+
+
+def test_summary_follows_the_end_of_the_game(fake_bot: FakeBot):
+    game = played_game()
+    game.winner = False
+    existingGames[game.key] = game
+
+    async def end():
+        await _routine_end_game(fake_context(fake_bot), game)  # pyright: ignore[reportArgumentType]
+        sent = fake_bot.count("send_message")
+        # the analysis runs in a worker process, after the end of the game was announced
+        _ = await asyncio.gather(*postMortems)
+        return sent
+
+    sent = asyncio.run(end())
+
+    assert game.key not in existingGames
+    assert fake_bot.count("send_message") == sent + 1
+
+    _, summary = fake_bot.calls[-1]
+    assert summary["chat_id"] == GROUP_ID
+    assert "Player1 and Player2 (100%)" in summary["text"]
+    assert "and Player4 (0%)" in summary["text"]
+    assert "proposed by Player1, approved by Player1, Player2, Player3, Player5" in summary["text"]
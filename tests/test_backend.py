@@ -0,0 +1,272 @@
+import asyncio
+import pickle
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from avalontgbot.backend import GameStore, SharedEntry, SQLiteBackend, VersionConflict, note_new_game
+from avalontgbot.controller import (
+    _remove_game,
+    activePolls,
+    dump_game,
+    existingGames,
+    load_game,
+)
+from avalontgbot.dispatch import UpdateEvent as UPDATE
+from avalontgbot.game import Game, GameKey
+from avalontgbot.player import Player
+
+GROUP_ID = -1100
+
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Node:
+    """
+    A node of the bot with its own games, sharing them through the database.
+    """
+
+    def __init__(self, name: str, path: Path, clock=None, wait: float = 5):
+        self.games: dict[GameKey, Game] = {}
+        # a shared registry, and its entries changed here since they were last shared
+        self.registry: dict[str, int] = {}
+        self.changed: set[str] = set()
+        self.backend = SQLiteBackend(path, clock) if clock else SQLiteBackend(path)
+        self.store = GameStore(
+            self.backend,
+            name,
+            self.dump,
+            self.load,
+            self.dump_shared,
+            self.load_shared,
+            ttl=10,
+            wait=wait,
+            retry=0.001,
+        )
+
+    def dump(self, key: GameKey) -> tuple[bytes, list[str]] | None:
+        return (pickle.dumps(self.games[key]), []) if key in self.games else None
+
+    def load(self, key: GameKey, data: bytes | None) -> None:
+        _ = self.games.pop(key, None)
+        if data is not None:
+            self.games[key] = pickle.loads(data)
+
+
+    def set(self, key: str, value: int) -> None:
+        self.registry[key] = value
+        self.changed.add(key)
+
+    def dump_shared(self) -> list[SharedEntry]:
+        entries = [("counts", k, str(self.registry[k]).encode()) for k in self.changed]
+        self.changed.clear()
+        return entries
+
+    def load_shared(self, entry: SharedEntry) -> None:
+        _, key, data = entry
+        assert data is not None
+        self.registry[key] = int(data)
+
+
+def voting_game() -> Game:
+    game = Game(Player(1, "Player1"), GROUP_ID)
+    for i in range(2, 11):
+        game.player_join(Player(i, f"Player{i}"))
+    game.start_game()
+    game.create_team(game.players[: game.team_sizes[game.turn]])
+    return game
+
+
+def test_concurrent_votes_on_two_nodes(tmp_path: Path):
+    a, b = Node("a", tmp_path / "state.db"), Node("b", tmp_path / "state.db")
+    game = voting_game()
+    key = game.key
+
+    async def create():
+        async with a.store.checkout(key):
+            a.games[key] = game
+
+    async def vote(node: Node, userid: int):
+        async with node.store.checkout(key):
+            local = node.games[key]
+            # the other node tries to vote meanwhile
+            await asyncio.sleep(0.002)
+            _ = local.add_player_vote(local.lookup_player(userid), True)
+
+    async def scenario():
+        await create()
+        await asyncio.gather(*(vote(a if i % 2 else b, i) for i in range(1, 11)))
+
+    asyncio.run(scenario())
+
+    version, data = a.backend.load(key)
+    shared: Game = pickle.loads(data)  # pyright: ignore[reportArgumentType]
+
+    # every vote was counted once, in its own version
+    assert sorted(p.userid for p in shared.votes) == list(range(1, 11))
+    assert version == 11
+
+
+def test_lease_failover(tmp_path: Path):
+    clock = FakeClock()
+    a = Node("a", tmp_path / "state.db", clock)
+    b = Node("b", tmp_path / "state.db", clock, wait=0.05)
+    game = voting_game()
+    key = game.key
+
+    async def scenario():
+        async with a.store.checkout(key):
+            a.games[key] = game
+
+        with pytest.raises(VersionConflict):
+            async with a.store.checkout(key):
+                _ = a.games[key].add_player_vote(a.games[key].players[0], True)
+
+                # a stalls: b cannot take the game while the lease of a lasts
+                with pytest.raises(TimeoutError):
+                    async with b.store.checkout(key):
+                        pass
+
+                # then its lease expires, and b takes the game over
+                clock.now += 11
+                async with b.store.checkout(key):
+                    _ = b.games[key].add_player_vote(b.games[key].players[1], False)
+
+            # a writes on leaving, and finds out it lost the game
+
+    asyncio.run(scenario())
+
+    # the vote of the stalled node is dropped, the one of b is kept, everywhere
+    for node in (a, b):
+        assert [(p.userid, v) for p, v in node.games[key].votes.items()] == [(game.players[1].userid, False)]
+    assert a.backend.load(key)[0] == 2
+
+
+def test_polls_are_found_from_any_node(tmp_path: Path):
+    game = voting_game()
+    existingGames[game.key] = game
+    activePolls["poll-a"] = (UPDATE.TEAM_POLL, 3, game.key)
+
+    a = GameStore(SQLiteBackend(tmp_path / "state.db"), "a", dump_game, load_game)
+    b = SQLiteBackend(tmp_path / "state.db")
+
+    async def share():
+        async with a.checkout(game.key):
+            pass
+
+    asyncio.run(share())
+    version, data = b.load(game.key)
+    _remove_game(game.key)
+
+    assert b.find_poll("poll-a") == game.key
+    assert b.find_poll("unknown") is None
+
+    # another node loads the game with its poll
+    load_game(game.key, data)
+    assert [p.userid for p in existingGames[game.key].players] == [p.userid for p in game.players]
+    assert activePolls["poll-a"] == (UPDATE.TEAM_POLL, 3, game.key)
+
+    # and removing it removes its poll
+    load_game(game.key, None)
+    assert game.key not in existingGames and "poll-a" not in activePolls
+
+
+def test_loop_runs_while_another_node_writes(tmp_path: Path):
+    a = Node("a", tmp_path / "state.db")
+    game = voting_game()
+    a.games[game.key] = game
+    # another node in the middle of a write, e.g. waiting for the disk
+    other = sqlite3.connect(tmp_path / "state.db", isolation_level=None)
+    _ = other.execute("BEGIN IMMEDIATE")
+
+    async def scenario() -> int:
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(tick())
+        # the other node finishes its write after a while, from the loop
+        _ = asyncio.get_running_loop().call_later(0.2, other.execute, "COMMIT")
+
+        async with a.store.checkout(game.key):
+            pass
+
+        _ = ticking.cancel()
+        return ticks
+
+    # the loop went on while the checkout waited for the database
+    assert asyncio.run(scenario()) >= 10
+    assert a.backend.load(game.key)[0] == 1
+    other.close()
+
+
+def test_registries_shared_between_nodes(tmp_path: Path):
+    a, b = Node("a", tmp_path / "state.db"), Node("b", tmp_path / "state.db")
+    game = voting_game()
+
+    async def count(node: Node, key: GameKey):
+        # e.g. joining the matchmaking queue, which takes turns among the nodes by its key
+        async with node.store.checkout(key):
+            value = node.registry.get("queued", 0)
+            await asyncio.sleep(0.002)
+            node.set("queued", value + 1)
+
+    async def scenario():
+        # e.g. a private /start, holding no game
+        async with a.store.sharing():
+            a.set("started", 1)
+        await asyncio.gather(*(count(a if i % 2 else b, ("queue",)) for i in range(10)))  # pyright: ignore[reportArgumentType]
+
+        # a game update gets the changes of the other nodes too
+        async with b.store.checkout(game.key):
+            assert b.registry == {"started": 1, "queued": 10}
+        async with a.store.sharing():
+            pass
+
+    asyncio.run(scenario())
+
+    assert a.registry == b.registry == {"started": 1, "queued": 10}
+    # each entry written once per change, without echoes, and no game for the key of the queue
+    assert a.backend.changes("c", 0)[-1][0] == 11
+    assert a.backend.load(("queue",)) == (0, None)  # pyright: ignore[reportArgumentType]
+
+
+def test_new_games_written_by_the_update_creating_them(tmp_path: Path):
+    a = Node("a", tmp_path / "state.db")
+    table = voting_game()
+    other = (GROUP_ID - 1, None)
+
+    async def open_table(opened: asyncio.Event, done: asyncio.Event):
+        # e.g. /nextround, still seating the players of the table it opened
+        async with a.store.checkout(("tournament", GROUP_ID)):  # pyright: ignore[reportArgumentType]
+            a.games[table.key] = table
+            note_new_game(table.key)
+            opened.set()
+            await done.wait()
+
+    async def scenario() -> tuple[int, int]:
+        opened, done = asyncio.Event(), asyncio.Event()
+        opening = asyncio.create_task(open_table(opened, done))
+        await opened.wait()
+
+        # an update of another game ends meanwhile, leaving the new table alone
+        async with a.store.checkout(other):
+            pass
+        during = a.backend.load(table.key)[0]
+
+        done.set()
+        await opening
+        return during, a.backend.load(table.key)[0]
+
+    assert asyncio.run(scenario()) == (0, 1)
@@ -0,0 +1,36 @@
+import asyncio
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from telegram import Chat, Message, Update, User
+from telegram.constants import ChatType
+
+# no lobby is spilled to disk while testing
+os.environ.setdefault("SPILL_DB", "")
+
+from avalontgbot import bot  # noqa: E402
+from avalontgbot.backend import GameStore, SQLiteBackend  # noqa: E402
+from avalontgbot.controller import dump_game, load_game  # noqa: E402
+
+
+def message_update(chat_id: int, chat_type: str, text: str) -> Update:
+    message = Message(1, datetime.now(), Chat(chat_id, chat_type), from_user=User(5, "User5", False), text=text)
+    return Update(1, message=message)
+
+
+def test_private_chats_hold_no_game(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    private = message_update(5, ChatType.PRIVATE, "/start")
+    assert bot.update_key(private) == 5
+    assert bot.update_key(message_update(-5, ChatType.SUPERGROUP, "/join")) == (-5, None)
+
+    backend = SQLiteBackend(tmp_path / "state.db")
+    monkeypatch.setattr(bot, "gameStore", GameStore(backend, "a", dump_game, load_game))
+
+    async def leases() -> list[tuple[str]]:
+        async with bot.hold_game(bot.update_key(private)):
+            return backend._db.execute("SELECT key FROM leases").fetchall()
+
+    # a private /start only keeps the shared registries in step
+    assert asyncio.run(leases()) == []
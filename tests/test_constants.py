@@ -0,0 +1,38 @@
+from pytest import raises
+
+from avalontgbot.constants import (
+    LEGAL_SETUPS,
+    MANDATORY_ROLES,
+    MAX_PLAYERS,
+    MIN_PLAYERS,
+    PLAYERS_TO_RULES,
+    SELECTABLE_ROLES,
+    SETUP_MIN_PLAYERS,
+)
+from avalontgbot.role import Role
+
+
+def test_legal_setups_fill():
+    for (num_players, special_roles), roles in LEGAL_SETUPS.items():
+        assert len(roles) == num_players
+        assert sum(r.is_good for r in roles) == PLAYERS_TO_RULES[num_players]["num_goods"]
+        assert {r for r in roles if r.is_special} == special_roles
+        assert MANDATORY_ROLES <= special_roles
+
+
+def test_legal_setups_rules():
+    morgana_alone = frozenset(MANDATORY_ROLES | {Role.MORGANA})
+    assert morgana_alone not in SETUP_MIN_PLAYERS
+
+    # 5 players only have 2 evil seats
+    three_evils = frozenset(MANDATORY_ROLES | {Role.MORDRED, Role.OBERON})
+    assert (MIN_PLAYERS, three_evils) not in LEGAL_SETUPS
+    assert SETUP_MIN_PLAYERS[three_evils] == 7
+
+    assert SETUP_MIN_PLAYERS[frozenset(MANDATORY_ROLES)] == MIN_PLAYERS
+    assert SETUP_MIN_PLAYERS[frozenset(MANDATORY_ROLES.union(SELECTABLE_ROLES))] == MAX_PLAYERS
+
+
+def test_legal_setups_immutable():
+    with raises(TypeError):
+        LEGAL_SETUPS[(MIN_PLAYERS, frozenset())] = ()  # pyright: ignore[reportIndexIssue]
@@ -0,0 +1,95 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from avalontgbot.controller import (
+    _send_public_decision_message,
+    existingGames,
+    game_key,
+    handle_create_game,
+)
+from avalontgbot.outbox import Outbox
+
+from conftest import FakeBot, fake_context
+
+GROUP_ID = -300
+
+
+def message(thread_id: int | None, is_topic: bool = True) -> SimpleNamespace:
+    async def reply_text(text: str, **kwargs):
+        return None
+
+    return SimpleNamespace(
+        chat_id=GROUP_ID,
+        message_thread_id=thread_id,
+        is_topic_message=is_topic,
+        reply_text=reply_text,
+    )
+
+
+def create_update(thread_id: int | None, user_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        message=message(thread_id),
+        effective_user=SimpleNamespace(id=user_id, full_name=f"User{user_id}"),
+    )
+
+
+@pytest.fixture
+def topic_games():
+    for thread_id, user_id in [(11, 1), (12, 2)]:
+        asyncio.run(handle_create_game(create_update(thread_id, user_id), fake_context(FakeBot())))  # pyright: ignore[reportArgumentType]
+
+    yield existingGames[(GROUP_ID, 11)], existingGames[(GROUP_ID, 12)]
+
+    for thread_id in (11, 12):
+        _ = existingGames.pop((GROUP_ID, thread_id), None)
+
+
+def test_game_key_topics():
+    assert game_key(message(11)) == (GROUP_ID, 11)  # pyright: ignore[reportArgumentType]
+    # reply threads outside forums are not separate games
+    assert game_key(message(11, is_topic=False)) == (GROUP_ID, None)  # pyright: ignore[reportArgumentType]
+
+
+def test_one_game_per_topic(topic_games):
+    first, second = topic_games
+
+    assert first is not second
+    assert first.host.userid == 1 and second.host.userid == 2
+    assert first.thread_id == 11 and second.thread_id == 12
+
+    with pytest.raises(ValueError):
+        asyncio.run(handle_create_game(create_update(11, 3), fake_context(FakeBot())))  # pyright: ignore[reportArgumentType]
+
+
+def test_votes_target_topic(topic_games, fake_bot: FakeBot):
+    _, second = topic_games
+
+    asyncio.run(_send_public_decision_message(second.players, fake_context(fake_bot), second))  # pyright: ignore[reportArgumentType]
+
+    _, kwargs = fake_bot.calls[0]
+    assert kwargs["chat_id"] == GROUP_ID
+    assert kwargs["message_thread_id"] == 12
+
+    # the buttons lead back to the game of the topic
+    data = json.loads(kwargs["reply_markup"].inline_keyboard[0][0].callback_data)
+    assert existingGames[(data["gid"], data["tid"])] is second
+
+
+def test_outbox_keeps_topics_apart(fake_bot: FakeBot):
+    outbox = Outbox(fake_bot)  # pyright: ignore[reportArgumentType]
+
+    async def send():
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="a", message_thread_id=11)
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="b", message_thread_id=11)
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="c", message_thread_id=12)
+        await outbox.flush()
+
+    asyncio.run(send())
+
+    assert [(kw["text"], kw["message_thread_id"]) for _, kw in fake_bot.calls] == [
+        ("a\nb", 11),
+        ("c", 12),
+    ]
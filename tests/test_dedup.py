@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from avalontgbot.dedup import UpdateDeduplicator
+
+
+def update(update_id: int, callback_id: str | None = None, poll_answer=None):
+    return SimpleNamespace(
+        update_id=update_id,
+        callback_query=SimpleNamespace(id=callback_id) if callback_id else None,
+        poll_answer=poll_answer,
+    )
+
+
+def poll_answer(poll_id: str, user_id: int, options: list[int]):
+    return SimpleNamespace(poll_id=poll_id, user=SimpleNamespace(id=user_id), option_ids=options)
+
+
+def test_redelivered_update():
+    dedup = UpdateDeduplicator()
+
+    assert not dedup.is_duplicate(update(1))  # pyright: ignore[reportArgumentType]
+    assert dedup.is_duplicate(update(1))  # pyright: ignore[reportArgumentType]
+    assert not dedup.is_duplicate(update(2))  # pyright: ignore[reportArgumentType]
+    assert dedup.suppressed == 1
+
+
+def test_same_callback_in_new_update():
+    dedup = UpdateDeduplicator()
+
+    assert not dedup.is_duplicate(update(1, "cb"))  # pyright: ignore[reportArgumentType]
+    assert dedup.is_duplicate(update(2, "cb"))  # pyright: ignore[reportArgumentType]
+
+
+def test_recast_poll_answer():
+    dedup = UpdateDeduplicator()
+
+    assert not dedup.is_duplicate(update(1, poll_answer=poll_answer("p", 7, [0])))  # pyright: ignore[reportArgumentType]
+    # retracted, then cast again: the same answer in a new update
+    assert not dedup.is_duplicate(update(2, poll_answer=poll_answer("p", 7, [])))  # pyright: ignore[reportArgumentType]
+    assert not dedup.is_duplicate(update(3, poll_answer=poll_answer("p", 7, [0])))  # pyright: ignore[reportArgumentType]
+    assert dedup.is_duplicate(update(3, poll_answer=poll_answer("p", 7, [0])))  # pyright: ignore[reportArgumentType]
+    assert dedup.suppressed == 1
+
+
+def test_window_eviction():
+    dedup = UpdateDeduplicator(window=3)
+
+    for i in range(5):
+        assert not dedup.is_duplicate(update(i))  # pyright: ignore[reportArgumentType]
+
+    assert len(dedup) == 3
+    # the oldest updates are forgotten
+    assert not dedup.is_duplicate(update(0))  # pyright: ignore[reportArgumentType]
+    assert dedup.is_duplicate(update(4))  # pyright: ignore[reportArgumentType]
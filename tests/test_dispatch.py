@@ -0,0 +1,39 @@
+from pytest import raises
+
+from avalontgbot.dispatch import Dispatcher, UpdateEvent as UPDATE
+from avalontgbot.gamephase import GamePhase as PHASE
+
+
+def test_register_and_resolve():
+    dispatcher = Dispatcher()
+
+    @dispatcher.register(UPDATE.VOTES_COMPLETE, PHASE.BUILD_TEAM, PHASE.QUEST)
+    def handler():
+        return "handled"
+
+    assert dispatcher.resolve(PHASE.BUILD_TEAM, UPDATE.VOTES_COMPLETE) is handler
+    assert dispatcher.resolve(PHASE.QUEST, UPDATE.VOTES_COMPLETE)() == "handled"
+    assert (PHASE.LOBBY, UPDATE.VOTES_COMPLETE) not in dispatcher
+
+
+def test_unregistered_event_rejected():
+    dispatcher = Dispatcher()
+
+    assert raises(ValueError, dispatcher.resolve, PHASE.LOBBY, UPDATE.TEAM_POLL)
+
+
+def test_duplicate_registration_rejected():
+    dispatcher = Dispatcher()
+    _ = dispatcher.register(UPDATE.HOST_POLL, PHASE.LOBBY)(lambda: None)
+
+    assert raises(ValueError, dispatcher.register(UPDATE.HOST_POLL, PHASE.LOBBY), lambda: None)
+
+
+def test_controller_registry():
+    from avalontgbot.controller import dispatcher as controller_dispatcher
+
+    assert (PHASE.LOBBY, UPDATE.ROLES_POLL) in controller_dispatcher
+    assert (PHASE.BUILD_TEAM, UPDATE.TEAM_POLL) in controller_dispatcher
+    assert (PHASE.LAST_CHANCE, UPDATE.ASSASSIN_POLL) in controller_dispatcher
+    assert (PHASE.QUEST, UPDATE.TEAM_POLL) not in controller_dispatcher
+    assert all((p, UPDATE.HOST_POLL) in controller_dispatcher for p in PHASE if p != PHASE.GAME_OVER)
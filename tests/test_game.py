@@ -12,7 +12,7 @@ from avalontgbot.game import (
 )
 from avalontgbot.gamephase import GamePhase as PHASE
 from avalontgbot.player import Player
-from avalontgbot.role import Role
+from avalontgbot.role import Appearance, Role
 
 
 @pytest.fixture
@@ -220,3 +220,36 @@ def test_pass_creator(started_game: Game):
 #
 #     # check that the team is set correctly
 #     assert started_game.team == [p for p in started_game.players if p.userid in team]
+
+
+def test_required_players(game: Game, new_players: list[Player]):
+    add_players_to_game(game, new_players)
+
+    assert game.required_players == MIN_PLAYERS
+    assert game.are_enough_players()
+
+    game.set_special_roles([Role.MORDRED, Role.OBERON])
+    assert game.required_players == 7
+    assert not game.are_enough_players()
+
+
+def test_night_knowledge(game: Game):
+    add_players_to_game(game, players(6))
+    game.set_special_roles([Role.PERCIVAL, Role.MORGANA, Role.MORDRED])
+    game.start_game()
+
+    knowledge = game.night_knowledge()
+    by_role = {p.role: p for p in game.players if p.role != Role.LSOA}
+
+    merlin_sees = knowledge[by_role[Role.MERLIN]]
+    assert set(merlin_sees[Appearance.EVIL]) == {by_role[Role.ASSASSIN], by_role[Role.MORGANA]}
+
+    percival_sees = knowledge[by_role[Role.PERCIVAL]]
+    assert set(percival_sees[Appearance.MERLIN]) == {by_role[Role.MERLIN], by_role[Role.MORGANA]}
+    # seat order, so the order does not tell Merlin and Morgana apart
+    seats = [game.players.index(p) for p in percival_sees[Appearance.MERLIN]]
+    assert seats == sorted(seats)
+
+    mordred_sees = knowledge[by_role[Role.MORDRED]]
+    assert by_role[Role.MORDRED] not in mordred_sees[Appearance.TEAMMATE]
+    assert len(mordred_sees[Appearance.TEAMMATE]) == 2
@@ -0,0 +1,58 @@
+import pytest
+from pytest import raises
+
+from avalontgbot.game import Game
+from avalontgbot.gamephase import TRANSITIONS, GameEvent as EVENT
+from avalontgbot.gamephase import GamePhase as PHASE
+from avalontgbot.gamephase import next_phase
+from avalontgbot.player import Player
+
+
+@pytest.fixture
+def started_game() -> Game:
+    game = Game(Player(0, "Creator"), 1)
+    for i in range(1, 5):
+        game.player_join(Player(i, f"Player{i}"))
+    game.start_game()
+    return game
+
+
+def test_next_phase_follows_table():
+    for (phase, event), target in TRANSITIONS.items():
+        assert next_phase(phase, event) == target
+
+
+def test_invalid_transition_rejected():
+    assert raises(ValueError, next_phase, PHASE.LOBBY, EVENT.TEAM_APPROVED)
+    assert raises(ValueError, next_phase, PHASE.GAME_OVER, EVENT.START)
+
+
+def test_game_over_is_terminal():
+    assert all(phase != PHASE.GAME_OVER for phase, _ in TRANSITIONS)
+
+
+def test_start_twice_rejected(started_game: Game):
+    assert started_game.phase == PHASE.BUILD_TEAM
+    assert raises(ValueError, started_game.start_game)
+
+
+def test_team_approval_moves_to_quest(started_game: Game):
+    for p in started_game.players:
+        _ = started_game.add_player_vote(p, True)
+
+    assert started_game.update_after_team_decision()
+    assert started_game.phase == PHASE.QUEST
+
+
+def test_rejections_end_game(started_game: Game):
+    for _ in range(5):
+        for p in started_game.players:
+            _ = started_game.add_player_vote(p, False)
+        _ = started_game.update_after_team_decision()
+
+    assert started_game.winner is False
+    assert started_game.phase == PHASE.GAME_OVER
+
+
+def test_assassination_outside_last_chance_rejected(started_game: Game):
+    assert raises(ValueError, started_game.update_winner_after_assassination, 0)
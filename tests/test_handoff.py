@@ -0,0 +1,283 @@
+import asyncio
+import json
+import pickle
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from telegram.error import Forbidden
+
+from avalontgbot import controller
+from avalontgbot.controller import (
+    _private_bot,
+    _remove_game,
+    activePolls,
+    button_vote_handler,
+    dump_state,
+    existingGames,
+    load_state,
+    matchmakingQueue,
+    reachableUsers,
+    scoreboards,
+    spectatorFeed,
+    translator,
+)
+from avalontgbot.dispatch import UpdateEvent as UPDATE
+from avalontgbot.game import Game
+from avalontgbot.gamephase import GamePhase as PHASE
+from avalontgbot.handoff import HandoffServer, take_over
+from avalontgbot.player import Player
+from avalontgbot.pool import BotPool
+from avalontgbot.scoreboard import Scoreboard
+
+from conftest import FakeBot, fake_context
+
+GROUP_ID = -1000
+
+
+def voting_game() -> Game:
+    game = Game(Player(1, "Player1"), GROUP_ID)
+    for i in range(2, 11):
+        game.player_join(Player(i, f"Player{i}"))
+    game.start_game()
+    game.create_team(game.players[: game.team_sizes[game.turn]])
+    return game
+
+
+def press(game: Game, player: Player) -> SimpleNamespace:
+    async def noop(**kwargs):
+        return True
+
+    return SimpleNamespace(
+        data=json.dumps({"vote": "yes", "gid": game.id, "tid": game.thread_id}),
+        from_user=SimpleNamespace(id=player.userid),
+        answer=noop,
+        edit_message_text=noop,
+        delete_message=noop,
+    )
+
+
+class Intake:
+    """
+    Takes the button presses waiting at Telegram one at a time, like a process of the bot.
+    """
+
+    def __init__(self, waiting: asyncio.Queue, context):
+        self.waiting: asyncio.Queue = waiting
+        self.context = context
+        self.handled: int = 0
+        self._stop: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def release(self) -> bytes:
+        # stop taking presses, and finish the one being handled
+        self._stop.set()
+        await self._task
+        return dump_state()
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            if self.waiting.empty():
+                await asyncio.sleep(0.001)
+                continue
+            await button_vote_handler(self.waiting.get_nowait(), None, self.context)
+            self.handled += 1
+
+
+def fresh_process() -> None:
+    # the new process starts without any game
+    existingGames.clear()
+    activePolls.clear()
+    scoreboards.clear()
+
+
+def test_handoff_mid_vote_loses_no_vote(fake_bot: FakeBot, tmp_path: Path):
+    game = voting_game()
+    existingGames[game.key] = game
+    voters = game.players[:9]
+
+    async def scenario() -> tuple[float, float]:
+        waiting: asyncio.Queue = asyncio.Queue()
+
+        # players keep voting during the deploy
+        async def vote():
+            for player in voters:
+                waiting.put_nowait(press(game, player))
+                await asyncio.sleep(0.005)
+
+        voting = asyncio.create_task(vote())
+
+        old = Intake(waiting, fake_context(fake_bot))
+        handed_over = asyncio.Event()
+        server = HandoffServer(old.release, old.start, handed_over.set, tmp_path / "handoff.sock")
+        await old.start()
+        await server.start()
+
+        # deploy while the vote goes on
+        while old.handled < 3:
+            await asyncio.sleep(0.001)
+
+        new = Intake(waiting, fake_context(fake_bot))
+
+        def load(state: bytes) -> None:
+            fresh_process()
+            load_state(state)
+
+        released_at = await take_over(load, tmp_path / "handoff.sock")
+        await new.start()
+        taken_at = time.time()
+
+        await handed_over.wait()
+        await server.close()
+
+        await voting
+        while not waiting.empty():
+            await asyncio.sleep(0.001)
+        _ = await new.release()
+
+        assert old.handled >= 3 and new.handled > 0
+        assert old.handled + new.handled == len(voters)
+
+        return released_at, taken_at
+
+    released_at, taken_at = asyncio.run(scenario())
+
+    new_game = existingGames[game.key]
+    _remove_game(game.key)
+
+    assert new_game is not game
+    assert [p.userid for p in new_game.votes] == [p.userid for p in voters]
+    assert new_game.phase == PHASE.BUILD_TEAM
+    # no update was taken for a few milliseconds only
+    assert taken_at - released_at < 0.5
+
+
+def test_refused_handoff_resumes(tmp_path: Path):
+    resumed: list[bool] = []
+
+    async def release() -> bytes:
+        return b"state"
+
+    async def resume() -> None:
+        resumed.append(True)
+
+    def refuse(state: bytes) -> None:
+        raise ValueError("incompatible state")
+
+    async def scenario():
+        server = HandoffServer(release, resume, lambda: pytest.fail("handed over"), tmp_path / "handoff.sock")
+        await server.start()
+
+        with pytest.raises(ValueError):
+            _ = await take_over(refuse, tmp_path / "handoff.sock")
+
+        while not resumed:
+            await asyncio.sleep(0.001)
+        await server.close()
+
+        assert not server.handed_over
+        # no process left, nothing to take over
+        assert await take_over(refuse, tmp_path / "handoff.sock") is None
+
+    asyncio.run(scenario())
+
+
+def test_state_round_trip():
+    game = voting_game()
+    _ = game.add_player_vote(game.players[0], False)
+    existingGames[game.key] = game
+    activePolls["poll1"] = (UPDATE.TEAM_POLL, 5, game.key)
+    translator.set_language(GROUP_ID, "it")
+    board = scoreboards[game.key] = Scoreboard(lambda key, **kw: translator.render(GROUP_ID, key, **kw))
+    _ = board.update(game)
+    board.message_id = 7
+    code = spectatorFeed.issue_code(game.key)
+    reachableUsers.mark_unreachable(77)
+    _ = matchmakingQueue.enqueue(Player(78, "Queued"), [5, 6], [])
+
+    state = dump_state()
+    fresh_process()
+    spectatorFeed.close(game.key)
+    reachableUsers.forget(77)
+    _ = matchmakingQueue.dequeue(78)
+    load_state(state)
+
+    restored = existingGames[game.key]
+    assert list(restored.votes.values()) == [False]
+    assert restored.players[0] in restored.votes
+    assert activePolls["poll1"] == (UPDATE.TEAM_POLL, 5, game.key)
+    assert scoreboards[game.key].message_id == 7
+    # the board of the new process has nothing to edit until the game changes
+    assert not scoreboards[game.key].update(restored)
+    assert translator.language(GROUP_ID) == "it"
+    # spectators follow the game with the code shown by the old process
+    assert spectatorFeed.find(code) == game.key
+    # and the users keep their place in the queue and what is known of them
+    assert reachableUsers.status(77) is False
+    assert 78 in matchmakingQueue and matchmakingQueue.waited(78) < 1  # pyright: ignore[reportOptionalOperand]
+
+    _remove_game(game.key)
+    reachableUsers.forget(77)
+    _ = matchmakingQueue.dequeue(78)
+    translator.set_language(GROUP_ID, "en")
+
+    with pytest.raises(ValueError):
+        load_state(pickle.dumps({"version": 0}))
+
+
+def test_bot_pool_round_trip(monkeypatch: pytest.MonkeyPatch):
+    group_bot, private_bot = FakeBot(111), FakeBot(222)
+    monkeypatch.setattr(controller, "botPool", BotPool())
+    for bot in (group_bot, private_bot):
+        controller.botPool.add(bot)
+    _ = controller.botPool.pin_chat(GROUP_ID, group_bot.id)
+    controller.botPool.note_user(5, private_bot.id)
+
+    state = dump_state()
+    # the new process builds its bots again, knowing no group nor user
+    monkeypatch.setattr(controller, "botPool", BotPool())
+    for bot in (FakeBot(111), FakeBot(222)):
+        controller.botPool.add(bot)
+    load_state(state)
+
+    # the player is still messaged through the bot they started
+    assert _private_bot(fake_context(FakeBot(111)), 5).id == 222
+    assert controller.botPool.for_chat(GROUP_ID).id == 111
+
+
+class PollBlockedBot(FakeBot):
+    """
+    Bot the players never started, so every private poll fails.
+    """
+
+    async def send_poll(self, chat_id: int, question: str, options: list[str], **kwargs: Any):
+        raise Forbidden("Forbidden: bot can't initiate conversation with a user")
+
+
+def test_failed_private_poll_is_announced():
+    game = voting_game()
+    existingGames[game.key] = game
+    bot = PollBlockedBot()
+
+    async def scenario():
+        # the last vote rejects the team, and the poll of the next leader cannot be sent
+        for player in game.players:
+            query = press(game, player)
+            query.data = json.dumps({"vote": "no", "gid": game.id, "tid": game.thread_id})
+            await button_vote_handler(query, None, fake_context(bot))  # pyright: ignore[reportArgumentType]
+
+    try:
+        asyncio.run(scenario())
+        assert any(
+            kw["chat_id"] == GROUP_ID and kw["text"].startswith(translator.render(GROUP_ID, "error.private_failed", error=""))
+            for method, kw in bot.calls
+            if method == "send_message"
+        )
+    finally:
+        _remove_game(game.key)
@@ -0,0 +1,59 @@
+import asyncio
+import importlib.util
+import time
+
+import pytest
+
+from avalontgbot.health import LagHistogram, LoopMonitor, loop_factory
+from avalontgbot.profiler import SamplingProfiler
+
+
+def test_lag_histogram():
+    histogram = LagHistogram((0.001, 0.01, 0.1))
+    for lag in [0.0005] * 97 + [0.005, 0.05, 2.0]:
+        histogram.record(lag)
+
+    assert histogram.counts == [97, 1, 1, 1]
+    assert histogram.quantile(0.5) == 0.001
+    assert histogram.quantile(0.99) == 0.1
+    assert histogram.quantile(1) == float("inf")
+    assert histogram.max == 2.0
+    assert "100 samples" in histogram.summary() and "100-inf ms: 1" in histogram.summary()
+
+
+async def blocking_handler() -> None:
+    # e.g. a synchronous file read
+    time.sleep(0.3)
+
+
+def test_monitor_finds_the_handler_holding_the_loop():
+    monitor = LoopMonitor(SamplingProfiler(handlers_module=__name__).collapse, interval=0.01, threshold=0.1)
+
+    async def scenario():
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        # handlers run in tasks of their own
+        await asyncio.create_task(blocking_handler())
+        await asyncio.sleep(0.05)
+        _ = task.cancel()
+
+    asyncio.run(scenario())
+
+    assert monitor.stalls == {"blocking_handler": 1}
+    assert monitor.histogram.max >= 0.25
+    assert monitor.histogram.quantile(0.5) <= 0.01
+    assert "held by blocking_handler: 1 times" in monitor.summary()
+
+
+def test_event_loops():
+    assert loop_factory("asyncio") is None
+
+    with pytest.raises(ValueError):
+        _ = loop_factory("tokio")
+
+    if importlib.util.find_spec("uvloop") is None:
+        with pytest.raises(ValueError):
+            _ = loop_factory("uvloop")
+    else:
+        with asyncio.Runner(loop_factory=loop_factory("uvloop")) as runner:
+            assert runner.run(asyncio.sleep(0, "ran")) == "ran"
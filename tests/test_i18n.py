@@ -0,0 +1,114 @@
+import json
+import string
+
+import pytest
+
+from avalontgbot.game import Game
+from avalontgbot.i18n import LOCALES_DIR, Catalog, CatalogError, Translator, compile_template
+from avalontgbot.player import Player
+
+
+def fields(template: str) -> set[str]:
+    return {f for _, f, _, _ in string.Formatter().parse(template) if f is not None}
+
+
+def test_compile_template():
+    assert compile_template("Hi {name}!")(name="Ann") == "Hi Ann!"
+    assert compile_template("{n:>3}|{x!r}|{n}")(n=7, x="a") == "  7|'a'|7"
+    assert compile_template("no fields")() == "no fields"
+    assert compile_template("")() == ""
+    # literal braces, quotes and escapes survive compilation
+    assert compile_template("{{x}} '\"\\\n {x}")(x=1) == "{x} '\"\\\n 1"
+    # unused arguments are ignored, missing ones are an error
+    assert compile_template("{x}")(x=1, y=2) == "1"
+
+    with pytest.raises(KeyError):
+        _ = compile_template("{x}")()
+
+
+def test_compile_template_rejects_expressions():
+    with pytest.raises(ValueError):
+        _ = compile_template("{0}")
+
+    with pytest.raises(ValueError):
+        _ = compile_template("{x.__class__}")
+
+    with pytest.raises(ValueError):
+        _ = compile_template("{x:{y}}")
+
+    with pytest.raises(ValueError):
+        _ = compile_template("{x!z}")
+
+
+def test_catalog_fallback():
+    en = Catalog("en", {"hi": "Hi {name}", "bye": "Bye"})
+    it = Catalog("it", {"hi": "Ciao {name}"}, en)
+
+    assert it.render("hi", name="Ann") == "Ciao Ann"
+    assert it.render("bye") == "Bye"
+    assert "bye" in it and "missing" not in it
+
+    with pytest.raises(KeyError):
+        _ = it.render("missing")
+
+
+def test_language_per_chat():
+    en = Catalog("en", {"hi": "Hi"})
+    translator = Translator({"en": en, "it": Catalog("it", {"hi": "Ciao"}, en)})
+
+    translator.set_language(1, "it")
+
+    assert translator.render(1, "hi") == "Ciao"
+    assert translator.render(2, "hi") == "Hi"
+    assert translator.language(2) == "en"
+
+    with pytest.raises(ValueError):
+        translator.set_language(1, "xx")
+
+
+def test_errors_in_the_language_of_the_chat():
+    translator = Translator.load()
+    translator.set_language(1, "it")
+    game = Game(Player(1, "Ann"), 1)
+
+    with pytest.raises(CatalogError) as error:
+        game.pass_host(Player(2, "Bob"))
+
+    assert translator.explain(1, error.value) == "Il giocatore non è nella partita."
+    assert translator.explain(2, error.value) == "Player not in game."
+    assert translator.explain(1, ValueError("plain")) == "plain"
+
+
+def test_pages_are_built_once_per_language():
+    en = Catalog("en", {})
+    translator = Translator({"en": en, "it": Catalog("it", {}, en)})
+    built: list[str] = []
+
+    def build(language: str) -> str:
+        built.append(language)
+        return f"rules in {language}"
+
+    translator.set_language(3, "it")
+
+    for chat_id in (1, 2, 3, 3, 1):
+        _ = translator.page(chat_id, "rules", build)
+
+    assert translator.page(3, "rules", build) == "rules in it"
+    assert built == ["en", "it"]
+
+
+def test_shipped_catalogs():
+    translator = Translator.load()
+    english = json.loads((LOCALES_DIR / "en.json").read_text(encoding="utf-8"))
+
+    assert translator.language(0) == "en"
+    assert "it" in translator.languages
+
+    for path in LOCALES_DIR.glob("*.json"):
+        templates = json.loads(path.read_text(encoding="utf-8"))
+
+        # translations have the keys and fields of the English catalog, no more, no less
+        assert templates.keys() == english.keys(), (path.name, english.keys() ^ templates.keys())
+        for key, template in templates.items():
+            assert key in english, (path.name, key)
+            assert fields(template) == fields(english[key]), (path.name, key)
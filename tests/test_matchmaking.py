@@ -0,0 +1,225 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from telegram.constants import ChatType
+from telegram.error import Forbidden
+
+from avalontgbot.constants import MANDATORY_ROLES
+from avalontgbot.controller import (
+    _routine_matched_game,
+    existingGames,
+    handle_join_queue,
+    matchmakingQueue,
+    reachableUsers,
+)
+from avalontgbot.matchmaking import MatchmakingQueue, parse_preferences
+from avalontgbot.player import Player
+from avalontgbot.role import Role as ROLE
+
+from conftest import FakeBot, fake_context
+
+VENUE = -600
+
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_parse_preferences():
+    assert parse_preferences([]) == ([5, 6, 7, 8, 9, 10], [])
+    assert parse_preferences(["6-7", "Percival", "morgana"]) == (
+        [6, 7],
+        [ROLE.PERCIVAL, ROLE.MORGANA],
+    )
+    assert parse_preferences(["8"]) == ([8], [])
+
+    with pytest.raises(ValueError):
+        _ = parse_preferences(["5-x"])
+    with pytest.raises(ValueError):
+        _ = parse_preferences(["nobody"])
+
+
+def test_match_forms_when_bucket_is_full():
+    queue = MatchmakingQueue()
+
+    for i in range(4):
+        assert queue.enqueue(Player(i, f"P{i}"), [5], []) is None
+    # a different role set waits in its own bucket
+    assert queue.enqueue(Player(10, "P10"), [5], [ROLE.PERCIVAL]) is None
+
+    match = queue.enqueue(Player(4, "P4"), [5, 6], [])
+    assert match is not None
+
+    num_players, roles, players = match
+    assert num_players == 5
+    assert roles == frozenset({ROLE.MERLIN, ROLE.ASSASSIN})
+    assert [p.userid for p in players] == [0, 1, 2, 3, 4]
+    # matched users leave every bucket
+    assert len(queue) == 1 and 4 not in queue and 10 in queue
+
+
+def test_longest_waiting_first():
+    clock = FakeClock()
+    queue = MatchmakingQueue(clock)
+
+    for i in range(6):
+        clock.now = i
+        assert queue.enqueue(Player(i, f"P{i}"), [7, 8], []) is None
+    assert queue.waited(0) == 5
+
+    # user 6 completes the 7 player bucket
+    _, _, players = queue.enqueue(Player(6, "P6"), [5, 7], [])  # pyright: ignore[reportGeneralTypeIssues]
+    assert len(players) == 7
+    assert len(queue) == 0
+    assert queue.waited(0) is None
+
+
+def test_dequeue_and_errors():
+    queue = MatchmakingQueue()
+
+    assert queue.enqueue(Player(1, "P1"), [5], []) is None
+    with pytest.raises(ValueError):
+        _ = queue.enqueue(Player(1, "P1"), [5], [])
+
+    assert queue.dequeue(1)
+    assert not queue.dequeue(1)
+    assert len(queue) == 0
+
+    # 5 players cannot fit all the special roles
+    with pytest.raises(ValueError):
+        _ = queue.enqueue(Player(2, "P2"), [5], list(ROLE))
+
+
+def test_dump_keeps_the_order_and_waiting_times():
+    old_clock, new_clock = FakeClock(), FakeClock()
+    old = MatchmakingQueue(clock=old_clock)
+    for i in range(1, 5):
+        old_clock.now = 100 + i
+        assert old.enqueue(Player(i, f"P{i}"), [5], []) is None
+    old_clock.now = 110
+
+    new = MatchmakingQueue(clock=new_clock)
+    new.load(old.dump())
+
+    assert new.waited(1) == 9 and new.waited(4) == 6
+    # the longest waiting are still matched first
+    match = new.enqueue(Player(5, "P5"), [5], [])
+    assert match is not None and [p.userid for p in match[2]] == [1, 2, 3, 4, 5]
+
+
+class BlockedBot(FakeBot):
+    """
+    Bot blocked in private chat by some users.
+    """
+
+    def __init__(self, blocked: set[int]):
+        super().__init__()
+        self._blocked: set[int] = blocked
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any):
+        if chat_id in self._blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        return await super().send_message(chat_id, text, **kwargs)
+
+
+def matched_players() -> list[Player]:
+    return [Player(i, f"Player{i}") for i in range(601, 606)]
+
+
+def test_changes_between_nodes():
+    clock_a, clock_b = FakeClock(), FakeClock()
+    a, b = MatchmakingQueue(clock_a), MatchmakingQueue(clock_b)
+    assert a.changes() == {} and b.changes() == {}
+
+    for i in range(1, 5):
+        clock_a.now = i
+        assert a.enqueue(Player(i, f"P{i}"), [5], []) is None
+    _ = a.dequeue(2)
+    clock_a.now = 10
+
+    changes = a.changes()
+    assert changes[2] is None
+    assert {u: (e[0].userid, e[2]) for u, e in changes.items() if e is not None} == {1: (1, 9), 3: (3, 7), 4: (4, 6)}
+
+    # taken in order, without matching anyone
+    clock_b.now = 100
+    for user_id, entry in changes.items():
+        b.apply(user_id, entry)
+    assert len(b) == 3 and b.waited(1) == 9
+    assert b.changes() == {}
+
+    # the next user completes the match on the other node, longest waiting first
+    b.apply(5, (Player(5, "P5"), [(5, frozenset(MANDATORY_ROLES))], 1))
+    match = b.enqueue(Player(6, "P6"), [5], [])
+    assert match is not None and [p.userid for p in match[2]] == [1, 3, 4, 5, 6]
+    assert b.changes() == dict.fromkeys([1, 3, 4, 5, 6])
+
+
+def test_no_table_for_unreachable_players():
+    queue = matchmakingQueue
+    for i in range(601, 605):
+        assert queue.enqueue(Player(i, f"Player{i}"), [5], []) is None
+    reachableUsers.mark_unreachable(603)
+    bot = FakeBot()
+    replies: list[str] = []
+
+    async def reply_text(text: str, **kwargs: Any):
+        replies.append(text)
+
+    update = SimpleNamespace(
+        effective_chat=SimpleNamespace(id=605, type=ChatType.PRIVATE),
+        effective_user=SimpleNamespace(id=605, full_name="Player605"),
+        message=SimpleNamespace(reply_text=reply_text),
+    )
+    context = fake_context(bot)
+    context.args = ["5"]
+
+    try:
+        asyncio.run(handle_join_queue(update, context, VENUE))  # pyright: ignore[reportArgumentType]
+
+        # the blocked user leaves the queue, the others keep waiting for a fifth player
+        assert bot.count("create_forum_topic") == 0
+        assert 603 not in queue and len(queue) == 4
+        assert len(replies) == 1
+    finally:
+        for i in range(601, 606):
+            _ = queue.dequeue(i)
+            reachableUsers.forget(i)
+
+
+def test_unreachable_users_leave_before_a_match():
+    clock = FakeClock()
+    queue = MatchmakingQueue(clock)
+    blocked = {2}
+
+    for i in range(1, 6):
+        clock.now = i
+        assert queue.enqueue(Player(i, f"P{i}"), [5], [], lambda u: u not in blocked) is None
+    clock.now = 10
+
+    assert 2 not in queue and queue.waited(1) == 9
+
+    match = queue.enqueue(Player(6, "P6"), [5], [], lambda u: u not in blocked)
+    assert match is not None and [p.userid for p in match[2]] == [1, 3, 4, 5, 6]
+
+
+def test_failed_start_closes_the_table():
+    players = matched_players()
+    bot = BlockedBot({603})
+
+    try:
+        asyncio.run(_routine_matched_game(fake_context(bot), VENUE, 5, frozenset(), players))  # pyright: ignore[reportArgumentType]
+    finally:
+        for p in players:
+            reachableUsers.forget(p.userid)
+
+    assert not any(key[0] == VENUE for key in existingGames)
+    assert bot.count("delete_forum_topic") == 1
+    told = [kwargs["chat_id"] for _, kwargs in bot.calls if "could not start" in kwargs.get("text", "")]
+    assert sorted(told) == [601, 602, 604, 605]
@@ -0,0 +1,109 @@
+import asyncio
+import random
+
+from avalontgbot.agent import Agent
+from avalontgbot.controller import (
+    _routine_start_game,
+    activePolls,
+    existingGames,
+    memory_report,
+)
+from avalontgbot.dispatch import UpdateEvent as UPDATE
+from avalontgbot.game import Game
+from avalontgbot.memory import MemoryAccountant, deep_size
+from avalontgbot.player import Player
+from avalontgbot.simulator import agent_game
+
+from conftest import FakeBot, fake_context
+
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_deep_size_counts_shared_objects_once():
+    names = ["x" * 1000]
+    assert deep_size([names, names]) < 2 * deep_size(names)
+    # bigger lists hold more
+    assert deep_size(list(range(1000))) > deep_size(list(range(10)))
+
+    game = Game(Player(1, "Host"), -900)
+    size = deep_size(game)
+    for i in range(2, 10):
+        game.player_join(Player(i, f"Player{i}" * 10))
+    assert deep_size(game) > size
+
+
+def test_report_per_game_and_phase():
+    games = {g.key: g for g in (agent_game(5, rng=random.Random(i), id=-910 - i) for i in range(3))}
+    lobby = Game(Player(1, "Host"), -901)
+    games[lobby.key] = lobby
+
+    report = MemoryAccountant().report(games, {})
+
+    assert set(report.games) == set(games)
+    assert report.phase_games == {"BUILD_TEAM": 3, "LOBBY": 1}
+    assert sum(report.phase_bytes.values()) == report.total
+    assert report.leaks == []
+    assert "4 games" in report.summary()
+
+
+def test_leaked_polls_are_detected():
+    clock = FakeClock()
+    accountant = MemoryAccountant(max_age=60, clock=clock)
+    game = Game(Player(1, "Host"), -902)
+    games = {game.key: game}
+
+    polls = {
+        "live": (UPDATE.TEAM_POLL, 10, game.key),
+        # the game of this poll was removed without it
+        "orphan": (UPDATE.TEAM_POLL, 11, (-903, None)),
+    }
+
+    def registries():
+        return {"polls": [(p, entry[2], entry) for p, entry in polls.items()]}
+
+    report = accountant.report(games, registries())
+    assert [(leak.entry, leak.reason) for leak in report.leaks] == [("orphan", "orphan")]
+    assert report.games[game.key] > deep_size(game)
+
+    # the poll of the live game was never answered
+    clock.now = 61
+    report = accountant.report(games, registries())
+    assert {(leak.entry, leak.reason) for leak in report.leaks} == {
+        ("orphan", "orphan"),
+        ("live", "stale"),
+        (game.key, "stale"),
+    }
+
+
+def test_finished_games_leave_no_polls(fake_bot: FakeBot):
+    rng = random.Random(3)
+    agents = [Agent(-i, rng=rng) for i in range(1, 6)]
+    game = Game(agents[0], -904)
+    for agent in agents[1:]:
+        game.player_join(agent)
+    existingGames[game.key] = game
+
+    # deliberately leak a poll of the game, as an unanswered poll would
+    activePolls["unanswered"] = (UPDATE.TEAM_POLL, 1, game.key)
+    assert not any(leak.entry == "unanswered" for leak in memory_report().leaks)
+
+    asyncio.run(_routine_start_game(fake_context(fake_bot), game))  # pyright: ignore[reportArgumentType]
+
+    # removing the game removed its poll too
+    assert "unanswered" not in activePolls
+    assert not any(leak.registry == "polls" for leak in memory_report().leaks)
+
+    # a poll left behind by a removed game is reported
+    activePolls["leaked"] = (UPDATE.TEAM_POLL, 2, game.key)
+    leaks = memory_report().leaks
+    del activePolls["leaked"]
+
+    assert [(leak.registry, leak.entry, leak.reason) for leak in leaks] == [
+        ("polls", "leaked", "orphan")
+    ]
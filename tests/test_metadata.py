@@ -0,0 +1,81 @@
+import asyncio
+
+from pytest import raises
+
+from avalontgbot.metadata import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache: TTLCache[int, str] = TTLCache(10, 5, clock)
+
+    cache.set(1, "group")
+    clock.now = 4
+    assert cache.get(1) == "group"
+
+    clock.now = 6
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache: TTLCache[int, str] = TTLCache(2, 60)
+
+    cache.set(1, "a")
+    cache.set(2, "b")
+    # touching 1 makes 2 the least recently used
+    assert cache.get(1) == "a"
+    cache.set(3, "c")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+
+
+def test_single_flight():
+    cache: TTLCache[int, str] = TTLCache(10, 60)
+    loads = 0
+
+    async def loader() -> str:
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return "group"
+
+    async def lookup_many():
+        return await asyncio.gather(*(cache.get_or_load(1, loader) for _ in range(5)))
+
+    assert asyncio.run(lookup_many()) == ["group"] * 5
+    assert loads == 1
+
+    # cached afterwards
+    assert asyncio.run(cache.get_or_load(1, loader)) == "group"
+    assert loads == 1
+
+
+def test_failed_load_shared_and_not_cached():
+    cache: TTLCache[int, str] = TTLCache(10, 60)
+
+    async def loader() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("no chat")
+
+    async def lookup_many():
+        return await asyncio.gather(
+            *(cache.get_or_load(1, loader) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(lookup_many())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(cache) == 0
+
+    with raises(ValueError):
+        asyncio.run(cache.get_or_load(1, loader))
@@ -0,0 +1,168 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+from telegram.constants import MessageLimit
+
+from avalontgbot.controller import _routine_post_mission_phase, existingGames, scoreboards, translator
+from avalontgbot.game import Game
+from avalontgbot.outbox import Outbox, reply
+from avalontgbot.player import Player
+from avalontgbot.scoreboard import Scoreboard
+
+from conftest import FakeBot, fake_context
+
+GROUP_ID = -100
+
+
+def quest_game() -> Game:
+    game = Game(Player(1, "Creator"), GROUP_ID)
+    for i in range(2, 6):
+        game.player_join(Player(i, f"Player{i}"))
+    game.start_game()
+
+    for p in game.players:
+        _ = game.add_player_vote(p, True)
+    _ = game.update_after_team_decision()
+
+    game.create_team(game.players[: game.team_sizes[game.turn]])
+    for p in game.team:
+        _ = game.add_player_vote(p, True)
+
+    # the board pinned when the game started
+    board = scoreboards[game.key] = Scoreboard(lambda key, **kw: translator.render(GROUP_ID, key, **kw))
+    board.message_id = 1
+    _ = board.update(game)
+
+    return game
+
+
+def test_merge_consecutive_messages(fake_bot: FakeBot):
+    outbox = Outbox(fake_bot)  # pyright: ignore[reportArgumentType]
+
+    async def send():
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="a < b")
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="<b>bold</b>", parse_mode="HTML")
+        await outbox.flush()
+
+    asyncio.run(send())
+
+    assert fake_bot.count() == 1
+    _, kwargs = fake_bot.calls[0]
+    # plain text is escaped when merged with HTML
+    assert kwargs["text"] == "a &lt; b\n<b>bold</b>"
+    assert kwargs["parse_mode"] == "HTML"
+
+
+def test_reply_follows_the_held_messages(fake_bot: FakeBot):
+    outbox = Outbox(fake_bot)  # pyright: ignore[reportArgumentType]
+
+    async def reply_text(text: str, **kwargs):
+        return await fake_bot.send_message(chat_id=GROUP_ID, text=text, **kwargs)
+
+    async def send():
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="announcement")
+        _ = await reply(fake_context(outbox), SimpleNamespace(reply_text=reply_text), "reply")
+
+    asyncio.run(send())
+
+    assert [kwargs["text"] for _, kwargs in fake_bot.calls] == ["announcement", "reply"]
+
+
+def test_no_merge_across_chats_or_limit(fake_bot: FakeBot):
+    outbox = Outbox(fake_bot)  # pyright: ignore[reportArgumentType]
+    long_text = "x" * (MessageLimit.MAX_TEXT_LENGTH - 1)
+
+    async def send():
+        _ = await outbox.send_message(chat_id=GROUP_ID, text=long_text)
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="too long to merge")
+        _ = await outbox.send_message(chat_id=GROUP_ID - 1, text="other group")
+        # private messages are sent right away
+        _ = await outbox.send_message(chat_id=42, text="private")
+        await outbox.flush()
+
+    asyncio.run(send())
+
+    assert [kw["text"] for _, kw in fake_bot.calls] == [
+        long_text,
+        "too long to merge",
+        "other group",
+        "private",
+    ]
+
+
+class YieldingBot(FakeBot):
+    """
+    Bot letting other tasks run while each message is sent, as the API does.
+    """
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any):
+        await asyncio.sleep(0)
+        return await super().send_message(chat_id, text, **kwargs)
+
+
+def test_concurrent_routines_keep_their_topics():
+    fake_bot = YieldingBot()
+    outbox = Outbox(fake_bot)  # pyright: ignore[reportArgumentType]
+
+    async def table(thread_id: int):
+        for i in range(3):
+            _ = await outbox.send_message(chat_id=GROUP_ID, text=f"{thread_id}.{i}", message_thread_id=thread_id)
+            # e.g. waiting for the API, while the other tables go on
+            await asyncio.sleep(0)
+
+    async def send():
+        _ = await asyncio.gather(*(table(t) for t in (1, 2, 3)))
+        await outbox.flush()
+
+    asyncio.run(send())
+
+    sent = [kw for _, kw in fake_bot.calls]
+    assert sorted(line for kw in sent for line in kw["text"].split("\n")) == [
+        f"{t}.{i}" for t in (1, 2, 3) for i in range(3)
+    ]
+    assert all(
+        line.startswith(f"{kw['message_thread_id']}.") for kw in sent for line in kw["text"].split("\n")
+    )
+
+
+def test_other_calls_flush_first(fake_bot: FakeBot):
+    outbox = Outbox(fake_bot)  # pyright: ignore[reportArgumentType]
+
+    async def send():
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="before")
+        _ = await outbox.delete_message(chat_id=GROUP_ID, message_id=1)
+        _ = await outbox.send_message(chat_id=GROUP_ID, text="after")
+        await outbox.flush()
+
+    asyncio.run(send())
+
+    assert [m for m, _ in fake_bot.calls] == ["send_message", "delete_message", "send_message"]
+
+
+def test_mission_result_api_calls():
+    # before: every announcement is its own API call
+    unbuffered = FakeBot()
+    game = quest_game()
+    existingGames[game.key] = game
+    asyncio.run(_routine_post_mission_phase(fake_context(unbuffered), game))  # pyright: ignore[reportArgumentType]
+
+    # after: mission result and next turn header are merged
+    buffered = FakeBot()
+    outbox = Outbox(buffered)  # pyright: ignore[reportArgumentType]
+    game = quest_game()
+    existingGames[game.key] = game
+
+    async def run():
+        await _routine_post_mission_phase(fake_context(outbox), game)  # pyright: ignore[reportArgumentType]
+        await outbox.flush()
+
+    asyncio.run(run())
+    del existingGames[game.key]
+
+    assert unbuffered.count("send_message") == 2
+    assert buffered.count("send_message") == 1
+    assert buffered.count() == unbuffered.count() - 1
+    # the board is edited after the announcement, then the poll goes to the leader
+    assert [m for m, _ in buffered.calls] == ["send_message", "edit_message_text", "send_poll"]
+    _ = scoreboards.pop(game.key)
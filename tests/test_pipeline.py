@@ -0,0 +1,252 @@
+import asyncio
+import contextlib
+import warnings
+from types import SimpleNamespace
+
+from avalontgbot.pipeline import Lane, PriorityUpdateProcessor, classify
+
+
+def message_update(chat_id: int, text: str, replies: list[str] | None = None, type: str = "supergroup"):
+    async def reply_text(text: str):
+        if replies is not None:
+            replies.append(text)
+
+    return SimpleNamespace(
+        callback_query=None,
+        poll_answer=None,
+        effective_chat=SimpleNamespace(id=chat_id, type=type),
+        effective_message=SimpleNamespace(text=text, reply_text=reply_text),
+    )
+
+
+def vote_update(chat_id: int):
+    return SimpleNamespace(
+        callback_query=SimpleNamespace(id="cb"),
+        poll_answer=None,
+        effective_chat=SimpleNamespace(id=chat_id),
+        effective_message=None,
+    )
+
+
+def test_classify():
+    assert classify(vote_update(1)) == Lane.GAME
+    assert classify(message_update(1, "/join@AvalonBot")) == Lane.COMMAND
+    assert classify(message_update(1, "/rules")) == Lane.INFO
+    assert classify(message_update(1, "hello")) == Lane.INFO
+    assert classify(message_update(1, "/start", type="private")) == Lane.COMMAND
+    assert classify(message_update(-1, "/start")) == Lane.INFO
+
+
+async def run_blocked(processor: PriorityUpdateProcessor, updates: list[tuple[str, object]]) -> list[str]:
+    """
+    Occupy the only worker, queue the updates, then release the worker.
+    :return: the names of the updates in the order they ran
+    """
+    order: list[str] = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        await gate.wait()
+
+    async def record(name: str):
+        order.append(name)
+
+    first = asyncio.create_task(processor.process_update(message_update(0, "/rules"), blocker()))
+    await asyncio.sleep(0)
+
+    tasks = [
+        asyncio.create_task(processor.process_update(update, record(name)))
+        for name, update in updates
+    ]
+    await asyncio.sleep(0)
+
+    gate.set()
+    await asyncio.gather(first, *tasks)
+
+    return order
+
+
+def test_game_updates_first():
+    processor = PriorityUpdateProcessor(workers=1)
+
+    order = asyncio.run(
+        run_blocked(
+            processor,
+            [
+                ("rules", message_update(1, "/rules")),
+                ("join", message_update(2, "/join")),
+                ("vote", vote_update(3)),
+            ],
+        )
+    )
+
+    assert order == ["vote", "join", "rules"]
+
+
+def test_chats_take_turns():
+    processor = PriorityUpdateProcessor(workers=1)
+
+    order = asyncio.run(
+        run_blocked(
+            processor,
+            [
+                ("a1", vote_update(1)),
+                ("a2", vote_update(1)),
+                ("a3", vote_update(1)),
+                ("b1", vote_update(2)),
+            ],
+        )
+    )
+
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+def test_chat_order_across_lanes():
+    processor = PriorityUpdateProcessor(workers=1)
+
+    order = asyncio.run(
+        run_blocked(
+            processor,
+            [
+                ("join", message_update(1, "/join")),
+                ("vote", vote_update(1)),
+                ("other vote", vote_update(2)),
+            ],
+        )
+    )
+
+    # the vote of the first chat waits for the command that came before it
+    assert order == ["other vote", "join", "vote"]
+
+
+def test_one_update_per_chat():
+    processor = PriorityUpdateProcessor(workers=4)
+    running: dict[int, int] = {1: 0, 2: 0}
+    peak: dict[int, int] = {1: 0, 2: 0}
+
+    async def handle(chat_id: int):
+        running[chat_id] += 1
+        peak[chat_id] = max(peak[chat_id], running[chat_id])
+        await asyncio.sleep(0.001)
+        running[chat_id] -= 1
+
+    async def run():
+        await asyncio.gather(
+            *(processor.process_update(vote_update(c), handle(c)) for c in [1, 2] * 5)
+        )
+
+    asyncio.run(run())
+
+    assert peak == {1: 1, 2: 1}
+
+
+def test_info_shed_when_full():
+    processor = PriorityUpdateProcessor(
+        workers=1, capacities={Lane.INFO: 1}, busy_text=lambda update: f"busy {update.effective_chat.id}"
+    )
+    replies: list[str] = []
+
+    order = asyncio.run(
+        run_blocked(
+            processor,
+            [
+                ("rules", message_update(1, "/rules", replies)),
+                ("help", message_update(2, "/help", replies)),
+                ("vote", vote_update(3)),
+            ],
+        )
+    )
+
+    assert order == ["vote", "rules"]
+    assert replies == ["busy 2"]
+    assert processor.metrics()["shed"] == {"GAME": 0, "COMMAND": 0, "INFO": 1}
+
+
+def test_private_start_never_shed():
+    processor = PriorityUpdateProcessor(
+        workers=1, capacities={Lane.COMMAND: 1}, busy_text=lambda _: "busy"
+    )
+    replies: list[str] = []
+
+    order = asyncio.run(
+        run_blocked(
+            processor,
+            [
+                ("join", message_update(-1, "/join", replies)),
+                ("start", message_update(2, "/start", replies, type="private")),
+                ("leave", message_update(-3, "/leave", replies)),
+            ],
+        )
+    )
+
+    assert order == ["join", "start"]
+    assert len(replies) == 1
+    assert processor.metrics()["shed"]["COMMAND"] == 1
+
+
+def test_game_lane_waits_when_full():
+    processor = PriorityUpdateProcessor(workers=1, capacities={Lane.GAME: 1})
+
+    order = asyncio.run(
+        run_blocked(processor, [(f"vote{i}", vote_update(i)) for i in range(3)])
+    )
+
+    # no vote is dropped
+    assert sorted(order) == ["vote0", "vote1", "vote2"]
+    assert processor.metrics()["shed"]["GAME"] == 0
+
+
+def test_metrics_depth():
+    processor = PriorityUpdateProcessor(workers=1)
+    gate = asyncio.Event()
+
+    async def run():
+        first = asyncio.create_task(processor.process_update(vote_update(0), gate.wait()))
+        queued = [
+            asyncio.create_task(processor.process_update(message_update(i, "/rules"), asyncio.sleep(0)))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+
+        metrics, summary = processor.metrics(), processor.summary()
+        gate.set()
+        await asyncio.gather(first, *queued)
+        return metrics, summary
+
+    metrics, summary = asyncio.run(run())
+
+    assert metrics["running"] == 1
+    assert metrics["depth"] == {"GAME": 0, "COMMAND": 0, "INFO": 3}
+    assert summary == "Pipeline: 1 running, queued GAME 0, COMMAND 0, INFO 3, dropped GAME 0, COMMAND 0, INFO 0"
+    assert processor.metrics()["depth"]["INFO"] == 0
+
+
+def test_updates_run_inside_the_context_of_their_key():
+    entered: list[object] = []
+    handled: list[int] = []
+
+    @contextlib.asynccontextmanager
+    async def around(key):
+        if key == 2:
+            raise TimeoutError("game held elsewhere")
+        entered.append(key)
+        yield
+
+    async def handle(chat_id: int):
+        handled.append(chat_id)
+
+    async def scenario():
+        processor = PriorityUpdateProcessor(around=around)
+        await processor.process_update(vote_update(1), handle(1))
+        # the context failed, the update is dropped and the pipeline goes on
+        await processor.process_update(vote_update(2), handle(2))
+        await processor.process_update(vote_update(3), handle(3))
+        assert processor.metrics()["running"] == 0
+
+    with warnings.catch_warnings():
+        # a dropped handler must not be left never awaited
+        warnings.simplefilter("error")
+        asyncio.run(scenario())
+
+    assert entered == [1, 3]
+    assert handled == [1, 3]
@@ -0,0 +1,19 @@
+from avalontgbot.player import Player
+
+
+def test_mention_cached():
+    p = Player(1, "Arthur")
+
+    assert p.mention() == '<a href="tg://user?id=1">Arthur</a>'
+    assert p.mention() is p.mention()
+
+
+def test_mention_refreshed_on_rename():
+    p = Player(1, "Arthur")
+    _ = p.mention()
+
+    p.tg_name = "Arthur <King>"
+
+    # names are escaped, so they cannot break the HTML message
+    assert p.mention() == '<a href="tg://user?id=1">Arthur &lt;King&gt;</a>'
+    assert str(p) == "Arthur <King>"
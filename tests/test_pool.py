@@ -0,0 +1,132 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from avalontgbot import controller
+from avalontgbot.controller import _group_bot, _private_bot
+from avalontgbot.pool import BotPool
+
+from conftest import FakeBot, fake_context
+
+
+class RateLimitedBot(FakeBot):
+    """
+    Fake bot sending one message at a time, like a token hitting its rate limit.
+    """
+
+    def __init__(self, id: int, delay: float):
+        super().__init__(id)
+        self._delay: float = delay
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any):
+        async with self._lock:
+            await asyncio.sleep(self._delay)
+            return await super().send_message(chat_id, text, **kwargs)
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch) -> BotPool:
+    pool = BotPool()
+    monkeypatch.setattr(controller, "botPool", pool)
+    return pool
+
+
+def test_pin_first_bot_wins():
+    pool = BotPool()
+
+    assert pool.pin_chat(-1, 10) == 10
+    assert pool.pin_chat(-1, 20) == 10
+    assert pool.for_chat(-1) is None  # bot 10 not added yet
+
+    bot = FakeBot(10)
+    pool.add(bot)
+    assert pool.for_chat(-1) is bot
+    assert pool.for_user(5) is None
+
+
+def test_changes_between_nodes():
+    a, b = BotPool(), BotPool()
+    assert a.changes() == ({}, {}) and b.changes() == ({}, {})
+
+    assert a.pin_chat(-1, 111) == 111
+    _ = a.pin_chat(-1, 222)
+    a.note_user(5, 222)
+    chats, users = a.changes()
+    assert (chats, users) == ({-1: 111}, {5: 222})
+    assert a.changes() == ({}, {})
+
+    # the other node serves the group with the same bot, and messages the user through the one started
+    for chat_id, bot_id in chats.items():
+        b.apply_chat(chat_id, bot_id)
+    for user_id, bot_id in users.items():
+        b.apply_user(user_id, bot_id)
+    assert b.pin_chat(-1, 333) == 111
+    assert b.changes() == ({}, {})
+
+    # a start not shared yet wins over the ones of other nodes
+    b.note_user(6, 333)
+    b.apply_user(6, 111)
+    assert b.changes() == ({}, {6: 333})
+
+
+def test_single_bot_uses_context(pool: BotPool):
+    bot = FakeBot(1)
+    pool.add(bot)
+    context = fake_context(SimpleNamespace(id=1))
+
+    # with a single token nothing changes
+    assert _group_bot(context, -1) is context.bot  # pyright: ignore[reportArgumentType]
+    assert _private_bot(context, 5) is context.bot  # pyright: ignore[reportArgumentType]
+
+
+def test_routing(pool: BotPool):
+    group_bot, user_bot = FakeBot(1), FakeBot(2)
+    pool.add(group_bot)
+    pool.add(user_bot)
+    _ = pool.pin_chat(-1, group_bot.id)
+    pool.note_user(5, user_bot.id)
+
+    # e.g. a poll answer received by the user's bot
+    context = fake_context(user_bot)
+
+    assert _group_bot(context, -1) is group_bot  # pyright: ignore[reportArgumentType]
+    assert _private_bot(context, 5) is user_bot  # pyright: ignore[reportArgumentType]
+    # unknown users fall back to the bot of the update
+    assert _private_bot(context, 6) is user_bot  # pyright: ignore[reportArgumentType]
+
+
+async def announce_all(pool_size: int, num_games: int, messages: int, delay: float) -> float:
+    """
+    Send the announcements of concurrent games, each group pinned to a bot of the pool.
+    :return: the elapsed time
+    """
+    bots = [RateLimitedBot(i + 1, delay) for i in range(pool_size)]
+    for bot in bots:
+        controller.botPool.add(bot)
+
+    for game_id in range(num_games):
+        _ = controller.botPool.pin_chat(-game_id - 1, bots[game_id % pool_size].id)
+
+    async def game(chat_id: int):
+        context = fake_context(bots[0])
+        for i in range(messages):
+            _ = await _group_bot(context, chat_id).send_message(chat_id=chat_id, text=str(i))  # pyright: ignore[reportArgumentType]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(game(-g - 1) for g in range(num_games)))
+    return time.perf_counter() - start
+
+
+def test_throughput_grows_with_pool(monkeypatch: pytest.MonkeyPatch):
+    elapsed: dict[int, float] = {}
+
+    for size in (1, 4):
+        monkeypatch.setattr(controller, "botPool", BotPool())
+        elapsed[size] = asyncio.run(announce_all(size, num_games=8, messages=5, delay=0.002))
+
+    # 4 tokens send the same messages at least twice as fast as one
+    assert elapsed[4] * 2 < elapsed[1]
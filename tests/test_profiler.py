@@ -0,0 +1,72 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from avalontgbot.game import Game
+from avalontgbot.player import Player
+from avalontgbot.profiler import SamplingProfiler
+
+
+def busy_handler(stop: threading.Event) -> None:
+    game = Game(Player(1, "Host"), -800)  # noqa: F841, found by the profiler
+    while not stop.is_set():
+        _ = sum(range(1000))
+
+
+def test_collapse_attributes_handler_and_phase():
+    profiler = SamplingProfiler(handlers_module=__name__)
+
+    # the sampled stack, seen from the calling thread itself
+    def inner() -> str:
+        game = Game(Player(1, "Host"), -800)  # noqa: F841
+        return profiler.collapse(sys._getframe())
+
+    stack = inner()
+
+    handler, phase, *frames = stack.split(";")
+    assert handler == "test_collapse_attributes_handler_and_phase"
+    assert phase == "LOBBY"
+    assert frames[-1] == f"{__name__}:inner"
+
+
+def test_profile_window(tmp_path: Path):
+    profiler = SamplingProfiler(interval=0.001, directory=tmp_path, handlers_module=__name__)
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_handler, args=(stop,))
+    worker.start()
+
+    try:
+        assert not profiler.running
+        path = profiler.start(0.2, worker.ident)
+        assert profiler.running
+
+        with pytest.raises(ValueError):
+            _ = profiler.start(1, worker.ident)
+
+        time.sleep(0.05)
+        profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    # nothing left running once the window is over
+    assert not profiler.running
+    assert all(t.name != "profiler" for t in threading.enumerate())
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) > 0
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("busy_handler;LOBBY;") for line in lines)
+
+
+def test_window_is_bounded(tmp_path: Path):
+    profiler = SamplingProfiler(directory=tmp_path)
+
+    with pytest.raises(ValueError):
+        _ = profiler.start(0)
+
+    with pytest.raises(ValueError):
+        _ = profiler.start(10_000)
@@ -0,0 +1,172 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from pytest import raises
+from telegram.error import Forbidden
+
+from avalontgbot.controller import existingGames, handle_start_game, reachableUsers
+from avalontgbot.game import Game
+from avalontgbot.gamephase import GamePhase as PHASE
+from avalontgbot.player import Player
+from avalontgbot.reachability import ReachabilityCache
+
+from conftest import FakeBot, fake_context
+
+GROUP_ID = -200
+
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ReachabilityCache(ttl=10, clock=clock)
+
+    # never seen, worth a try
+    assert cache.status(1) is None and cache.is_reachable(1)
+
+    cache.mark_reachable(1)
+    clock.now = 5
+    assert cache.status(1) is True
+
+    # seeing the user again refreshes the TTL
+    cache.mark_reachable(1)
+    clock.now = 14
+    assert cache.status(1) is True
+
+    cache.mark_unreachable(1)
+    clock.now = 20
+    assert not cache.is_reachable(1)
+
+    # failures are forgotten too, e.g. the user started the bot meanwhile
+    clock.now = 25
+    assert cache.is_reachable(1)
+    assert len(cache) == 0
+
+
+def test_unreachable_order():
+    cache = ReachabilityCache()
+    cache.mark_unreachable(1)
+    cache.mark_reachable(2)
+    cache.mark_reachable(3)
+    cache.mark_unreachable(3)
+
+    assert cache.unreachable([1, 2, 3, 4]) == [1, 3]
+
+
+def test_dump_keeps_the_time_left():
+    old_clock, new_clock = FakeClock(), FakeClock()
+    old = ReachabilityCache(ttl=10, clock=old_clock)
+    old_clock.now = 100
+    old.mark_reachable(1)
+    old_clock.now = 105
+
+    # the clock of another process starts anywhere
+    new = ReachabilityCache(ttl=10, clock=new_clock)
+    new.load(old.dump())
+    new_clock.now = 4
+    assert new.status(1) is True
+    new_clock.now = 6
+    assert new.status(1) is None
+
+
+def test_changes_between_nodes():
+    clock_a, clock_b = FakeClock(), FakeClock()
+    a, b = ReachabilityCache(ttl=10, clock=clock_a), ReachabilityCache(ttl=10, clock=clock_b)
+
+    # tracked from the first call on
+    a.mark_reachable(1)
+    assert a.changes() == {}
+    a.mark_unreachable(2)
+    a.forget(3)
+    assert a.changes() == {2: (False, 10), 3: None}
+    assert a.changes() == {}
+
+    clock_b.now = 50
+    assert b.changes() == {}
+    b.apply(2, (False, 4))
+    b.apply(1, (True, -1))
+    assert b.status(2) is False and b.status(1) is None
+
+    # a change not shared yet wins over the ones of other nodes
+    b.mark_reachable(2)
+    b.apply(2, (False, 10))
+    assert b.status(2) is True
+    assert b.changes() == {2: (True, 10)}
+
+    clock_b.now = 61
+    b.apply(2, None)
+    assert b.status(2) is None
+
+
+@pytest.fixture
+def lobby():
+    game = Game(Player(1, "Creator"), GROUP_ID)
+    for i in range(2, 6):
+        game.player_join(Player(i, f"Player{i}"))
+    existingGames[game.key] = game
+    yield game
+    _ = existingGames.pop(game.key, None)
+    for p in game.players:
+        reachableUsers.forget(p.userid)
+
+
+def start_update(user_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        message=SimpleNamespace(chat_id=GROUP_ID, message_thread_id=None, is_topic_message=False),
+        effective_user=SimpleNamespace(id=user_id),
+    )
+
+
+def test_start_blocked_before_any_change(lobby: Game, fake_bot: FakeBot):
+    for p in lobby.players[3:]:
+        reachableUsers.mark_unreachable(p.userid)
+
+    with raises(ValueError, match="Player4, Player5"):
+        asyncio.run(handle_start_game(start_update(1), fake_context(fake_bot)))  # pyright: ignore[reportArgumentType]
+
+    assert lobby.phase == PHASE.LOBBY
+    assert all(p.role is None for p in lobby.players)
+    assert fake_bot.count() == 0
+
+
+def test_start_when_everyone_reachable(lobby: Game, fake_bot: FakeBot):
+    # unknown players are tried
+    asyncio.run(handle_start_game(start_update(1), fake_context(fake_bot)))  # pyright: ignore[reportArgumentType]
+
+    assert lobby.phase == PHASE.BUILD_TEAM
+    assert all(reachableUsers.status(p.userid) is True for p in lobby.players)
+
+
+class BlockedBot(FakeBot):
+    """
+    Bot blocked in private chat by some users.
+    """
+
+    def __init__(self, blocked: set[int]):
+        super().__init__()
+        self._blocked: set[int] = blocked
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any):
+        if chat_id in self._blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        return await super().send_message(chat_id, text, **kwargs)
+
+
+def test_start_aborted_on_failed_message(lobby: Game):
+    bot = BlockedBot({4})
+
+    with raises(ValueError, match="Player4"):
+        asyncio.run(handle_start_game(start_update(1), fake_context(bot)))  # pyright: ignore[reportArgumentType]
+
+    # left in the lobby, without roles, and the next start is stopped beforehand
+    assert lobby.phase == PHASE.LOBBY
+    assert all(p.role is None for p in lobby.players)
+    assert reachableUsers.unreachable(p.userid for p in lobby.players) == [4]
@@ -13,3 +13,21 @@ def test_description():
         description = role_instance.description()
         assert isinstance(description, str), f"Description for {role_instance.name} is not a string."
         assert description, f"Description for {role_instance.name} is empty."
+
+
+def test_visibility():
+    # minions know each other, but not Oberon
+    assert Role.MORDRED in Role.ASSASSIN.visibility
+    assert Role.OBERON not in Role.ASSASSIN.visibility
+    assert len(Role.OBERON.visibility) == 0
+
+    # Merlin does not see Mordred
+    assert Role.MORGANA in Role.MERLIN.visibility
+    assert Role.MORDRED not in Role.MERLIN.visibility
+
+    # Percival cannot tell Merlin and Morgana apart
+    assert Role.PERCIVAL.visibility[Role.MERLIN] == Role.PERCIVAL.visibility[Role.MORGANA]
+
+    # good players never see each other as evil
+    assert all(r.is_good for r in Role.PERCIVAL.visibility if r != Role.MORGANA)
+    assert len(Role.LSOA.visibility) == 0
@@ -0,0 +1,103 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+from avalontgbot.agent import Agent
+from avalontgbot.controller import (
+    _routine_start_game,
+    existingGames,
+    handle_status,
+    scoreboards,
+    translator,
+)
+from avalontgbot.game import Game
+from avalontgbot.scoreboard import Scoreboard
+from avalontgbot.simulator import agent_game
+
+from conftest import FakeBot, fake_context
+
+GROUP_ID = -700
+
+
+def counting_render() -> tuple[list[str], object]:
+    rendered: list[str] = []
+
+    def render(key: str, **kwargs) -> str:
+        rendered.append(key)
+        return translator.render(GROUP_ID, key, **kwargs)
+
+    return rendered, render
+
+
+def test_only_changed_sections_are_rendered():
+    rendered, render = counting_render()
+    game = agent_game(5, rng=random.Random(0))
+    board = Scoreboard(render)
+
+    assert board.update(game)
+    assert "⬜⬜⬜⬜⬜" in board.text
+    assert "[2]" in board.text and "0/5" in board.text
+    first = len(rendered)
+
+    # nothing changed, nothing rendered
+    assert not board.update(game)
+    assert len(rendered) == first
+
+    # a rejection moves the leader and the counter, missions and team sizes are kept
+    game.create_team(game.players[: game.team_sizes[game.turn]])
+    for p in game.players:
+        _ = game.add_player_vote(p, False)
+    _ = game.update_after_team_decision()
+
+    assert board.update(game)
+    assert sorted(rendered[first:]) == ["board.leaders", "board.rejections", "board.turn"]
+    assert "1/5" in board.text
+
+
+def test_board_is_edited_once_per_phase(fake_bot: FakeBot):
+    rng = random.Random(1)
+    agents = [Agent(-i, rng=rng) for i in range(1, 6)]
+    game = Game(agents[0], GROUP_ID)
+    for agent in agents[1:]:
+        game.player_join(agent)
+    existingGames[game.key] = game
+
+    # agents play every phase on their own through the controller
+    asyncio.run(_routine_start_game(fake_context(fake_bot), game))  # pyright: ignore[reportArgumentType]
+
+    assert game.key not in existingGames
+    assert game.key not in scoreboards
+
+    sent = [kw for m, kw in fake_bot.calls if m == "send_message" and "disable_notification" in kw]
+    edits = [kw for m, kw in fake_bot.calls if m == "edit_message_text"]
+
+    assert len(sent) == 1 and fake_bot.count("pin_chat_message") == 1
+    # every edit changes the text
+    texts = [sent[0]["text"]] + [kw["text"] for kw in edits]
+    assert all(a != b for a, b in zip(texts, texts[1:]))
+    assert "wins" in texts[-1]
+
+
+def test_status_serves_the_cached_board(fake_bot: FakeBot):
+    game = agent_game(5, rng=random.Random(2))
+    existingGames[game.key] = game
+    board = scoreboards[game.key] = Scoreboard(lambda key, **kw: translator.render(GROUP_ID, key, **kw))
+    _ = board.update(game)
+
+    replies: list[str] = []
+
+    async def reply_text(text: str, **kwargs):
+        replies.append(text)
+
+    update = SimpleNamespace(
+        message=SimpleNamespace(
+            chat_id=game.id, message_thread_id=None, is_topic_message=False, reply_text=reply_text
+        ),
+        effective_chat=SimpleNamespace(id=game.id),
+    )
+
+    asyncio.run(handle_status(update, fake_context(fake_bot)))  # pyright: ignore[reportArgumentType]
+
+    del existingGames[game.key], scoreboards[game.key]
+
+    assert replies == [board.text]
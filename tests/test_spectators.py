@@ -0,0 +1,181 @@
+import asyncio
+import json
+import pickle
+from types import SimpleNamespace
+
+from telegram.error import Forbidden
+
+from avalontgbot import controller
+from avalontgbot.backend import encode_key
+from avalontgbot.constants import STATE_VERSION
+from avalontgbot.controller import _broadcast
+from avalontgbot.game import Game
+from avalontgbot.outbox import Outbox
+from avalontgbot.player import Player
+from avalontgbot.spectators import SpectatorFeed
+
+from conftest import FakeBot, fake_context
+
+KEY = (-600, 7)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_game_codes():
+    feed = SpectatorFeed()
+    code = feed.issue_code(KEY)
+
+    # random, not the chat id, and stable for the game
+    assert str(KEY[0]) not in code
+    assert feed.issue_code(KEY) == code and feed.code(KEY) == code
+    assert feed.issue_code((-600, None)) != code
+    assert feed.find(code) == KEY and feed.find("-600:7") is None
+
+    feed.close(KEY)
+    assert feed.find(code) is None and feed.code(KEY) is None
+
+
+def test_changes_between_nodes():
+    a, b = SpectatorFeed(), SpectatorFeed()
+    assert a.changes() == ({}, {}) and b.changes() == ({}, {})
+
+    # the game starts on a, and a chat follows it from b
+    code = a.issue_code(KEY)
+    codes, _ = a.changes()
+    assert codes == {KEY: code}
+    b.apply_code(KEY, code)
+    assert b.find(code) == KEY
+
+    b.subscribe(KEY, 42)
+    _, subscriptions = b.changes()
+    assert subscriptions == {(KEY, 42): True}
+    a.apply_subscription(KEY, 42, True)
+    assert a.has_subscribers(KEY)
+
+    # the game ends on a, for every node
+    a.close(KEY)
+    codes, subscriptions = a.changes()
+    assert codes == {KEY: None} and subscriptions == {(KEY, 42): False}
+    b.apply_code(KEY, None)
+    assert b.find(code) is None and not b.has_subscribers(KEY)
+
+    # a chat following it meanwhile from another node follows nothing
+    b.apply_subscription(KEY, 43, True)
+    assert not b.has_subscribers(KEY)
+
+
+def test_fan_out(fake_bot: FakeBot):
+    clock = FakeClock()
+    feed = SpectatorFeed(rate=10, clock=clock, sleep=clock.sleep)
+
+    assert not feed.publish(fake_bot, KEY, "nobody is watching")
+
+    for chat_id in (1, 2, 3):
+        feed.subscribe(KEY, chat_id)
+
+    async def run():
+        assert feed.publish(fake_bot, KEY, "first")
+        assert feed.publish(fake_bot, KEY, "second")
+        # publishing never waits for the messages
+        assert fake_bot.count() == 0
+        await feed.drain()
+
+    asyncio.run(run())
+
+    sent = [(kw["chat_id"], kw["text"]) for _, kw in fake_bot.calls]
+    assert sorted(sent[:3]) == [(1, "first"), (2, "first"), (3, "first")]
+    assert sorted(sent[3:]) == [(1, "second"), (2, "second"), (3, "second")]
+    # 6 messages at 10 per second
+    assert abs(sum(clock.sleeps) - 0.5) < 1e-9
+
+
+def test_full_queue_drops(fake_bot: FakeBot):
+    feed = SpectatorFeed(capacity=1)
+    feed.subscribe(KEY, 1)
+
+    async def run():
+        assert feed.publish(fake_bot, KEY, "kept")
+        assert not feed.publish(fake_bot, KEY, "dropped")
+        await feed.drain()
+
+    asyncio.run(run())
+
+    assert feed.dropped == 1
+    assert [kw["text"] for _, kw in fake_bot.calls] == ["kept"]
+
+
+def test_blocked_chat_unsubscribed():
+    class BlockedBot(FakeBot):
+        async def send_message(self, chat_id: int, text: str, **kwargs):
+            if chat_id == 2:
+                raise Forbidden("bot was kicked")
+            return await super().send_message(chat_id, text, **kwargs)
+
+    bot = BlockedBot()
+    feed = SpectatorFeed()
+    feed.subscribe(KEY, 1)
+    feed.subscribe(KEY, 2)
+
+    async def run():
+        _ = feed.publish(bot, KEY, "event")
+        await feed.drain()
+
+    asyncio.run(run())
+
+    assert not feed.unsubscribe(KEY, 2)
+    assert feed.unsubscribe(KEY, 1)
+
+
+def test_broadcast_renders_once(fake_bot: FakeBot):
+    game = Game(Player(1, "Host"), *KEY)
+    controller.spectatorFeed.subscribe(KEY, 42)
+    controller.chatTitles.set(KEY[0], "Round <table>")
+
+    async def run():
+        # the feed outlives the update, so it must not use its outbox
+        _broadcast(fake_context(Outbox(fake_bot)), game, "Good & evil")  # pyright: ignore[reportArgumentType]
+        await controller.spectatorFeed.drain()
+
+    try:
+        asyncio.run(run())
+    finally:
+        controller.spectatorFeed.close(KEY)
+
+    ((_, kwargs),) = fake_bot.calls
+    assert kwargs["chat_id"] == 42
+    assert kwargs["text"] == "👀 <b>Round &lt;table&gt;</b>\nGood &amp; evil"
+
+
+def test_spectate_a_game_held_by_another_node(fake_bot: FakeBot):
+    # sharing from the start, like a node with a backend
+    _ = controller.dump_shared()
+    # the code of a game started on another node, which this node never loaded
+    controller.load_shared(("spectate_code", encode_key(KEY), pickle.dumps((STATE_VERSION, "code-42"))))
+    assert KEY not in controller.existingGames
+
+    async def reply_text(text: str, **kwargs):
+        return None
+
+    update = SimpleNamespace(effective_chat=SimpleNamespace(id=42), message=SimpleNamespace(reply_text=reply_text))
+    context = fake_context(fake_bot)
+    context.args = ["code-42"]
+
+    try:
+        asyncio.run(controller.handle_spectate(update, context))  # pyright: ignore[reportArgumentType]
+
+        # shared with the node holding the game
+        assert controller.spectatorFeed.has_subscribers(KEY)
+        assert ("spectator", json.dumps([*KEY, 42])) in [entry[:2] for entry in controller.dump_shared()]
+    finally:
+        controller.spectatorFeed.close(KEY)
@@ -0,0 +1,111 @@
+from pathlib import Path
+
+import pytest
+
+from avalontgbot.controller import _remove_game, activePolls, dump_game, existingGames, load_game
+from avalontgbot.dispatch import UpdateEvent as UPDATE
+from avalontgbot.game import Game
+from avalontgbot.player import Player
+from avalontgbot.spill import SpillStore, spill_database
+
+GROUP_ID = -1300
+
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def lobby(id: int) -> Game:
+    game = Game(Player(1, "Player1"), id)
+    for i in range(2, 6):
+        game.player_join(Player(i, f"Player{i}"))
+    return game
+
+
+def test_idle_lobbies_are_spilled_and_restored(tmp_path: Path):
+    clock = FakeClock()
+    store = SpillStore(tmp_path / "spill.db", dump_game, load_game, existingGames, idle=60, clock=clock)
+    idle, busy, started = lobby(GROUP_ID), lobby(GROUP_ID - 1), lobby(GROUP_ID - 2)
+    started.start_game()
+    for game in (idle, busy, started):
+        existingGames[game.key] = game
+    activePolls["poll-roles"] = (UPDATE.ROLES_POLL, 3, idle.key)
+
+    assert store.spill() == 0
+    clock.now += 50
+    store.touch(busy.key)
+    clock.now += 20
+
+    # only the lobby untouched for a minute leaves memory, with its poll
+    assert store.spill() == 1
+    assert idle.key not in existingGames and idle.key in store
+    assert busy.key in existingGames and started.key in existingGames
+    assert "poll-roles" not in activePolls
+    assert store.find_poll("poll-roles") == idle.key
+
+    # and comes back on its next update
+    store.touch(idle.key)
+    restored = existingGames[idle.key]
+    assert [p.userid for p in restored.players] == [p.userid for p in idle.players]
+    assert activePolls["poll-roles"] == (UPDATE.ROLES_POLL, 3, idle.key)
+    assert idle.key not in store and store.find_poll("poll-roles") is None
+
+    for game in (idle, busy, started):
+        _remove_game(game.key)
+
+
+def test_spilled_lobbies_follow_the_games_of_the_process(tmp_path: Path):
+    clock = FakeClock()
+    old = SpillStore(tmp_path / "spill.db", dump_game, load_game, existingGames, idle=60, clock=clock)
+    game = existingGames[(GROUP_ID, None)] = lobby(GROUP_ID)
+    # idle from the first look at it
+    assert old.spill() == 0
+    clock.now += 60
+    assert old.spill() == 1
+    old.close()
+
+    # handed over to the next process, which restores it
+    new = SpillStore(tmp_path / "spill.db", dump_game, load_game, existingGames)
+    new.recover(handed_over=True)
+    new.touch(game.key)
+    assert existingGames[game.key].host.userid == 1
+    _remove_game(game.key)
+
+    # lost with the other games of a process that stopped without handing over
+    existingGames[game.key] = game
+    assert SpillStore(tmp_path / "spill.db", dump_game, load_game, existingGames, idle=0).spill() == 1
+    fresh = SpillStore(tmp_path / "spill.db", dump_game, load_game, existingGames)
+    fresh.recover(handed_over=False)
+    fresh.touch(game.key)
+    assert game.key not in existingGames and len(fresh) == 0
+
+
+def test_lobby_failing_to_load_stays_on_disk(tmp_path: Path):
+    clock = FakeClock()
+    failures = [ValueError("Cannot load the game of version 3, expected 4.")]
+
+    def load(key, data):
+        if data is not None and failures:
+            raise failures.pop()
+        load_game(key, data)
+
+    store = SpillStore(tmp_path / "spill.db", dump_game, load, existingGames, idle=0, clock=clock)
+    game = existingGames[(GROUP_ID, None)] = lobby(GROUP_ID)
+    assert store.spill() == 1
+
+    with pytest.raises(ValueError):
+        store.touch(game.key)
+    assert game.key in store and game.key not in existingGames
+
+    # the next update gets it
+    store.touch(game.key)
+    assert existingGames[game.key].host.userid == 1 and game.key not in store
+    _remove_game(game.key)
+
+
+def test_every_bot_spills_to_its_own_database():
+    assert spill_database(111) != spill_database(222)
@@ -0,0 +1,189 @@
+import asyncio
+import random
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from telegram.error import Forbidden
+
+from avalontgbot import controller
+from avalontgbot.controller import handle_next_round
+from avalontgbot.player import Player
+from avalontgbot.role import Role as ROLE
+from avalontgbot.tournament import Tournament, seat_tables
+
+from conftest import FakeBot, fake_context
+
+GROUP_ID = -400
+
+
+def roster(n: int) -> list[Player]:
+    return [Player(i, f"P{i}") for i in range(n)]
+
+
+def test_seat_tables():
+    assert [len(t) for t in seat_tables(roster(5))] == [5]
+    assert [len(t) for t in seat_tables(roster(11))] == [6, 5]
+    assert [len(t) for t in seat_tables(roster(23))] == [8, 8, 7]
+    assert sum(len(t) for t in seat_tables(roster(1000))) == 1000
+
+    with pytest.raises(ValueError):
+        _ = seat_tables(roster(4))
+
+
+def test_rounds_and_standings():
+    players = roster(10)
+    tournament = Tournament(players[0], GROUP_ID, rounds=2)
+    for p in players[1:]:
+        tournament.enter(p)
+
+    with pytest.raises(ValueError):
+        tournament.enter(Player(1, "again"))
+
+    (table,) = tournament.start_round(random.Random(0))
+    assert sorted(p.userid for p in table) == list(range(10))
+
+    # evil wins: players 0-3 were evil
+    game = SimpleNamespace(key=(GROUP_ID, 1), winner=False, players=table)
+    for p in table:
+        p.role = ROLE.MOM if p.userid < 4 else ROLE.LSOA
+
+    tournament.add_table(game.key)
+    with pytest.raises(ValueError):
+        _ = tournament.start_round()
+
+    assert tournament.record(game)  # pyright: ignore[reportArgumentType]
+    # recorded once
+    assert not tournament.record(game)  # pyright: ignore[reportArgumentType]
+
+    assert [points for _, points in tournament.standings()] == [1] * 4 + [0] * 6
+    # the next round is seated by standings
+    (table,) = tournament.start_round()
+    assert {p.userid for p in table[:4]} == {0, 1, 2, 3}
+    assert tournament.is_over
+
+    with pytest.raises(ValueError):
+        _ = tournament.start_round()
+
+
+class SlowBot(FakeBot):
+    """Opening a topic takes a while, to see how many tables open at the same time."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_flight: int = 0
+        self.max_in_flight: int = 0
+
+    async def create_forum_topic(self, chat_id: int, name: str, **kwargs: Any):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return await super().create_forum_topic(chat_id, name, **kwargs)
+
+
+def test_hundred_tables_start_together():
+    players = roster(1000)
+    tournament = Tournament(players[0], GROUP_ID, rounds=1)
+    for p in players[1:]:
+        tournament.enter(p)
+        controller.reachableUsers.mark_reachable(p.userid)
+    controller.reachableUsers.mark_reachable(0)
+    controller.tournaments[GROUP_ID] = tournament
+
+    async def reply_text(text: str, **kwargs: Any):
+        return None
+
+    update = SimpleNamespace(
+        effective_chat=SimpleNamespace(id=GROUP_ID),
+        effective_user=SimpleNamespace(id=0),
+        message=SimpleNamespace(reply_text=reply_text),
+    )
+    bot = SlowBot()
+
+    try:
+        asyncio.run(handle_next_round(update, fake_context(bot)))  # pyright: ignore[reportArgumentType]
+
+        assert bot.max_in_flight == 100
+        assert len(tournament.pending) == 100
+        assert all(key in controller.existingGames for key in tournament.pending)
+        assert all(controller.existingGames[key].is_ongoing for key in tournament.pending)
+    finally:
+        for key in tournament.pending:
+            _ = controller.existingGames.pop(key, None)
+        _ = controller.tournaments.pop(GROUP_ID, None)
+        for poll_id in [k for k, v in controller.activePolls.items() if v[2][0] == GROUP_ID]:
+            del controller.activePolls[poll_id]
+
+
+class BlockedBot(FakeBot):
+    """Blocked in private chat by some users."""
+
+    def __init__(self, blocked: set[int]):
+        super().__init__()
+        self._blocked: set[int] = blocked
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any):
+        if chat_id in self._blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        return await super().send_message(chat_id, text, **kwargs)
+
+
+def test_failed_table_is_dropped():
+    players = roster(11)
+    tournament = Tournament(players[0], GROUP_ID, rounds=1)
+    for p in players[1:]:
+        tournament.enter(p)
+    controller.tournaments[GROUP_ID] = tournament
+
+    async def reply_text(text: str, **kwargs: Any):
+        return None
+
+    update = SimpleNamespace(
+        effective_chat=SimpleNamespace(id=GROUP_ID),
+        effective_user=SimpleNamespace(id=0),
+        message=SimpleNamespace(reply_text=reply_text),
+    )
+    bot = BlockedBot({3})
+
+    try:
+        asyncio.run(handle_next_round(update, fake_context(bot)))  # pyright: ignore[reportArgumentType]
+
+        # the other table plays on, the one of the blocked player is gone
+        (key,) = tournament.pending
+        assert 3 not in {p.userid for p in controller.existingGames[key].players}
+        assert [k for k in controller.existingGames if k[0] == GROUP_ID] == [key]
+    finally:
+        for key in [k for k in controller.existingGames if k[0] == GROUP_ID]:
+            controller._remove_game(key)
+        _ = controller.tournaments.pop(GROUP_ID, None)
+        for p in players:
+            controller.reachableUsers.forget(p.userid)
+
+
+def test_shared_when_changed():
+    players = roster(3)
+    tournament = Tournament(players[0], GROUP_ID, rounds=1)
+    controller.tournaments[GROUP_ID] = tournament
+
+    def shared() -> list[tuple[str, str, bytes | None]]:
+        return [entry for entry in controller.dump_shared() if entry[0] == "tournament"]
+
+    try:
+        assert [key for _, key, _ in shared()] == [str(GROUP_ID)]
+        assert shared() == []
+
+        tournament.enter(players[1])
+        (entry,) = shared()
+
+        # another node takes it, and shares it only once it changes there
+        controller.tournaments[GROUP_ID] = Tournament(players[2], GROUP_ID, rounds=1)
+        controller.load_shared(entry)
+        assert [p.userid for p in controller.tournaments[GROUP_ID].roster] == [0, 1]
+        assert shared() == []
+
+        del controller.tournaments[GROUP_ID]
+        assert shared() == [("tournament", str(GROUP_ID), None)]
+    finally:
+        _ = controller.tournaments.pop(GROUP_ID, None)
+        _ = controller.tournamentDigests.pop(GROUP_ID, None)
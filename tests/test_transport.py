@@ -0,0 +1,42 @@
+import pytest
+from telegram.ext import ApplicationBuilder
+
+from avalontgbot.transport import PROFILES, load_profile
+
+
+def test_overrides_change_a_named_profile():
+    profile = load_profile("burst", {"pool_size": "32", "keepalive_expiry": "60", "http2": "no"})
+
+    assert profile.pool_size == 32
+    assert profile.keepalive_expiry == 60.0
+    assert not profile.http2
+    # the rest of the profile is kept, and the named one is untouched
+    assert profile.pool_timeout == PROFILES["burst"].pool_timeout
+    assert PROFILES["burst"].pool_size == 16
+
+
+@pytest.mark.parametrize(
+    "name, overrides",
+    [
+        ("fast", {}),
+        ("default", {"pools": "2"}),
+        ("default", {"pool_size": "many"}),
+        ("default", {"http2": "maybe"}),
+        ("default", {"pool_size": "0"}),
+    ],
+)
+def test_invalid_profiles_are_rejected(name: str, overrides: dict[str, str]):
+    with pytest.raises(ValueError):
+        _ = load_profile(name, overrides)
+
+
+def test_updates_and_sends_use_separate_pools():
+    profile = load_profile("lean", {"updates_pool_size": "2"})
+    application = profile.configure(ApplicationBuilder().token("123:test")).build()
+
+    updates, sends = application.bot._request  # pyright: ignore[reportAttributeAccessIssue]
+    pools = [r._client._transport._pool for r in (updates, sends)]  # pyright: ignore[reportAttributeAccessIssue]
+
+    assert [p._max_connections for p in pools] == [2, 4]
+    assert pools[1]._keepalive_expiry == 30.0
+    assert sends._client.timeout.pool == profile.pool_timeout  # pyright: ignore[reportAttributeAccessIssue]
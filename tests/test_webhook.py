@@ -0,0 +1,59 @@
+import asyncio
+import json
+from typing import Any
+
+import httpx
+import pytest
+from telegram import Bot
+
+from avalontgbot.webhook import WebhookRouter
+
+_ = pytest.importorskip("tornado")
+
+PORT = 18443
+
+
+class FakeApplication:
+    """
+    The parts of an application the router uses, with a bot recording its webhook.
+    """
+
+    def __init__(self, token: str):
+        calls: list[dict[str, Any]] = []
+
+        class WebhookBot(Bot):
+            async def set_webhook(self, **kwargs: Any) -> bool:  # pyright: ignore[reportIncompatibleMethodOverride]
+                calls.append(kwargs)
+                return True
+
+        self.bot: Bot = WebhookBot(token)
+        self.update_queue: asyncio.Queue[Any] = asyncio.Queue()
+        self.webhooks: list[dict[str, Any]] = calls
+
+
+def test_one_port_for_every_bot():
+    applications = [FakeApplication("111:first"), FakeApplication("222:second")]
+    router = WebhookRouter("https://example.org/", PORT, "127.0.0.1")
+
+    async def scenario() -> list[int]:
+        await router.start(applications)  # pyright: ignore[reportArgumentType]
+
+        async with httpx.AsyncClient() as client:
+            for update_id, application in enumerate(applications, 1):
+                response = await client.post(
+                    f"http://127.0.0.1:{PORT}/{application.bot.token}",
+                    content=json.dumps({"update_id": update_id}),
+                    headers={"Content-Type": "application/json"},
+                )
+                assert response.status_code == 200
+
+        await router.stop()
+        return [(await a.update_queue.get()).update_id for a in applications]
+
+    # each update went to the queue of its bot
+    assert asyncio.run(scenario()) == [1, 2]
+    assert [a.webhooks[0]["url"] for a in applications] == [
+        "https://example.org/111:first",
+        "https://example.org/222:second",
+    ]
+    assert not router.running